@@ -0,0 +1,180 @@
+# WI-MoNa_Batch.py
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+#=== Einlesen und Parsen der MoNa-Dateien --> modul_mona_import.py ===============================================
+from modul_mona_import import parse_mona, nur_gueltige_baggerfelder, SCHIFFSNAMEN
+
+#=== Cache für geparste MoNa-Dateien (SHA-256 → Parquet) --> modul_mona_cache.py =================================
+from modul_mona_cache import MonaCache
+
+#=== Baggerfeldgrenzen (LandXML) und geometrische Feldzuordnung --> modul_baggerfelder_xml_import.py / modul_feldzuordnung.py ===
+from modul_baggerfelder_xml_import import lade_baggerfelder
+from modul_feldzuordnung import ergaenze_feldzuordnung
+
+#=== Koordinatensystem erkennen --> modul_koordinatenerkennung.py ================================================
+from modul_koordinatenerkennung import erkenne_koordinatensystem
+
+#=== Solltiefe berechnen --> modul_solltiefe_berechnen.py ========================================================
+from modul_solltiefe_berechnen import berechne_solltiefe
+
+#=== Zeit-Auswertung --> modul_zeitauswertung.py =================================================================
+from modul_zeitauswertung import werte_zeit_aus, schreibe_excel, BERICHTE
+
+
+#=== Batch-Auswertung eines Kampagnen-Verzeichnisses ohne Browser ================================================
+# ⤷ Liest alle MoNa-Dateien (.txt) eines Verzeichnisses (inkl. Unterordner) und wertet je Schiff und Tag aus
+# ⤷ Liegen LandXML-Dateien (.xml) dabei, wird "Position" geometrisch gegen die Baggerfeldgrenzen geprüft
+# ⤷ Schreibt je Schiff/Tag die drei Excel-Berichte der Zeit-Auswertung: <ausgabe>/<Schiff>/<Datum>/*.xlsx
+# ⤷ Die Tage werden parallel ausgewertet, jeder fertige Tag wird sofort geschrieben und gemeldet
+#
+# Aufruf:  python WI-MoNa_Batch.py <verzeichnis> [-o <ausgabe>] [--worker N] [--toleranz-oben 1.0] ...
+
+
+def finde_dateien(verzeichnis, endung=".txt"):
+    # Alle Dateien mit der Endung im Verzeichnis und allen Unterordnern, sortiert
+    return sorted(
+        os.path.join(ordner, name)
+        for ordner, _, namen in os.walk(verzeichnis)
+        for name in namen
+        if name.lower().endswith(endung)
+    )
+
+
+def tage_je_schiff(df, toleranz_oben, toleranz_unten):
+    """
+    Teilt den Datensatz in Schiff/Tag-Abschnitte auf.
+
+    Die Solltiefe wird je Schiff über den gesamten Zeitraum berechnet, damit das Fortschreiben
+    der letzten Solltiefe auch über Mitternacht und Dateigrenzen hinweg funktioniert.
+
+    Yields:
+        tuple: (Schiffsname, Datum, DataFrame des Tages)
+    """
+    for bnr, df_schiff in df.groupby("Baggernummer", observed=True):
+        df_schiff = berechne_solltiefe(df_schiff, toleranz_oben, toleranz_unten)
+        schiff = SCHIFFSNAMEN.get(bnr, f"Bagger {bnr}")
+        for tag, df_tag in df_schiff.groupby(df_schiff["timestamp"].dt.normalize()):
+            yield schiff, tag.date(), df_tag
+
+
+def werte_tag_aus(schiff, tag, df_tag, einstellungen, ausgabe):
+    # Läuft im Worker-Prozess: auswerten und die Berichte direkt schreiben
+    tabellen = werte_zeit_aus(df_tag, **einstellungen)
+    ziel = os.path.join(ausgabe, schiff.replace(" ", "_"), tag.isoformat())
+    os.makedirs(ziel, exist_ok=True)
+
+    geschrieben = []
+    for bericht, dateiname in BERICHTE.items():
+        if tabellen[bericht] is not None:
+            pfad = os.path.join(ziel, dateiname)
+            schreibe_excel(tabellen[bericht], pfad)
+            geschrieben.append(pfad)
+    return schiff, tag, len(df_tag), geschrieben
+
+
+def auswerten(verzeichnis, ausgabe, einstellungen, worker=1, cache=None):
+    """
+    Wertet alle MoNa-Dateien eines Verzeichnisses je Schiff und Tag aus.
+
+    Args:
+        verzeichnis (str): Kampagnen-Verzeichnis
+        ausgabe (str): Zielverzeichnis der Excel-Berichte
+        einstellungen (dict): Parameter für werte_zeit_aus (Toleranzen, Fehlerbedingungen, Zeitformat)
+        worker (int): Anzahl Prozesse
+        cache (MonaCache, optional): Cache für bereits geparste Dateien
+
+    Yields:
+        tuple: (Schiffsname, Datum, Anzahl Datenpunkte, geschriebene Dateien) je fertigem Tag
+    """
+    mona_pfade = finde_dateien(verzeichnis)
+    if not mona_pfade:
+        return
+
+    df = nur_gueltige_baggerfelder(parse_mona(mona_pfade, cache=cache, worker=worker, nach_schiff=True))
+
+    xml_pfade = finde_dateien(verzeichnis, ".xml")
+    if xml_pfade:
+        _, epsg_code, _ = erkenne_koordinatensystem(df)
+        if epsg_code is None:
+            print("Koordinatensystem nicht erkannt – LandXML-Dateien werden ignoriert.", file=sys.stderr)
+        else:
+            baggerfelder = []
+            for pfad in xml_pfade:
+                with open(pfad, "rb") as f:
+                    baggerfelder.extend(lade_baggerfelder(f.read(), epsg_code, cache=cache))
+            df = ergaenze_feldzuordnung(df, baggerfelder)
+    tage = tage_je_schiff(df, einstellungen["toleranz_oben"], einstellungen["toleranz_unten"])
+
+    if worker <= 1:
+        for schiff, tag, df_tag in tage:
+            yield werte_tag_aus(schiff, tag, df_tag, einstellungen, ausgabe)
+        return
+
+    # Nur wenige Tage gleichzeitig an die Worker geben, fertige Tage sofort melden
+    with ProcessPoolExecutor(max_workers=worker) as pool:
+        laufend = set()
+        for schiff, tag, df_tag in tage:
+            if len(laufend) >= 2 * worker:
+                fertig, laufend = wait(laufend, return_when=FIRST_COMPLETED)
+                for future in fertig:
+                    yield future.result()
+            laufend.add(pool.submit(werte_tag_aus, schiff, tag, df_tag, einstellungen, ausgabe))
+        while laufend:
+            fertig, laufend = wait(laufend, return_when=FIRST_COMPLETED)
+            for future in fertig:
+                yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Zeit-Auswertung aller MoNa-Dateien eines Verzeichnisses je Schiff und Tag")
+    parser.add_argument("verzeichnis", help="Verzeichnis mit MoNa-Dateien (.txt) und optional LandXML (.xml), inkl. Unterordner")
+    parser.add_argument("-o", "--ausgabe", default="auswertung", help="Zielverzeichnis der Excel-Berichte")
+    parser.add_argument("--worker", type=int, default=os.cpu_count() or 1, help="Anzahl paralleler Prozesse")
+    parser.add_argument("--toleranz-oben", type=float, default=1.0, help="Obere Toleranz (m)")
+    parser.add_argument("--toleranz-unten", type=float, default=0.5, help="Untere Toleranz (m)")
+    parser.add_argument("--max-geschwindigkeit", type=float, default=3.0, help="Maximale Geschwindigkeit (kn)")
+    parser.add_argument("--format", choices=["Dezimalstunden", "hh:mm:ss"], default="Dezimalstunden",
+                        help="Zeitformat für Zeitspalten")
+    parser.add_argument("--ohne-position", action="store_true", help="Positionen außerhalb nicht prüfen")
+    parser.add_argument("--ohne-obere-toleranz", action="store_true", help="Obere Toleranz nicht prüfen")
+    parser.add_argument("--ohne-untere-toleranz", action="store_true", help="Untere Toleranz nicht prüfen")
+    parser.add_argument("--ohne-geschwindigkeit", action="store_true", help="Geschwindigkeit nicht prüfen")
+    parser.add_argument("--ohne-cache", action="store_true", help="Geparste Dateien nicht zwischenspeichern")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.verzeichnis):
+        print(f"Verzeichnis nicht gefunden: {args.verzeichnis}", file=sys.stderr)
+        return 1
+
+    einstellungen = {
+        "toleranz_oben": args.toleranz_oben,
+        "toleranz_unten": args.toleranz_unten,
+        "max_geschwindigkeit": args.max_geschwindigkeit,
+        "position_ausserhalb_aktiv": not args.ohne_position,
+        "obere_toleranz_aktiv": not args.ohne_obere_toleranz,
+        "untere_toleranz_aktiv": not args.ohne_untere_toleranz,
+        "geschwindigkeit_aktiv": not args.ohne_geschwindigkeit,
+        "anzeigeformat": args.format,
+    }
+    cache = None if args.ohne_cache else MonaCache()
+
+    anzahl = 0
+    for schiff, tag, zeilen, geschrieben in auswerten(
+        args.verzeichnis, args.ausgabe, einstellungen, worker=max(1, args.worker), cache=cache
+    ):
+        anzahl += 1
+        print(f"{schiff} {tag:%d.%m.%Y}: {zeilen} Datenpunkte, {len(geschrieben)} Berichte", flush=True)
+
+    if anzahl == 0:
+        print(f"Keine MoNa-Daten in {args.verzeichnis} gefunden.", file=sys.stderr)
+        return 1
+    print(f"{anzahl} Schiff/Tag-Auswertungen nach {args.ausgabe} geschrieben.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,65 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import xml.etree.ElementTree as ET
 import pydeck as pdk
 import plotly.graph_objects as go
-import io
+import os
 
 
 #=== Einlesen und Parsen der MoNa-Dateien --> modul_mona_import.py ========================================================================
-from modul_mona_import import parse_mona
+from modul_mona_import import parse_mona, nur_gueltige_baggerfelder, verbinde_mona_frames
+
+#=== Live-Modus: wachsende MoNa-Dateien inkrementell nachlesen --> modul_mona_tail.py ===========================================
+from modul_mona_tail import MonaTail
+
+#=== Cache für geparste MoNa-Dateien (SHA-256 → Parquet) --> modul_mona_cache.py ===========================================
+from modul_mona_cache import MonaCache, datei_hash
+
+#=== Zwischenspeicher für die Pipeline-Stufen (Rerun ohne Neuberechnung) --> modul_zwischenspeicher.py ===========================
+from modul_zwischenspeicher import Zwischenspeicher
 
 #=== XML-Datei der Baggerfeldgrenzen (LandXML) parsen --> modul_baggerfelder_xml_import.py ===========================================
-from modul_baggerfelder_xml_import import parse_baggerfelder
+from modul_baggerfelder_xml_import import lade_baggerfelder
 
-#=== Solltiefe berechnen --> modul_solltiefe_berechnen.py ===========================================================
-from modul_solltiefe_berechnen import berechne_solltiefe
+#=== Solltiefe, Korridor und bereinigte Kanäle als abgeleitete Spalten --> modul_abgeleitete_spalten.py ===========================
+from modul_abgeleitete_spalten import ergaenze_abgeleitete_spalten, diagramm_spalte
 
 #=== Koordinatensystem erkennen --> modul_koordinatenerkennung.py ===========================================================
 from modul_koordinatenerkennung import erkenne_koordinatensystem
 
+#=== Koordinaten nach WGS84 transformieren (Transformer je EPSG-Paar gecacht) --> modul_koordinatentransformation.py ===========
+from modul_koordinatentransformation import ergaenze_wgs84
+
+#=== Tiefenabweichung im Raster je Baggerfeld --> modul_abweichungsraster.py ===========================
+from modul_abweichungsraster import berechne_abweichungsraster, raster_geojson, ZELLGROESSE_M
+
+#=== Detailstufen der Fahrspuren für die Karte (Douglas–Peucker) --> modul_track_lod.py ===========================
+from modul_track_lod import ergaenze_track_lod, waehle_toleranz, lod_maske, KARTE_PUNKTBUDGET
+
+#=== Punktreduktion der Kurven im Zeitdiagramm (Min/Max je Bucket) --> modul_zeitreihe_lod.py ===========================
+from modul_zeitreihe_lod import reduziere_zeitreihe, ZEITDIAGRAMM_PUNKTBUDGET, WEBGL_AB_PUNKTE
+
+#=== Zeitpyramide (Min/Max/Mittel/Anzahl je 10 s, 1 min, 10 min, 1 h) --> modul_zeitpyramide.py ===========================
+from modul_zeitpyramide import (
+    baue_zeitpyramide, erweitere_zeitpyramide, waehle_stufe, zeitreihe_aus_pyramide, STUFEN_NAMEN
+)
+
+#=== BB-/SB-Positionen den Baggerfeld-Polygonen zuordnen (STRtree) --> modul_feldzuordnung.py ===========================
+from modul_feldzuordnung import ergaenze_feldzuordnung
+
+#=== Solltiefe je Datenpunkt aus den Eckpunkt-Tiefen der LandXML (TIN) --> modul_solloberflaeche.py ===========================
+from modul_solloberflaeche import ergaenze_solltiefe_flaeche, vergleiche_solltiefen
+
+#=== Vom Spülbalken überstrichene Fläche je Baggerfeld (fortschreibbar) --> modul_abdeckung.py ===========================
+from modul_abdeckung import aktualisiere_abdeckung
+
+#=== Zeit-Auswertung (Fehlerprüfung, Baggerzeiten, Fehlerzeiträume) --> modul_zeitauswertung.py ===========================
+from modul_zeitauswertung import (
+    formatierer, excel_bytes, klassifiziere_fehler, gruppiere_fehlerzeitraeume, baggerzeiten_tabelle,
+    zeit_summen_tabelle, fehler_zusammenfassung_tabelle, fehlerzeitraeume_tabelle
+)
+
 #=== Passwort --> auth.py =========================================================
 from auth import get_password  # oder wie dein Modul heißt
 
@@ -44,12 +86,6 @@ if not check_password():
     st.stop()
 
 # -------------------------------------------------------------------
-def convert_df_to_excel(df):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Daten')
-    return output.getvalue()
-    
 st.set_page_config(page_title="WI-MoNa Dashboard - MvdK", layout="wide")
 st.title("📈 WI-MoNa Dashboard - MvdK")
 
@@ -61,8 +97,38 @@ uploaded_mona_files = st.sidebar.file_uploader("MoNa-Dateien (.txt)", type=["txt
 uploaded_xml_files = st.sidebar.file_uploader("Baggerfeldgrenzen (XML mit Namespace)", type=["xml"], accept_multiple_files=True)
 xml_status = st.sidebar.empty()
 
+# Live-Modus: Verzeichnis mit den laufend geschriebenen MoNa-Dateien (z. B. an Bord)
+live_verzeichnis = st.sidebar.text_input("Live-Verzeichnis mit MoNa-Dateien (optional)")
+live_pfade = []
+if live_verzeichnis and os.path.isdir(live_verzeichnis):
+    live_pfade = sorted(
+        os.path.join(live_verzeichnis, name) for name in os.listdir(live_verzeichnis) if name.lower().endswith(".txt")
+    )
+    st.sidebar.button("🔄 Live-Daten nachladen")  # jeder Rerun liest nur die neuen Zeilen
+    if "mona_tail" not in st.session_state:
+        st.session_state["mona_tail"] = MonaTail()
+
 koordsys_status = st.sidebar.empty()  # <-- HIER DEFINIEREN!
 
+# Anzahl paralleler Prozesse beim Einlesen vieler MoNa-Dateien (MONA_WORKER überschreibt, 1 = ohne Prozess-Pool)
+MONA_WORKER_MAX = 8
+
+def mona_worker(anzahl_dateien):
+    # Je Datei höchstens ein Prozess – eine einzelne Datei wird ohne Pool geparst
+    if "MONA_WORKER" in os.environ:
+        return max(1, int(os.environ["MONA_WORKER"]))
+    return max(1, min(os.cpu_count() or 1, anzahl_dateien, MONA_WORKER_MAX))
+
+@st.cache_resource
+def hole_mona_cache():
+    # Ein Cache-Objekt pro Serverprozess, die Daten liegen auf der Platte
+    return MonaCache()
+
+@st.cache_resource
+def hole_zwischenspeicher():
+    # Gemeinsam für alle Sitzungen, Schlüssel enthalten nur die Eingaben der jeweiligen Stufe
+    return Zwischenspeicher()
+
 
 #=== Zeitliche Lücken erkennen und segmentieren (für Linienunterbrechungen) ======================================
 # ⤷ Wird z. B. für Spülbalken-Koordinaten und Toleranz-Korridore genutzt
@@ -73,6 +139,63 @@ def split_by_gap(df, max_gap_minutes=2):
     df["segment"] = df["gap"].cumsum()
     return df
     
+def verbinde_segmente(segment, *spalten):
+    # Hängt alle Segmente einer Spur hintereinander und setzt NaN/None an jeden Segmentwechsel
+    # ⤷ Plotly unterbricht die Linie dort → ein Trace je Spur statt einer je Segment
+    segment = np.asarray(segment)
+    trenner = np.flatnonzero(segment[1:] != segment[:-1]) + 1
+    ergebnis = []
+    for werte in spalten:
+        werte = np.asarray(werte)
+        luecke = np.nan if werte.dtype.kind == "f" else None
+        ergebnis.append(np.insert(werte.astype(object) if luecke is None else werte, trenner, luecke))
+    return ergebnis
+
+def korridor_flaechen(zeit, oben, unten, segment):
+    # Alle Korridor-Segmente als ein Flächenzug: je Segment Obergrenze vorwärts, Untergrenze rückwärts, dann NaN
+    # ⤷ Plotly schließt mit fill="toself" jedes durch NaN getrennte Stück einzeln → ein Trace für alle Segmente
+    # ⤷ Nur Index-Arithmetik auf NumPy-Arrays, der Aufwand wächst nicht mit der Anzahl der Segmente
+    segment = np.asarray(segment)
+    n = len(segment)
+    start = np.flatnonzero(np.r_[True, segment[1:] != segment[:-1]])
+    laenge = np.diff(np.r_[start, n])
+    seg = np.repeat(np.arange(len(start)), laenge)
+    pos = np.arange(n) - start[seg]
+
+    # Jedes Segment belegt 2 * Länge + 1 Plätze (vorwärts, rückwärts, Trenner)
+    versatz = 2 * start + np.arange(len(start))
+    vor = versatz[seg] + pos
+    rueck = versatz[seg] + 2 * laenge[seg] - 1 - pos
+    trenner = versatz + 2 * laenge
+
+    zeit = np.asarray(zeit)
+    x = np.empty(2 * n + len(start), dtype=zeit.dtype)
+    y = np.full(2 * n + len(start), np.nan)
+    x[vor], y[vor] = zeit, oben
+    x[rueck], y[rueck] = zeit, unten
+    x[trenner] = zeit[start + laenge - 1]  # Trenner auf der Zeit des Segmentendes, nur y ist NaN
+    return x[:-1], y[:-1]
+
+def tooltip_texte(df, soll_spalte):
+    # Tooltip-Texte der Karte für ganze Spalten auf einmal (statt apply je Zeile)
+    # ⤷ nur für die dargestellten Punkte (nach der Detailstufe), Zahlen wie im f-String (kürzeste Darstellung)
+    # ⤷ eine Zeile erscheint nur, wenn der Wert vorhanden ist (Solltiefe: weder NaN noch 999)
+    def zeile(werte, vorne, hinten, vorhanden):
+        return (vorne + werte.astype(str) + hinten).where(vorhanden, "")
+
+    tiefe, soll, geschwindigkeit = df["Abs_Balkentiefe"], df[soll_spalte], df["Geschwindigkeit"]
+    baggern = df["Status"] == 2
+
+    # "TT.MM.JJJJ - hh:mm:ss" aus dem ISO-Text umgestellt (deutlich schneller als strftime je Wert)
+    iso = pd.Series(np.datetime_as_string(df["timestamp"].to_numpy(dtype="datetime64[s]"), unit="s"), index=df.index)
+    zeit = iso.str[8:10] + "." + iso.str[5:7] + "." + iso.str[0:4] + " - " + iso.str[11:19]
+    return (
+        "🕒 " + zeit
+        + zeile(tiefe, "<br>📉 Tiefe: ", " m", baggern & tiefe.notna())
+        + zeile(soll, "<br>📐 Soll: ", " m", baggern & soll.notna() & (soll != 999))
+        + zeile(geschwindigkeit, "<br>🚤 Geschwindigkeit: ", " knt", geschwindigkeit.notna())
+    ).to_numpy(dtype=object)
+
 def split_korridor_by_gap(df, max_gap_minutes=3):
     df = df.sort_values("timestamp")
     df["gap"] = df["timestamp"].diff().dt.total_seconds() > (max_gap_minutes * 60)
@@ -80,27 +203,411 @@ def split_korridor_by_gap(df, max_gap_minutes=3):
     return df
  
 
+
+#=== Pipeline-Stufen (werden über den Zwischenspeicher nur bei geänderten Eingaben berechnet) ===================
+# ⤷ Ergebnisse werden bei späteren Reruns wiederverwendet und dürfen daher nicht verändert werden
+
+def kennzahlen(statistik):
+    # Metainformationen für Kopfzeile, Zeit-Slider und Feldauswahl – aus der Import-Statistik, ohne Scan
+    return {
+        "min_time": pd.Timestamp(statistik["zeit_min"]).to_pydatetime(),
+        "max_time": pd.Timestamp(statistik["zeit_max"]).to_pydatetime(),
+        "schiffe": list(statistik["schiffe"]),
+        "baggerfelder": statistik["baggerfelder"],
+        "anzahl": statistik["zeilen"],
+    }
+
+
+def erstelle_zeitdiagramm(df_filtered, punktbudget=ZEITDIAGRAMM_PUNKTBUDGET):
+    # --- Werte, die im Diagramm angezeigt werden können ---
+    auswahl = [ "Status", "Pegel", "P1_Fluss", "P2_Fluss", "P3_Fluss",  "Geschwindigkeit", "Abs_Balkentiefe"]  # Immer alle anzeigen
+
+    # --- Farbdefinitionen für Kurven ---
+    farben = {
+        "Abs_Balkentiefe": "#2E8B57",  # gedecktes Grün
+        "P1_Fluss": "#696969",         # Dunkelgrau
+        "P2_Fluss": "#696969",         # Dunkelgrau
+        "P3_Fluss": "#696969",         # Dunkelgrau
+        "Pegel": "#4682B4",            # gedecktes Blau
+        "Status": "#DAA520",            # gedecktes Gold
+        "Geschwindigkeit": "#DAA520"   # gedecktes Gold
+    }
+
+    # --- Daten vorbereiten ---    
+    # Zeitdiagramm mit Filter nach Zeit und Baggerfeld
+    # ⤷ Solltiefe, Korridor und bereinigte Kanäle kommen fertig aus modul_abgeleitete_spalten.py (nur lesen)
+    # ⤷ oder als verdichtete Zeitreihe aus der Zeitpyramide (modul_zeitpyramide.py), gleiche Spalten
+    df_plot = df_filtered
+
+    fig = go.Figure()
+    achsenbereiche = {}
+
+    # --- Normierung vorbereiten (gemeinsame Y-Achse) ---    
+    shared_min, shared_max = None, None
+
+    if "Abs_Balkentiefe" in auswahl:
+        shared_min = df_plot[diagramm_spalte("Abs_Balkentiefe")].min()
+        shared_max = df_plot[diagramm_spalte("Abs_Balkentiefe")].max()
+        padding = (shared_max - shared_min) * 0.1 if shared_max != shared_min else 1
+        shared_min -= padding
+        shared_max += padding
+
+    # --- Normierte Werte für Toleranz-Korridor & Solltiefe (Solltiefe ist nur bei Status == 2 gesetzt) ---
+    soll_norm = (df_plot["Solltiefe"] - shared_min) / (shared_max - shared_min)
+
+    # --- Korridor vorbereiten (gefiltert auf Status == 2) ---
+    if shared_min is not None and "Abs_Balkentiefe" in auswahl:
+
+        korridor_df = pd.DataFrame({
+            "timestamp": df_plot["timestamp"],
+            "Solltiefe_Oben_norm": (df_plot["Solltiefe_Oben"] - shared_min) / (shared_max - shared_min),
+            "Solltiefe_Unten_norm": (df_plot["Solltiefe_Unten"] - shared_min) / (shared_max - shared_min),
+        })[df_plot["Solltiefe"].notna()]
+
+    # --- Alle Kurven aus "auswahl" zeichnen ---
+    for col in auswahl:
+        y = df_plot[diagramm_spalte(col)]
+
+        # --- Normierung pro Achse (nur falls keine gemeinsame Normierung) ---
+        if col in ["Solltiefe_BB", "Solltiefe_SB"] and shared_min is not None:
+            y_min, y_max = shared_min, shared_max
+        else:
+            y_min, y_max = y.min(), y.max()
+            padding = (y_max - y_min) * 0.1 if y_max != y_min else 1
+            y_min -= padding
+            y_max += padding
+
+        farbe = farben.get(col, "black")
+
+        # --- Punktreduktion (Min/Max je Bucket), Normierung und Tooltip aus den vollen Daten ---
+        idx = reduziere_zeitreihe(df_plot["timestamp"], y, punktbudget)
+        Trace = go.Scattergl if len(idx) > WEBGL_AB_PUNKTE else go.Scatter
+
+        # --- Sichtbarkeit beim ersten Laden ---     
+        sichtbarkeit = {
+            "Abs_Balkentiefe": True,
+            "P1_Fluss": False,
+            "P2_Fluss": False,
+            "P3_Fluss": False,
+            "Pegel": False,
+            "Status": False,
+            "Geschwindigkeit": False
+        }
+
+         # --- Labels für Legende & Tooltip ---
+        label_map = {
+           "Abs_Balkentiefe": "Absolute Balkentiefe [m]",
+           "P1_Fluss": "Pumpe 1 - Durchfluss [m³/h]",
+           "P2_Fluss": "Pumpe 2 - Durchfluss [m³/h]",
+           "P3_Fluss": "Pumpe 3 - Durchfluss [m³/h]",
+           "Pegel": "Pegel [m]",
+           "Status": "Status",
+           "Geschwindigkeit": "Geschwindigkeit [knt]"
+       }
+
+        # --- Plot-Trace hinzufügen ---
+        fig.add_trace(Trace(
+            x=df_plot["timestamp"].iloc[idx],
+            y=((y - y_min) / (y_max - y_min)).iloc[idx],
+            mode="lines",
+            name=label_map.get(col, col),  # Lesbare Legende
+            customdata=df_plot[[diagramm_spalte(col)]].iloc[idx],     # Originalwert für Tooltip (als 2D)
+            hovertemplate=f"{label_map.get(col, col)}: %{{customdata[0]:.2f}} <extra></extra>",
+            line=dict(color=farbe), visible="legendonly" if not sichtbarkeit.get(col, True) else True
+        ))
+
+    # --- Korridor und Solltiefe-Linie einfügen ---
+    if not korridor_df.empty:
+        # Aus der Zeitpyramide liegen die Zeilen eine halbe Intervallbreite auseinander → Lücke erst ab einem Intervall
+        korridor_df = split_korridor_by_gap(korridor_df, max(3, df_plot.attrs.get("pyramide_stufe_s", 0) / 60))
+
+        # Segmente auf den vollen Daten bilden, dann reduzieren (Ränder beider Grenzen + Segmentenden bleiben)
+        segment = korridor_df["korridor_segment"].to_numpy()
+        wechsel = segment[1:] != segment[:-1]
+        korridor_idx = np.unique(np.concatenate([
+            reduziere_zeitreihe(korridor_df["timestamp"], korridor_df[spalte].astype("float64"), punktbudget)
+            for spalte in ["Solltiefe_Oben_norm", "Solltiefe_Unten_norm"]
+        ] + [np.flatnonzero(np.r_[True, wechsel] | np.r_[wechsel, True])]))
+        korridor_df = korridor_df.iloc[korridor_idx]
+
+        # --- Korridor als Fläche (alle Segmente in einem Trace) ---
+        x_korridor, y_korridor = korridor_flaechen(
+            korridor_df["timestamp"].to_numpy(),
+            korridor_df["Solltiefe_Oben_norm"].to_numpy(dtype="float64"),
+            korridor_df["Solltiefe_Unten_norm"].to_numpy(dtype="float64"),
+            korridor_df["korridor_segment"].to_numpy(),
+        )
+        fig.add_trace(go.Scatter(
+            x=x_korridor,
+            y=y_korridor,
+            fill="toself",
+            fillcolor="rgba(178,34,34,0.1)",
+            line=dict(color="rgba(0,0,0,0)"),
+            hoverinfo="skip",
+            showlegend=True,
+            name="Toleranz-Korridor",
+            visible=True
+        ))
+
+        # --- Solllinie als gepunktete Linie ---
+        idx = reduziere_zeitreihe(df_plot["timestamp"], soll_norm, punktbudget)
+        Trace = go.Scattergl if len(idx) > WEBGL_AB_PUNKTE else go.Scatter
+        fig.add_trace(Trace(
+            x=df_plot["timestamp"].iloc[idx],
+            y=soll_norm.iloc[idx],
+            mode="lines",
+            name="Solltiefe [m]",
+            line=dict(color="firebrick", width=2, dash="dot"),
+            hovertemplate="Solltiefe [m]: %{customdata[0]:.2f} <extra></extra>",
+            customdata=df_plot[["Solltiefe"]].iloc[idx],
+            showlegend=True,
+            visible=True,
+            connectgaps=False
+        ))
+
+
+    # --- Layout Einstellungen für Diagramm ---
+    fig.update_layout(
+        height=800,
+        yaxis=dict(
+            showticklabels=False,
+            showgrid=True,
+            tickvals=[0.0, 0.2, 0.4, 0.6, 0.8, 1.0],
+            gridcolor="lightgray"
+        ),
+        hovermode="x unified",
+        showlegend=True,
+        legend=dict(orientation="v", x=1.02, y=1)
+    )
+
+
+    return fig, korridor_df.empty
+
+
+def gestalte_karte(fig_map, baggerfelder, center_lat, center_lon):
+    # Gemeinsames Layout und Baggerfeld-Ebenen für Fahrspur- und Rasterkarte
+
+    # --- Layout der Karte anpassen (Zoom, Beschriftung, etc.)
+    fig_map.update_layout(
+        mapbox_style="open-street-map",  # oder open-street-map etc.
+        mapbox_zoom=13,
+        mapbox_center={
+            "lat": center_lat,
+            "lon": center_lon
+
+        },
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        height=800,
+        hovermode="closest",
+        legend=dict(
+            x=0.01,
+            y=0.99,
+            bgcolor="rgba(255,255,255,0.85)",
+            bordercolor="gray",
+            borderwidth=1
+        )
+    )
+    # --- Baggerfelder aus XML in Karte darstellen (legendgesteuert)
+    # ⤷ Alle Polygone in einem Flächen-Trace (durch NaN getrennt), alle Tooltip-Mittelpunkte in einem zweiten
+
+    if baggerfelder:
+        lons, lats, texte, felder = [], [], [], []
+        for feld in baggerfelder:
+            coords = list(feld["polygon"].exterior.coords)
+            tooltip = f"Baggerfeld {feld['name']}<br>Solltiefe: {feld['solltiefe']} m"
+            felder.append(tooltip)
+            if coords:
+                feld_lons, feld_lats = zip(*coords)
+                lons += [*feld_lons, None]
+                lats += [*feld_lats, None]
+                texte += [tooltip] * len(coords) + [None]
+
+        # Polygon-Umriss + Marker
+        fig_map.add_trace(go.Scattermapbox(
+            lon=lons[:-1],
+            lat=lats[:-1],
+            mode="lines+markers",
+            fill="toself",
+            fillcolor="rgba(50, 90, 150, 0.2)",
+            line=dict(color="rgba(30, 60, 120, 0.8)", width=2),
+            marker=dict(size=3, color="rgba(30, 60, 120, 0.8)"),
+            name="Baggerfelder",
+            legendgroup="baggerfelder",
+            showlegend=True,
+            visible=True,
+            text=texte[:-1],
+            hoverinfo="text"
+        ))
+
+        # Zusätzlich: unsichtbare Tooltip-Punkte in der Mitte der Flächen
+        centroids = [feld["polygon"].centroid for feld in baggerfelder]
+        fig_map.add_trace(go.Scattermapbox(
+            lon=[c.x if not c.is_empty else None for c in centroids],
+            lat=[c.y if not c.is_empty else None for c in centroids],
+            mode="markers",
+            marker=dict(size=1, color="rgba(0,0,0,0)"),
+            text=felder,
+            hoverinfo="text",
+            legendgroup="baggerfelder",
+            showlegend=False
+        ))
+
+    return fig_map
+
+
+def erstelle_karte(df_filtered, baggerfelder, punktbudget=KARTE_PUNKTBUDGET):
+
+    # --- Filterung der gültigen Datenpunkte (Status == 2) mit vorhandenen Koordinaten für BB und SB
+    bb_valid = df_filtered[(df_filtered["Status"] == 2) & df_filtered["RW_BB"].notna() & df_filtered["HW_BB"].notna()]
+    bb_valid = split_by_gap(bb_valid)
+    bb_valid = bb_valid.sort_values(by="timestamp")
+
+    sb_valid = df_filtered[(df_filtered["Status"] == 2) & df_filtered["RW_SB"].notna() & df_filtered["HW_SB"].notna()]
+    sb_valid = split_by_gap(sb_valid)
+    sb_valid = sb_valid.sort_values(by="timestamp")
+
+    # --- Separat: Schiff mit Status == 1 (für graue Verlaufslinie)
+    ship_valid = df_filtered[(df_filtered["Status"] == 1)].dropna(subset=["RW_Schiff", "HW_Schiff"])
+    ship_valid = ship_valid.sort_values(by="timestamp")
+
+    # --- Detailstufe passend zum Punktbudget (modul_track_lod.py), Segmentenden bleiben erhalten
+    toleranz = waehle_toleranz([bb_valid["lod_BB"], sb_valid["lod_SB"], ship_valid["lod_Schiff"]], punktbudget)
+    bb_valid = bb_valid[lod_maske(bb_valid["lod_BB"], toleranz, bb_valid["segment"])]
+    sb_valid = sb_valid[lod_maske(sb_valid["lod_SB"], toleranz, sb_valid["segment"])]
+    ship_valid = ship_valid[lod_maske(ship_valid["lod_Schiff"], toleranz)]
+
+    # --- Längen-/Breitengrade wurden einmal je Datensatz berechnet (ergaenze_wgs84)
+    bb_lons, bb_lats = bb_valid["lon_BB"].tolist(), bb_valid["lat_BB"].tolist()
+    sb_lons, sb_lats = sb_valid["lon_SB"].tolist(), sb_valid["lat_SB"].tolist()
+    ship_lons, ship_lats = ship_valid["lon_Schiff"].tolist(), ship_valid["lat_Schiff"].tolist()
+
+    # --- Tooltip-Daten für BB, SB und Schiff vorbereiten (je Spur die Solltiefe ihrer Seite)
+    bb_text = tooltip_texte(bb_valid, "Solltiefe_BB")
+    sb_text = tooltip_texte(sb_valid, "Solltiefe_SB")
+    ship_text = tooltip_texte(ship_valid, "Solltiefe")  # Status 1: ohne Tiefe und Soll
+
+    # --- Plotly-Kartenansicht initialisieren
+    # ⤷ Je Spur genau ein Trace, die Lückensegmente werden durch NaN-Punkte getrennt (keine Verbindungslinie)
+    fig_map = go.Figure()
+
+    # --- Spülbalken BB auf der Karte darstellen
+    bb_lon, bb_lat, bb_hover = verbinde_segmente(bb_valid["segment"], bb_valid["lon_BB"], bb_valid["lat_BB"], bb_text)
+    fig_map.add_trace(go.Scattermapbox(
+        lon=bb_lon,
+        lat=bb_lat,
+        mode="lines+markers",
+        line=dict(color="green", width=2),
+        marker=dict(size=6, color='green'),
+        name="Spülbalken BB",
+        showlegend=True,
+        text=bb_hover,
+        hoverinfo="text"
+    ))
+
+    # --- Spülbalken SB auf der Karte darstellen
+    sb_lon, sb_lat, sb_hover = verbinde_segmente(sb_valid["segment"], sb_valid["lon_SB"], sb_valid["lat_SB"], sb_text)
+    fig_map.add_trace(go.Scattermapbox(
+        lon=sb_lon,
+        lat=sb_lat,
+        mode="lines+markers",
+        line=dict(color="red", width=2),
+        marker=dict(size=6, color='red'),
+        name="Spülbalken SB",
+        showlegend=True,
+        text=sb_hover,
+        hoverinfo="text"
+    ))
+
+    # --- Schiff auf der Karte darstellen
+    fig_map.add_trace(go.Scattermapbox(
+        lon=ship_lons,
+        lat=ship_lats,
+        mode='markers+lines',
+        marker=dict(size=4, color='gray'),
+        name='Schiff',
+        text=ship_text,
+        hoverinfo='text'
+    ))
+
+    # --- Karten-Zentrierung auf Basis der vorhandenen Daten
+    center_lat = (bb_lats or sb_lats or ship_lats or [53.55])[0]
+    center_lon = (bb_lons or sb_lons or ship_lons or [9.99])[0]
+
+    gestalte_karte(fig_map, baggerfelder, center_lat, center_lon)
+
+    return fig_map, toleranz
+
+
+def erstelle_abweichungskarte(raster, geojson, baggerfelder, toleranz_oben, toleranz_unten):
+    # Rasterzellen als eine Choroplethmapbox-Ebene, eingefärbt nach mittlerer Abweichung (0 = Solltiefe)
+    fig_map = go.Figure()
+
+    hover = (
+        "Baggerfeld " + raster["Baggerfeld"].astype(str)
+        + "<br>📏 Abweichung Ø: " + raster["Abweichung_Mittel"].round(2).astype(str) + " m"
+        + "<br>⚠️ Außerhalb Toleranz: " + (raster["Anteil_ausserhalb"] * 100).round(1).astype(str) + " %"
+        + "<br>🔢 Datenpunkte: " + raster["Anzahl"].astype(str)
+    )
+    grenze = max(toleranz_oben, toleranz_unten, 0.1)
+    fig_map.add_trace(go.Choroplethmapbox(
+        geojson=geojson,
+        locations=np.arange(len(raster)),
+        z=raster["Abweichung_Mittel"],
+        zmin=-grenze,
+        zmax=grenze,
+        colorscale="RdBu",
+        marker=dict(opacity=0.75, line=dict(width=0)),
+        colorbar=dict(title="Abs_Balkentiefe − Solltiefe [m]", x=0.99, xanchor="right"),
+        name="Tiefenabweichung",
+        text=hover,
+        hoverinfo="text"
+    ))
+
+    # --- Karten-Zentrierung auf die Mitte der Rasterzellen
+    if geojson["features"]:
+        ecken = np.array([f["geometry"]["coordinates"][0][0] for f in geojson["features"]], dtype=float)
+        center_lon, center_lat = np.nanmean(ecken, axis=0).tolist()
+    else:
+        center_lat, center_lon = 53.55, 9.99
+
+    return gestalte_karte(fig_map, baggerfelder, center_lat, center_lon)
+
+
 #=== Daten laden und prüfen ======================================================================================
 # ⤷ Wenn beide Dateien vorhanden sind, wird alles geladen und sofort analysiert
-
-if uploaded_mona_files:
-    df = parse_mona(uploaded_mona_files)
-    
-    # Baggerfeld "0" oder leer entfernen
-    df = df[~df["Baggerfeld"].isin(["", "0"])]
+# ⤷ Jede Stufe hat einen Schlüssel aus ihren Eingaben und dem Schlüssel der Vorstufe (siehe modul_zwischenspeicher.py)
+
+if uploaded_mona_files or live_pfade:
+    zwischenspeicher = hole_zwischenspeicher()
+
+    # Live-Modus: nur die neu angehängten Zeilen werden gelesen und in den folgenden Stufen berechnet
+    # ⤷ k_vorher: Schlüssel des vorherigen Stands, neu_ab: erste neue Zeile (Zeilen davor sind unverändert)
+    k_vorher, neu_ab = None, 0
+    if live_pfade:
+        tail = st.session_state["mona_tail"]
+        df = tail.aktualisiere(live_pfade)
+        k_daten = ("live", tail.schluessel)
+        if tail.vorher is not None:
+            k_vorher, neu_ab = ("live", tail.vorher), tail.neu_ab
+    else:
+        k_daten = tuple(datei_hash(f.getvalue()) for f in uploaded_mona_files)
+        df = zwischenspeicher.hole("import", k_daten, lambda: nur_gueltige_baggerfelder(
+            parse_mona(uploaded_mona_files, cache=hole_mona_cache(), worker=mona_worker(len(uploaded_mona_files)))
+        ))
     
+    # Zeilen mit defektem Datum/Zeit wurden beim Import verworfen
+    ungueltige_zeitstempel = df.attrs.get("ungueltige_zeitstempel", 0)
+    if ungueltige_zeitstempel:
+        st.sidebar.warning(f"{ungueltige_zeitstempel} Zeilen mit ungültigem Datum/Zeit verworfen")
   
-    # Min und Max Zeit für den Zeitfilter-Slider
-    min_time = df["timestamp"].min()
-    max_time = df["timestamp"].max()
-
-    # 🛠️ Konvertierung für Streamlit-Slider
-    from datetime import datetime
-    min_time = pd.to_datetime(min_time).to_pydatetime()
-    max_time = pd.to_datetime(max_time).to_pydatetime()
+    # Min und Max Zeit für den Zeitfilter-Slider, Schiffe und Baggerfelder (je Datei beim Import erhoben)
+    statistik = df.attrs["statistik"]
+    info = kennzahlen(statistik)
+    min_time = info["min_time"]
+    max_time = info["max_time"]
     
     # Anzeige von Metainformationen über die geladenen Schiffe und Baggerfelder
-    schiffe = df["Schiffsname"].dropna().unique()
+    schiffe = info["schiffe"]
     if len(schiffe) == 1:
         schiffsname_text = f"**Schiff:** **{schiffe[0]}**"
     elif len(schiffe) > 1:
@@ -109,17 +616,25 @@ if uploaded_mona_files:
         schiffsname_text = "Keine bekannten Schiffsnamen gefunden."
 
     st.markdown(f"""{schiffsname_text}  
-    **Zeitraum:** {df["timestamp"].min().date()} – {df["timestamp"].max().date()}  
-    **Baggerfelder:** {", ".join(sorted(df["Baggerfeld"].unique()))}  
-    **Datenpunkte:** {len(df)}""")
+    **Zeitraum:** {min_time.date()} – {max_time.date()}  
+    **Baggerfelder:** {", ".join(info["baggerfelder"])}  
+    **Datenpunkte:** {info["anzahl"]}""")
 
 #=== Automatische Erkennung des Koordinatensystems (UTM, GK, RD) aus modul_koordinatenerkennung.py ========
 # ⤷ Basierend auf RW-/HW-Werten; bei Unsicherheit kann manuell gewählt werden
     if 'df' in locals() and not df.empty:      # oder: if uploaded_mona_files:
+        erkennung = zwischenspeicher.hole("koordinatensystem", k_daten, lambda: erkenne_koordinatensystem(df))
         proj_system, epsg_code, auto_erkannt = erkenne_koordinatensystem(
-            df, st=koordsys_status, sidebar=st.sidebar
+            df, st=koordsys_status, sidebar=st.sidebar, erkennung=erkennung
         )
 
+        # Dateien in unterschiedlichen Systemen wurden beim Import ins System des Datensatzes umgerechnet
+        if statistik.get("epsg_gemischt"):
+            dateien = ", ".join(
+                f"{datei['datei']} ({datei['epsg']})" for datei in statistik["dateien"] if datei.get("umgerechnet")
+            )
+            st.sidebar.warning(f"Unterschiedliche Koordinatensysteme – nach {statistik['epsg']} umgerechnet: {dateien}")
+
 #=== Bedingungen / Parameter im Sidebar ==========================================================================
 # ⤷ Konfiguration von Toleranzgrenzen zur Solltiefe und Maximalgeschwindigkeit (für spätere Filter/Visualisierung) 
 # Aufklappbarer Bereich für die Toleranzeinstellungen in der Sidebar
@@ -128,45 +643,97 @@ if uploaded_mona_files:
         toleranz_unten = st.slider("Untere Toleranz (m)", min_value=0.0, max_value=2.0, value=0.5, step=0.1)
         max_geschwindigkeit = st.slider('Maximale Geschwindigkeit (in Knoten)', min_value=0.1, max_value=10.0, value=3.0, step=0.1)
 
-    # Berechnung der Solltiefe und Toleranzkorridore
-    df = berechne_solltiefe(df, toleranz_oben, toleranz_unten)  # Hier Toleranzen übergeben!
+    def vorstand(schluessel_vorher, *eingaben):
+        # Schlüssel einer Stufe für den vorherigen Live-Stand (None = kein Vorgänger)
+        return None if schluessel_vorher is None else (schluessel_vorher, *eingaben)
+
+    def zeilenweise(stufe, schluessel, vorher, df, berechne):
+        # Stufe, die je Zeile rechnet: liegt das Ergebnis des vorherigen Live-Stands vor, werden nur die Zeilen
+        # ab neu_ab berechnet und angehängt; berechne(teil, alt) erhält dabei das alte Ergebnis (sonst None)
+        def anhaengen(alt):
+            if len(alt) != neu_ab:
+                return berechne(df, None)
+            if len(df) > neu_ab:
+                neu = verbinde_mona_frames([alt, berechne(df.iloc[neu_ab:], alt)])
+            else:
+                neu = alt.copy(deep=False)
+            neu.attrs = dict(df.attrs)
+            return neu
+        return zwischenspeicher.fortschreiben(stufe, schluessel, vorher, lambda: berechne(df, None), anhaengen)
+
+    # Berechnung der Solltiefe und Toleranzkorridore (abgeleitete Spalten, je Spalte nur bei geänderten Eingaben)
+    k_soll = (k_daten, toleranz_oben, toleranz_unten)
+    parameter = {"toleranz_oben": toleranz_oben, "toleranz_unten": toleranz_unten}
+    df = zeilenweise(
+        "abgeleitete_spalten", k_soll, vorstand(k_vorher, toleranz_oben, toleranz_unten), df,
+        # Der Zuwachs wird direkt berechnet, nicht Spalte für Spalte abgelegt
+        lambda teil, alt: ergaenze_abgeleitete_spalten(
+            teil, k_daten, parameter, zwischenspeicher if alt is None else None
+        )
+    )
+
+    # Zeitpyramide für lange Zeitfenster im Zeitdiagramm, einmal je Datensatz (Live-Modus: nur erweitert)
+    pyramide = zwischenspeicher.fortschreiben(
+        "zeitpyramide", k_daten, k_vorher,
+        lambda: baue_zeitpyramide(df), lambda alt: erweitere_zeitpyramide(alt, df.iloc[neu_ab:])
+    )
 
 #=== Multi-Select für Baggerfelder hinzufügen ============================================================
     with st.sidebar.expander("🔎 Filter nach Baggerfeld"):
         baggerfeld_auswahl = st.multiselect(
             "Wähle Baggerfelder aus", 
-            options=sorted(df["Baggerfeld"].unique()), 
-            default=sorted(df["Baggerfeld"].unique())  # Standardmäßig alle Baggerfelder
+            options=info["baggerfelder"], 
+            default=info["baggerfelder"]  # Standardmäßig alle Baggerfelder
         )
 
 
 #=== XML-Datei der Baggerfeldgrenzen (LandXML) parsen ============================================================
-# ⤷ baggerfelder_parser.py ---> Extrahiert Polygon-Koordinaten für jedes Baggerfeld – inkl. Namenszuweisung
+# ⤷ modul_baggerfelder_xml_import.py ---> Extrahiert Polygon-Koordinaten für jedes Baggerfeld – inkl. Namenszuweisung
+# ⤷ Polygone je (XML-Hash, EPSG) im Zwischenspeicher und im Dateicache – ein Rerun parst die XML nicht erneut
 
     baggerfelder = []
+    k_xml = ()
     if uploaded_xml_files:
         for uploaded_xml in uploaded_xml_files:
             try:
-                felder = parse_baggerfelder(uploaded_xml, epsg_code)
+                xml_raw = uploaded_xml.getvalue()
+                xml_hash = datei_hash(xml_raw)
+                felder = zwischenspeicher.hole(
+                    "baggerfelder", (xml_hash, epsg_code),
+                    lambda: lade_baggerfelder(xml_raw, epsg_code, cache=hole_mona_cache())
+                )
                 baggerfelder.extend(felder)
+                k_xml += (xml_hash,)
             except Exception as e:
                 st.sidebar.warning(f"{uploaded_xml.name} konnte nicht geladen werden: {e}")
     
         xml_status.success(f"{len(baggerfelder)} Baggerfelder geladen")
 
 
-#=== Normalisierung der Rechtswerte (z. B. Entfernen der Zonenkennung bei UTM) ===================================
-# ⤷ Wird auf alle relevanten Spalten angewendet (RW_Schiff, RW_BB, RW_SB)
+#=== WGS84-Koordinaten für die Karte ============================================================================
+# ⤷ Die Zonenkennung der Rechtswerte wurde bereits beim Import entfernt (modul_koordinatenerkennung.py)
+# ⤷ Einmalig WGS84-Spalten (lon_*/lat_*) je Datensatz und EPSG – in der Karte wird nicht mehr transformiert
+
+    k_norm = (k_soll, epsg_code)
+    k_norm_vorher = vorstand(vorstand(k_vorher, toleranz_oben, toleranz_unten), epsg_code)
+    df = zeilenweise("wgs84", k_norm, k_norm_vorher, df, lambda teil, alt: ergaenze_wgs84(teil, epsg_code))
 
-    def normalisiere_rechtswert(wert):
-        if proj_system == "UTM" and auto_erkannt and wert > 30_000_000:
-            return wert - int(epsg_code[-2:]) * 1_000_000
-        return wert
+    # Douglas–Peucker-Signifikanz je Spur einmal je Datensatz, die Karte wählt daraus nur noch die Stufe
+    # ⤷ Live-Modus: neue Zeilen schließen an den letzten Punkt jeder Spur an
+    df = zeilenweise("track_lod", k_norm, k_norm_vorher, df, lambda teil, alt: ergaenze_track_lod(teil, vorher=alt))
 
-# anwenden auf relevante Spalten
-    for col in ["RW_Schiff", "RW_BB", "RW_SB"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-        df[col] = df[col].apply(normalisiere_rechtswert)
+    # Mit Baggerfeldgrenzen: "Position" wird geometrisch gegen die Polygone geprüft
+    k_feld = (k_norm, k_xml)
+    k_feld_vorher = vorstand(k_norm_vorher, k_xml)
+    if baggerfelder:
+        df = zeilenweise(
+            "feldzuordnung", k_feld, k_feld_vorher, df, lambda teil, alt: ergaenze_feldzuordnung(teil, baggerfelder)
+        )
+        # Geometrische Solltiefe an den BB-/SB-Positionen (baryzentrisch in der triangulierten Soll-Oberfläche)
+        df = zeilenweise(
+            "solloberflaeche", k_feld, k_feld_vorher, df,
+            lambda teil, alt: ergaenze_solltiefe_flaeche(teil, baggerfelder)
+        )
         
 
 #=== Zeit-Slider ============================================================
@@ -187,9 +754,14 @@ if uploaded_mona_files:
 
     # Datumsbereich anwenden
     # Anwenden des Zeit- und Baggerfeldfilters
-    df_filtered = df[(df["timestamp"] >= zeitbereich[0]) & (df["timestamp"] <= zeitbereich[1])]
-    if baggerfeld_auswahl:
-        df_filtered = df_filtered[df_filtered["Baggerfeld"].isin(baggerfeld_auswahl)]
+    def filtere(df):
+        df_filtered = df[(df["timestamp"] >= zeitbereich[0]) & (df["timestamp"] <= zeitbereich[1])]
+        if baggerfeld_auswahl:
+            df_filtered = df_filtered[df_filtered["Baggerfeld"].isin(baggerfeld_auswahl)]
+        return df_filtered
+
+    k_filter = (k_feld, tuple(zeitbereich), tuple(baggerfeld_auswahl))
+    df_filtered = zwischenspeicher.hole("filter", k_filter, lambda: filtere(df))
 
 
     # Tabs anzeigen
@@ -201,174 +773,38 @@ if uploaded_mona_files:
 
     with tab1:
         st.subheader("📊 Zeitdiagramm")
-    
-    # --- Werte, die im Diagramm angezeigt werden können ---
-        auswahl = [ "Status", "Pegel", "P1_Fluss", "P2_Fluss", "P3_Fluss",  "Geschwindigkeit", "Abs_Balkentiefe"]  # Immer alle anzeigen
-    
-    # --- Farbdefinitionen für Kurven ---
-        farben = {
-            "Abs_Balkentiefe": "#2E8B57",  # gedecktes Grün
-            "P1_Fluss": "#696969",         # Dunkelgrau
-            "P2_Fluss": "#696969",         # Dunkelgrau
-            "P3_Fluss": "#696969",         # Dunkelgrau
-            "Pegel": "#4682B4",            # gedecktes Blau
-            "Status": "#DAA520",            # gedecktes Gold
-            "Geschwindigkeit": "#DAA520"   # gedecktes Gold
-        }
-    
-    # --- Daten vorbereiten ---    
-        # Zeitdiagramm mit Filter nach Zeit und Baggerfeld
-        df_plot = berechne_solltiefe(df_filtered.copy(), toleranz_oben, toleranz_unten)
-        df_plot["datetime"] = pd.to_datetime(df_plot["Datum"].astype(str) + df_plot["Zeit"].astype(str), format="%Y%m%d%H%M%S")
-        df_plot = df_plot.sort_values(by="datetime").reset_index(drop=True)
 
-        fig = go.Figure()
-        achsenbereiche = {}
-    
-    # --- Normierung vorbereiten (gemeinsame Y-Achse) ---    
-        shared_min, shared_max = None, None
-        
-        if "Abs_Balkentiefe" in auswahl:
-            df_plot["Abs_Balkentiefe"] = pd.to_numeric(df_plot["Abs_Balkentiefe"], errors='coerce')
-            df_plot.loc[df_plot["Abs_Balkentiefe"] == 999, "Abs_Balkentiefe"] = None
-            shared_min = df_plot["Abs_Balkentiefe"].min()
-            shared_max = df_plot["Abs_Balkentiefe"].max()
-            padding = (shared_max - shared_min) * 0.1 if shared_max != shared_min else 1
-            shared_min -= padding
-            shared_max += padding
-            
-    # --- Normierte Werte für Toleranz-Korridor & Solltiefe (nur Status == 2) ---
-        df_plot["Solltiefe_norm"] = None
-        df_plot["Solltiefe_Oben_norm"] = None
-        df_plot["Solltiefe_Unten_norm"] = None
-    
-        df_plot.loc[df_plot["Status"] == 2, "Solltiefe_norm"] = (
-            (df_plot["Solltiefe"] - shared_min) / (shared_max - shared_min)
-        )
-    
-        df_plot.loc[df_plot["Status"] == 2, "Solltiefe_Oben_norm"] = (
-            (df_plot["Solltiefe_Oben"] - shared_min) / (shared_max - shared_min)
-        )
-    
-        df_plot.loc[df_plot["Status"] == 2, "Solltiefe_Unten_norm"] = (
-            (df_plot["Solltiefe_Unten"] - shared_min) / (shared_max - shared_min)
+        with st.sidebar.expander("📊 Zeitdiagramm"):
+            zeit_punktbudget = st.number_input(
+                "Maximale Anzahl Punkte je Kurve", min_value=500, max_value=1_000_000,
+                value=ZEITDIAGRAMM_PUNKTBUDGET, step=1_000
+            )
+
+        # Lange Zeitfenster ohne Feldauswahl: verdichtete Zeitreihe aus der Zeitpyramide statt aller Datenpunkte
+        # ⤷ die Pyramide kennt keine Baggerfelder, bei eingeschränkter Feldauswahl bleibt es bei den Datenpunkten
+        stufe = None
+        alle_felder = set(baggerfeld_auswahl) in (set(), set(info["baggerfelder"]))
+        if alle_felder and len(df_filtered) > zeit_punktbudget:
+            stufe = waehle_stufe(pyramide, zeitbereich[0], zeitbereich[1], zeit_punktbudget)
+
+        def zeitdiagramm():
+            # → (Figur, Korridor leer, verwendete Stufe oder None = Datenpunkte)
+            reihe = df_filtered
+            if stufe is not None:
+                reihe = zeitreihe_aus_pyramide(
+                    pyramide, stufe, df_filtered, zeitbereich[0], zeitbereich[1], toleranz_oben, toleranz_unten
+                )
+            return (*erstelle_zeitdiagramm(reihe, zeit_punktbudget), reihe.attrs.get("pyramide_stufe_s"))
+
+        fig, korridor_leer, verdichtet = zwischenspeicher.hole(
+            "zeitdiagramm", (k_filter, zeit_punktbudget), zeitdiagramm
         )
-    
-    # --- Korridor vorbereiten (gefiltert auf Status == 2) ---
-        if shared_min is not None and "Abs_Balkentiefe" in auswahl:
-            
-            korridor_df = df_plot[
-                (df_plot["Status"] == 2) &
-                df_plot["Solltiefe"].notna() &
-                df_plot["Solltiefe_Oben"].notna() &
-                df_plot["Solltiefe_Unten"].notna()
-            ][["timestamp", "Solltiefe", "Solltiefe_Oben", "Solltiefe_Unten", "Solltiefe_Oben_norm", "Solltiefe_Unten_norm"]]
-            
-    # --- Alle Kurven aus "auswahl" zeichnen ---
-        for col in auswahl:
-            df_plot[col] = pd.to_numeric(df_plot[col], errors='coerce')
-            df_plot.loc[df_plot[col] == 999, col] = None
-            y = df_plot[col]
-            
-            # --- Normierung pro Achse (nur falls keine gemeinsame Normierung) ---
-            if col in ["Solltiefe_BB", "Solltiefe_SB"] and shared_min is not None:
-                y_min, y_max = shared_min, shared_max
-            else:
-                y_min, y_max = y.min(), y.max()
-                padding = (y_max - y_min) * 0.1 if y_max != y_min else 1
-                y_min -= padding
-                y_max += padding
-    
-            farbe = farben.get(col, "black")
-     
-            # --- Sichtbarkeit beim ersten Laden ---     
-            sichtbarkeit = {
-                "Abs_Balkentiefe": True,
-                "P1_Fluss": False,
-                "P2_Fluss": False,
-                "P3_Fluss": False,
-                "Pegel": False,
-                "Status": False,
-                "Geschwindigkeit": False
-            }
-            
-             # --- Labels für Legende & Tooltip ---
-            label_map = {
-               "Abs_Balkentiefe": "Absolute Balkentiefe [m]",
-               "P1_Fluss": "Pumpe 1 - Durchfluss [m³/h]",
-               "P2_Fluss": "Pumpe 2 - Durchfluss [m³/h]",
-               "P3_Fluss": "Pumpe 3 - Durchfluss [m³/h]",
-               "Pegel": "Pegel [m]",
-               "Status": "Status",
-               "Geschwindigkeit": "Geschwindigkeit [knt]"
-           }
-    
-            # --- Plot-Trace hinzufügen ---
-            fig.add_trace(go.Scatter(
-                x=df_plot["timestamp"],
-                y=(y - y_min) / (y_max - y_min),
-                mode="lines",
-                name=label_map.get(col, col),  # Lesbare Legende
-                customdata=df_plot[[col]],     # Originalwert für Tooltip (als 2D)
-                hovertemplate=f"{label_map.get(col, col)}: %{{customdata[0]:.2f}} <extra></extra>",
-                line=dict(color=farbe), visible="legendonly" if not sichtbarkeit.get(col, True) else True
-            ))
-            
-    # --- Korridor und Solltiefe-Linie einfügen ---
-        if not korridor_df.empty:
-            korridor_df = split_korridor_by_gap(korridor_df)
-            
-            # --- Korridor als Fläche ---
-            for seg_id, segment in korridor_df.groupby("korridor_segment"):
-                x_korridor = pd.concat([segment["timestamp"], segment["timestamp"][::-1]])
-                y_korridor = pd.concat([
-                    segment["Solltiefe_Oben_norm"],
-                    segment["Solltiefe_Unten_norm"][::-1]
-                ])
-    
-                fig.add_trace(go.Scatter(
-                    x=x_korridor,
-                    y=y_korridor,
-                    fill="toself",
-                    fillcolor="rgba(178,34,34,0.1)",
-                    line=dict(color="rgba(0,0,0,0)"),
-                    hoverinfo="skip",
-                    showlegend=(seg_id == 0),  # nur 1x Legende
-                    name="Toleranz-Korridor",
-                    visible=True
-                ))
-    
-            # --- Solllinie als gepunktete Linie ---
-            fig.add_trace(go.Scatter(
-                x=df_plot["timestamp"],
-                y=df_plot["Solltiefe_norm"],
-                mode="lines",
-                name="Solltiefe [m]",
-                line=dict(color="firebrick", width=2, dash="dot"),
-                hovertemplate="Solltiefe [m]: %{customdata[0]:.2f} <extra></extra>",
-                customdata=df_plot[["Solltiefe"]],
-                showlegend=True,
-                visible=True,
-                connectgaps=False
-            ))
-    
-        else:
+        if verdichtet is not None:
+            st.caption(f"Zeitdiagramm verdichtet: Minimum und Maximum je {STUFEN_NAMEN[verdichtet]} – "
+                       f"Tabellen und Exporte enthalten alle Datenpunkte.")
+        if korridor_leer:
             st.info("ℹ️ Kein gültiger Toleranz-Korridor für den Plot vorhanden.")
     
-    # --- Layout Einstellungen für Diagramm ---
-        fig.update_layout(
-            height=800,
-            yaxis=dict(
-                showticklabels=False,
-                showgrid=True,
-                tickvals=[0.0, 0.2, 0.4, 0.6, 0.8, 1.0],
-                gridcolor="lightgray"
-            ),
-            hovermode="x unified",
-            showlegend=True,
-            legend=dict(orientation="v", x=1.02, y=1)
-        )
-        
     # --- Plot darstellen ---
         st.plotly_chart(fig, use_container_width=True)
     
@@ -380,177 +816,55 @@ if uploaded_mona_files:
 # ⤷ Zeigt die Positionen von Schiff, Spülbalken BB/SB auf einer interaktiven Karte mit Zeit-Tooltips
 #=====================================================================================
     with tab2:
-        import plotly.graph_objects as go
-        from pyproj import Transformer
-        
         st.subheader("🗺️ Interaktive Kartenansicht")
-        
-        # --- Überprüfen, ob die Daten existieren und nicht leer sind
-        if 'df' in globals() and not df.empty:
-        
-            # --- Koordinatentransformation vorbereiten: Lokales Koordinatensystem → WGS84 (für Mapbox)
-            transformer = Transformer.from_crs(epsg_code, "EPSG:4326", always_xy=True)
-        
-            # --- Filterung der gültigen Datenpunkte (Status == 2) mit vorhandenen Koordinaten für BB und SB
-            bb_valid = df_filtered[(df_filtered["Status"] == 2) & df_filtered["RW_BB"].notna() & df_filtered["HW_BB"].notna()]
-            bb_valid = split_by_gap(bb_valid)
-            bb_valid = bb_valid.sort_values(by="timestamp")
-            
-            sb_valid = df_filtered[(df_filtered["Status"] == 2) & df_filtered["RW_SB"].notna() & df_filtered["HW_SB"].notna()]
-            sb_valid = split_by_gap(sb_valid)
-            sb_valid = sb_valid.sort_values(by="timestamp")
-        
-            # --- Separat: Schiff mit Status == 1 (für graue Verlaufslinie)
-            ship_valid = df_filtered[(df_filtered["Status"] == 1)].dropna(subset=["RW_Schiff", "HW_Schiff"])
-            ship_valid = ship_valid.sort_values(by="timestamp")
-        
-            # --- Transformation der Original-Koordinaten (RW/HW) in Längen-/Breitengrade
-            bb_coords = bb_valid.apply(lambda row: transformer.transform(row["RW_BB"], row["HW_BB"]), axis=1)
-            sb_coords = sb_valid.apply(lambda row: transformer.transform(row["RW_SB"], row["HW_SB"]), axis=1)
-            ship_coords = ship_valid.apply(lambda row: transformer.transform(row["RW_Schiff"], row["HW_Schiff"]), axis=1)
-           
-            bb_lons, bb_lats = zip(*bb_coords) if not bb_coords.empty else ([], [])
-            sb_lons, sb_lats = zip(*sb_coords) if not sb_coords.empty else ([], [])
-            ship_lons, ship_lats = zip(*ship_coords) if not ship_coords.empty else ([], [])
-            
-            # --- Tooltip-Textfunktion
-            def format_tooltip(row, soll_key):
-                zeit = row["timestamp"].strftime("%d.%m.%Y - %H:%M:%S")
-                tooltip = f"🕒 {zeit}"
-        
-                if row["Status"] == 2:
-                    tiefe = row["Abs_Balkentiefe"]
-                    tooltip += f"<br>📉 Tiefe: {tiefe} m"
-        
-                    soll = row[soll_key]
-                    if soll != 999:
-                        tooltip += f"<br>📐 Soll: {soll} m"
-        
-                geschwindigkeit = row.get("Geschwindigkeit", None)
-                if pd.notna(geschwindigkeit):
-                    tooltip += f"<br>🚤 Geschwindigkeit: {geschwindigkeit} knt"
-        
-                return tooltip
-                
-            # --- Tooltip-Daten für BB, SB und Schiff vorbereiten
-            bb_text = bb_valid.apply(lambda row: format_tooltip(row, "Solltiefe_SB"), axis=1)
-            sb_text = sb_valid.apply(lambda row: format_tooltip(row, "Solltiefe_SB"), axis=1)
-            ship_text = ship_valid.apply(lambda row: format_tooltip(row, "Solltiefe_SB"), axis=1)
-             
-            # --- Plotly-Kartenansicht initialisieren
-            fig_map = go.Figure()
-        
-            # --- Spülbalken BB auf der Karte darstellen
-            for seg_id, segment_df in bb_valid.groupby("segment"):
-                bb_coords = segment_df.apply(lambda row: transformer.transform(row["RW_BB"], row["HW_BB"]), axis=1)
-                bb_lons, bb_lats = zip(*bb_coords)
-                bb_text = segment_df.apply(lambda row: format_tooltip(row, "Solltiefe_BB"), axis=1)
-        
-                fig_map.add_trace(go.Scattermapbox(
-                    lon=bb_lons,
-                    lat=bb_lats,
-                    mode="lines+markers",
-                    line=dict(color="green", width=2),
-                    marker=dict(size=6, color='green'),
-                    name="Spülbalken BB" if seg_id == 0 else None,
-                    showlegend=(seg_id == 0),
-                    text=bb_text,
-                    hoverinfo="text"
-                ))
-        
-            # --- Spülbalken SB auf der Karte darstellen
-            for seg_id, segment_df in sb_valid.groupby("segment"):
-                sb_coords = segment_df.apply(lambda row: transformer.transform(row["RW_SB"], row["HW_SB"]), axis=1)
-                sb_lons, sb_lats = zip(*sb_coords)
-                sb_text = segment_df.apply(lambda row: format_tooltip(row, "Solltiefe_SB"), axis=1)
-        
-                fig_map.add_trace(go.Scattermapbox(
-                    lon=sb_lons,
-                    lat=sb_lats,
-                    mode="lines+markers",
-                    line=dict(color="red", width=2),
-                    marker=dict(size=6, color='red'),
-                    name="Spülbalken SB" if seg_id == 0 else None,
-                    showlegend=(seg_id == 0),
-                    text=sb_text,
-                    hoverinfo="text"
-                ))
-        
-            # --- Schiff auf der Karte darstellen
-            fig_map.add_trace(go.Scattermapbox(
-                lon=ship_lons,
-                lat=ship_lats,
-                mode='markers+lines',
-                marker=dict(size=4, color='gray'),
-                name='Schiff',
-                text=ship_text,
-                hoverinfo='text'
-            ))
-        
-            # --- Karten-Zentrierung auf Basis der vorhandenen Daten
-            center_lat = (bb_lats or sb_lats or ship_lats or [53.55])[0]
-            center_lon = (bb_lons or sb_lons or ship_lons or [9.99])[0]
-        
-            # --- Layout der Karte anpassen (Zoom, Beschriftung, etc.)
-            fig_map.update_layout(
-                mapbox_style="open-street-map",  # oder open-street-map etc.
-                mapbox_zoom=13,
-                mapbox_center={
-                    "lat": center_lat,
-                    "lon": center_lon
-                    
-                },
-                margin={"r": 0, "t": 0, "l": 0, "b": 0},
-                height=800,
-                hovermode="closest",
-                legend=dict(
-                    x=0.01,
-                    y=0.99,
-                    bgcolor="rgba(255,255,255,0.85)",
-                    bordercolor="gray",
-                    borderwidth=1
-                )
+
+        with st.sidebar.expander("🗺️ Kartenansicht"):
+            punktbudget = st.number_input(
+                "Maximale Anzahl Punkte auf der Karte", min_value=1_000, max_value=1_000_000,
+                value=KARTE_PUNKTBUDGET, step=5_000
             )
-        # --- Baggerfelder aus XML in Karte darstellen (legendgesteuert)
-        
-        if 'baggerfelder' in locals() and baggerfelder:
-            for idx, feld in enumerate(baggerfelder):
-                coords = list(feld["polygon"].exterior.coords)
-                lons, lats = zip(*coords)
-                tooltip = f"Baggerfeld {feld['name']}<br>Solltiefe: {feld['solltiefe']} m"
-        
-                # Polygon-Umriss + Marker
-                fig_map.add_trace(go.Scattermapbox(
-                    lon=lons,
-                    lat=lats,
-                    mode="lines+markers",
-                    fill="toself",
-                    fillcolor="rgba(50, 90, 150, 0.2)",
-                    line=dict(color="rgba(30, 60, 120, 0.8)", width=2),
-                    marker=dict(size=3, color="rgba(30, 60, 120, 0.8)"),
-                    name="Baggerfelder" if idx == 0 else None,
-                    legendgroup="baggerfelder",
-                    showlegend=(idx == 0),
-                    visible=True,
-                    text=[tooltip] * len(lons),
-                    hoverinfo="text"
-                ))
-        
-            # Zusätzlich: unsichtbarer Tooltip-Punkt in der Mitte der Fläche
-                centroid = feld["polygon"].centroid
-                lon_c, lat_c = centroid.x, centroid.y
-                fig_map.add_trace(go.Scattermapbox(
-                    lon=[lon_c],
-                    lat=[lat_c],
-                    mode="markers",
-                    marker=dict(size=1, color="rgba(0,0,0,0)"),
-                    text=[tooltip],
-                    hoverinfo="text",
-                    showlegend=False
-                ))
+            zellgroesse = st.slider(
+                "Rasterweite Tiefenabweichung (m)", min_value=2.0, max_value=100.0, value=ZELLGROESSE_M, step=1.0
+            )
+
+        darstellung = st.radio(
+            "Darstellung", ["Fahrspuren", "Tiefenabweichung (Raster)"], index=0, horizontal=True
+        )
+
+        if darstellung == "Fahrspuren":
+            fig_map, lod_toleranz = zwischenspeicher.hole(
+                "karte", (k_filter, k_xml, punktbudget),
+                lambda: erstelle_karte(df_filtered, baggerfelder, punktbudget)
+            )
+            if lod_toleranz is not None:
+                st.caption(f"Fahrspuren vereinfacht dargestellt (Douglas–Peucker, Toleranz {lod_toleranz:g} m) – "
+                           f"Tabellen und Exporte enthalten alle Datenpunkte.")
+        else:
+            # Raster je Datensatz, Filter und Toleranz (k_filter enthält die Toleranzen über k_soll)
+            k_raster = (k_filter, zellgroesse)
+            raster = zwischenspeicher.hole("raster", k_raster, lambda: berechne_abweichungsraster(
+                df_filtered, toleranz_oben, toleranz_unten, zellgroesse
+            ))
+            fig_map = zwischenspeicher.hole("rasterkarte", (k_raster, epsg_code, k_xml), lambda: erstelle_abweichungskarte(
+                raster, raster_geojson(raster, zellgroesse, epsg_code), baggerfelder, toleranz_oben, toleranz_unten
+            ))
+            if raster.empty:
+                st.info("ℹ️ Keine Datenpunkte mit Solltiefe für das Raster vorhanden.")
+            else:
+                st.caption(f"{len(raster)} Rasterzellen à {zellgroesse:g} m, "
+                           f"{int(raster['Anzahl'].sum())} BB-/SB-Positionen")
                 
         # --- Karte im Streamlit anzeigen
         st.plotly_chart(fig_map, use_container_width=True, config={"scrollZoom": True})
+
+        # --- Solltiefe aus der Soll-Oberfläche der LandXML gegen Solltiefe_BB/Solltiefe_SB der MoNa-Daten
+        if baggerfelder:
+            with st.expander("📐 Solltiefe aus Baggerfeldgrenzen (TIN) vs. MoNa"):
+                vergleich = zwischenspeicher.hole("solltiefenvergleich", k_filter, lambda: vergleiche_solltiefen(df_filtered))
+                if vergleich is None:
+                    st.info("ℹ️ Keine BB-/SB-Positionen innerhalb der Baggerfelder.")
+                else:
+                    st.dataframe(vergleich, use_container_width=True, hide_index=True)
                 
         pass
         
@@ -574,148 +888,25 @@ if uploaded_mona_files:
 
        
     
-        df_filtered["Solltiefe_BB"] = pd.to_numeric(df_filtered["Solltiefe_BB"], errors="coerce")
-        df_filtered["Solltiefe_SB"] = pd.to_numeric(df_filtered["Solltiefe_SB"], errors="coerce")
+        formatiere = formatierer(anzeigeformat)
 
-        from datetime import timedelta
-        
-        def to_hhmmss(td):
-            try:
-                if pd.isnull(td):
-                    return "-"
-                total_seconds = int(td.total_seconds())
-                hours, remainder = divmod(total_seconds, 3600)
-                minutes, seconds = divmod(remainder, 60)
-                return f"{hours:02}:{minutes:02}:{seconds:02}"
-            except Exception:
-                return "-"
-
-        def to_dezimalstunden(td):
-            try:
-                if pd.isnull(td):
-                    return "-"
-                return round(td.total_seconds() / 3600, 3)
-            except:
-                return "-"    
-        
-            
         if not (position_ausserhalb_aktiv or obere_toleranz_aktiv or untere_toleranz_aktiv or geschwindigkeit_aktiv):
             st.info("ℹ️ Es sind keine Fehlerbedingungen aktiv – es werden nur die reinen Baggerzeiten ausgewertet.")
 
-                
-   # Fehlerlogik & Filter – immer ausführen - ein Datenpunkt kann nur "einmal" fehlerhaft sein
+   # Fehlerlogik & Filter – ein Datenpunkt kann nur "einmal" fehlerhaft sein (modul_zeitauswertung.py)
    #===========================================================================================
- 
-        df_filtered["timestamp"] = pd.to_datetime(df_filtered["timestamp"], errors="coerce")
-        
         
-        fehler_daten = []
-        fehler_zeiträume = []
-        gueltige_zeilen = []
-        
-        if position_ausserhalb_aktiv or obere_toleranz_aktiv or untere_toleranz_aktiv or geschwindigkeit_aktiv:
-            for _, row in df_filtered.iterrows():
-                grund = None
-                bnr = row["Baggerfeld"]
-                timestamp = row["timestamp"]
-        
-                if position_ausserhalb_aktiv and row["Status"] == 2 and (
-                    pd.isna(row["Solltiefe_BB"]) or pd.isna(row["Solltiefe_SB"])
-                ):
-                    grund = "Position"
-        
-                if grund is None and obere_toleranz_aktiv:
-                    if pd.notna(row["Abs_Balkentiefe"]) and pd.notna(row["Solltiefe"]):
-                        if row["Abs_Balkentiefe"] > row["Solltiefe"] + toleranz_oben:
-                            grund = "Obere Toleranz"
-        
-                if grund is None and untere_toleranz_aktiv:
-                    if pd.notna(row["Abs_Balkentiefe"]) and pd.notna(row["Solltiefe"]):
-                        if row["Abs_Balkentiefe"] < row["Solltiefe"] - toleranz_unten:
-                            grund = "Untere Toleranz"
-        
-                if grund is None and geschwindigkeit_aktiv:
-                    if row["Status"] == 2:
-                        if pd.isna(row["Geschwindigkeit"]) or pd.to_numeric(row["Geschwindigkeit"], errors="coerce") > max_geschwindigkeit:
-                            grund = "Geschwindigkeit"
-        
-                if grund:
-                    fehler_zeiträume.append({
-                        "timestamp": timestamp,
-                        "Baggerfeld": bnr,
-                        "Fehlgrund": grund
-                    })
-                    fehler_daten.append([bnr, grund])
-                else:
-                    gueltige_zeilen.append(row)
-        else:
-            
-      # Wenn keine Fehlerprüfung aktiv → einfach alle Datenpunkte mit Status==2 nehmen
-            gueltige_zeilen = df_filtered[df_filtered["Status"] == 2].to_dict(orient="records")
-            
-      # Gültige Datenframe für weitere Auswertungen
-        df_gueltig = pd.DataFrame(gueltige_zeilen)
-        df_gueltig = df_gueltig[df_gueltig["Status"] == 2]
-        
-      # Fehlerzeiträume gruppieren 
-        df_fehler = pd.DataFrame(fehler_zeiträume)
-        if not df_fehler.empty and "timestamp" in df_fehler.columns:
-            df_fehler.sort_values(by="timestamp", inplace=True)
-        
-        gruppen = []
-        if not df_fehler.empty:
-            
-            start = df_fehler.iloc[0]["timestamp"]
-            end = start
-            current_grund = df_fehler.iloc[0]["Fehlgrund"]
-            current_baggerfeld = df_fehler.iloc[0]["Baggerfeld"]
-            anzahl = 1  # Startwert für die Zählung im ersten Fehlerzeitraum
-            for i in range(1, len(df_fehler)):
-                row = df_fehler.iloc[i]
-                if (
-                    row["Fehlgrund"] == current_grund and
-                    row["Baggerfeld"] == current_baggerfeld and
-                    (row["timestamp"] - end).total_seconds() <= 15
-                ):
-                    end = max(end, row["timestamp"])  # Absicherung bei gleichen Zeiten
-                    anzahl += 1  # ← NEU: erhöhen
-                else:
-                    gruppen.append({
-                        "Baggerfeld": current_baggerfeld,
-                        "Startzeit": start,
-                        "Endzeit": end,
-                        "Dauer_raw": timedelta(seconds=anzahl * 10),
-                        "Dauer": (
-                            to_dezimalstunden(timedelta(seconds=anzahl * 10))
-                            if anzeigeformat == "Dezimalstunden"
-                            else to_hhmmss(timedelta(seconds=anzahl * 10))
-                        ),
-                        "Anzahl": anzahl,
-                        "Fehlgrund": current_grund
-                    })
-                    # Reset
-                    start = row["timestamp"]
-                    end = start
-                    current_grund = row["Fehlgrund"]
-                    current_baggerfeld = row["Baggerfeld"]
-                    anzahl = 1  # ← NEU: zurücksetzen
-
-        
-      # Letzten Abschnitt anhängen
-            gruppen.append({
-                "Baggerfeld": current_baggerfeld,
-                "Startzeit": start,
-                "Endzeit": end,
-                "Dauer_raw": timedelta(seconds=anzahl * 10),
-                "Dauer": (
-                    to_dezimalstunden(timedelta(seconds=anzahl * 10))
-                    if anzeigeformat == "Dezimalstunden"
-                    else to_hhmmss(timedelta(seconds=anzahl * 10))
-                ),
-                "Anzahl": anzahl,
-                "Fehlgrund": current_grund
-            })
+        k_fehler = (
+            k_filter, position_ausserhalb_aktiv, obere_toleranz_aktiv, untere_toleranz_aktiv, geschwindigkeit_aktiv,
+            toleranz_oben, toleranz_unten, max_geschwindigkeit
+        )
+        df_fehler, df_gueltig = zwischenspeicher.hole("fehler", k_fehler, lambda: klassifiziere_fehler(
+            df_filtered, position_ausserhalb_aktiv, obere_toleranz_aktiv, untere_toleranz_aktiv,
+            geschwindigkeit_aktiv, toleranz_oben, toleranz_unten, max_geschwindigkeit
+        ))
         
+      # Fehlerzeiträume gruppieren, nur die Formatierung der Dauer hängt vom Anzeigeformat ab
+        df_gruppen = zwischenspeicher.hole("fehlerzeitraeume", k_fehler, lambda: gruppiere_fehlerzeitraeume(df_fehler))
 
 
    #=== Ausgabe der Baggerzeiten je Baggerfeld           
@@ -724,88 +915,12 @@ if uploaded_mona_files:
             
         st.markdown("<h3 style='font-size: 24px'>⏱️ Baggerzeiten je Baggerfeld</h3>", unsafe_allow_html=True)
     
-        if not df_gueltig.empty:
-            zeitraum_df = df_gueltig.groupby("Baggerfeld")["timestamp"].agg(["min", "max"]).reset_index()
-            zeitraum_df["Anzahl gültiger Zeilen"] = df_gueltig.groupby("Baggerfeld").size().values
-            zeitraum_df["delta"] = zeitraum_df["Anzahl gültiger Zeilen"] * 10  # in Sekunden
-            zeitraum_df["delta"] = pd.to_timedelta(zeitraum_df["delta"], unit="s")                
-            
-            zeitraum_df["Gesamtdauer"] = zeitraum_df["delta"].apply(
-                lambda td: to_dezimalstunden(td) if anzeigeformat == "Dezimalstunden" else to_hhmmss(td)
-            )
-            fehler_df = pd.DataFrame(fehler_daten, columns=["Baggerfeld", "Fehler"])
-            fehler_matrix = pd.crosstab(fehler_df["Baggerfeld"], fehler_df["Fehler"]).reset_index()
-    
-            spalten_reihenfolge = ["Position", "Obere Toleranz", "Untere Toleranz", "Geschwindigkeit"]
-            for spalte in spalten_reihenfolge:
-                if spalte not in fehler_matrix.columns:
-                    fehler_matrix[spalte] = 0
-            fehler_matrix = fehler_matrix[["Baggerfeld"] + spalten_reihenfolge]
-            fehler_matrix["Anzahl"] = fehler_matrix[spalten_reihenfolge].sum(axis=1)
-            fehler_matrix["Verworfen (Sekunden)"] = fehler_matrix["Anzahl"] * 10
-            
-            fehler_matrix["Dauer korrigiert"] = (
-                zeitraum_df["delta"] - pd.to_timedelta(fehler_matrix["Verworfen (Sekunden)"], unit="s")
-            ).apply(
-                lambda td: to_dezimalstunden(td) if anzeigeformat == "Dezimalstunden" else to_hhmmss(td)
-            )
-                            
-            # Zeitverlust
-            fehler_matrix["Zeitverlust"] = fehler_matrix["Verworfen (Sekunden)"].apply(
-                lambda x: to_dezimalstunden(timedelta(seconds=int(x))) if anzeigeformat == "Dezimalstunden" else to_hhmmss(timedelta(seconds=int(x)))
-            )
-    
-            zeitraum_df.rename(columns={"min": "Beginn", "max": "Ende", "Baggerfeld": "Baggerfeld"}, inplace=True)
-            fehler_matrix.rename(columns={"Baggerfeld": "Baggerfeld"}, inplace=True)
-    
-            result = pd.merge(zeitraum_df[["Baggerfeld", "Beginn", "Ende", "Gesamtdauer"]], fehler_matrix, on="Baggerfeld", how="left").fillna(0)
-    
-            final_order = ["Baggerfeld", "Beginn", "Ende", "Gesamtdauer", "Dauer korrigiert", "Zeitverlust", "Anzahl"] + spalten_reihenfolge
-        # Summen berechnen
-            summen = {}
-            
-        # Zeitfelder in Sekunden
-        # Gesamtdauer stammt aus zeitraum_df["delta"]
-            gesamt_zeit = zeitraum_df["delta"].sum()
-            
-        #verworfen = Anzahl * 10 Sek
-        #verworfen = result["Anzahl"].iloc[:-1].sum() * 10  # Letzte Zeile (Σ) nicht doppelt zählen!
-            verworfen = len(fehler_daten) * 10
-            delta_korrigiert = gesamt_zeit - timedelta(seconds=int(verworfen))
-            
-            summen["Gesamtdauer"] = (
-                to_dezimalstunden(gesamt_zeit) if anzeigeformat == "Dezimalstunden" else to_hhmmss(gesamt_zeit)
-            )
-            summen["Dauer korrigiert"] = (
-                to_dezimalstunden(delta_korrigiert) if anzeigeformat == "Dezimalstunden" else to_hhmmss(delta_korrigiert)
-            )
-            summen["Zeitverlust"] = (
-                to_dezimalstunden(timedelta(seconds=int(verworfen)))
-                if anzeigeformat == "Dezimalstunden"
-                else to_hhmmss(timedelta(seconds=int(verworfen)))
-            )
-            
-        # Zahlenspalten summieren
-            summen["Anzahl"] = result["Anzahl"].sum()
-            for feld in ["Position", "Obere Toleranz", "Untere Toleranz", "Geschwindigkeit"]:
-                summen[feld] = result[feld].sum() if feld in result.columns else 0
-            
-        # Dummy-Felder
-            summen["Baggerfeld"] = "Σ"
-            summen["Beginn"] = "-"
-            summen["Ende"] = "-"
-            
-        # Reihenfolge einhalten
-            summenzeile = pd.DataFrame([summen])[final_order]
-            
-        # Neue Tabelle mit Summenzeile
-            result_mit_summe = pd.concat([result[final_order], summenzeile], ignore_index=True)
-            
-        # Tabelle mit Summenzeile anzeigen
+        result_mit_summe, summen = baggerzeiten_tabelle(df_gueltig, df_fehler, formatiere)
+        if result_mit_summe is not None:
             st.dataframe(result_mit_summe, use_container_width=True, hide_index=True)                
       
         # Export nach Excel 
-            excel_data_2 = convert_df_to_excel(result_mit_summe)
+            excel_data_2 = excel_bytes(result_mit_summe)
             st.download_button(
                 label="📥 Baggerzeiten als Excel herunterladen",
                 data=excel_data_2,
@@ -819,51 +934,14 @@ if uploaded_mona_files:
         st.markdown("---")     
         st.markdown("<h3 style='font-size: 24px'>🧾 Zusammenfassung</h3>", unsafe_allow_html=True)
 
+        st.dataframe(zeit_summen_tabelle(summen), use_container_width=True, hide_index=True)                
         
-        zeit_summen_df = pd.DataFrame([
-            {
-                "Kategorie": "Gesamtdauer",
-                "Zeit": summen["Gesamtdauer"]
-            },
-            {
-                "Kategorie": "Dauer korrigiert",
-                "Zeit": summen["Dauer korrigiert"]
-            },
-            {
-                "Kategorie": "Zeitverlust",
-                "Zeit": summen["Zeitverlust"]
-            }
-        ])
-        
-        st.dataframe(zeit_summen_df, use_container_width=True, hide_index=True)                
-        
-        fehler_df = pd.DataFrame(fehler_daten, columns=["Baggerfeld", "Fehler"])
-        fehler_counts = fehler_df["Fehler"].value_counts().rename_axis("Fehlerbedingung").reset_index(name="Anzahl")
-        fehler_counts["Zeitverlust"] = fehler_counts["Anzahl"].apply(
-            lambda x: (
-                to_dezimalstunden(timedelta(seconds=x*10))
-                if anzeigeformat == "Dezimalstunden"
-                else to_hhmmss(timedelta(seconds=x*10))
-            )
-        )          
-      
-        if fehler_daten:
-            
-            total_seconds = fehler_counts["Anzahl"].sum() * 10
-            gesamt = pd.DataFrame([{
-                "Fehlerbedingung": "Gesamt",
-                "Anzahl": fehler_counts["Anzahl"].sum(),
-                "Zeitverlust": (
-                    to_dezimalstunden(timedelta(seconds=int(total_seconds)))
-                    if anzeigeformat == "Dezimalstunden"
-                    else to_hhmmss(timedelta(seconds=int(total_seconds)))
-                )
-            }])
-            fehler_counts = pd.concat([fehler_counts, gesamt], ignore_index=True)
+        fehler_counts = fehler_zusammenfassung_tabelle(df_fehler, formatiere)
+        if fehler_counts is not None:
             st.dataframe(fehler_counts, use_container_width=True, hide_index=True)
 
         # Export nach Excel            
-            excel_data_3 = convert_df_to_excel(fehler_counts)
+            excel_data_3 = excel_bytes(fehler_counts)
             st.download_button(
                 label="📥 Zusammenfassung als Excel herunterladen",
                 data=excel_data_3,
@@ -871,45 +949,38 @@ if uploaded_mona_files:
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
 
-            
-        #else:
-            #st.success("✅ Keine fehlerhaften Datenpunkte gefunden.")
 
+   #=== Abdeckung: Anteil der Feldfläche, die der Spülbalken überstrichen hat
+   #===================================================================================== 
+
+        if baggerfelder:
+            st.markdown("---")
+            st.markdown("<h3 style='font-size: 24px'>🧹 Abdeckung je Baggerfeld</h3>", unsafe_allow_html=True)
+
+            # Im Live-Modus werden nur die neuen Zeilen in die bisherige Fläche eingearbeitet
+            quelle = ("live", tuple(live_pfade)) if live_pfade else k_daten
+            k_abdeckung = (quelle, epsg_code, k_xml, zeitbereich[0], tuple(baggerfeld_auswahl))
+            abdeckung = zwischenspeicher.hole("abdeckung", k_filter, lambda: aktualisiere_abdeckung(
+                st.session_state.get("abdeckung"), df_filtered, k_abdeckung
+            ))
+            st.session_state["abdeckung"] = abdeckung
+            abdeckung_tabelle = zwischenspeicher.hole(
+                "abdeckung_tabelle", k_filter, lambda: abdeckung.auswertung(baggerfelder).drop(columns="luecken")
+            )
+            st.dataframe(abdeckung_tabelle, use_container_width=True, hide_index=True)
 
    #=== Ausgabe der gruppierten Fehlerzeiträume    
    #===================================================================================== 
 
         st.markdown("---")
-        df_gruppen = pd.DataFrame(gruppen)
         #
         st.markdown("<h3 style='font-size: 24px'>📋 Zusammengefasste Fehlerzeiträume</h3>", unsafe_allow_html=True)
-        if not df_gruppen.empty:
-                 
-            # Summen berechnen
-            gesamt_anzahl = df_gruppen["Anzahl"].sum()
-            gesamt_dauer = df_gruppen["Dauer_raw"].sum()
-            gesamt_dauer_formatiert = (
-                to_dezimalstunden(gesamt_dauer)
-                if anzeigeformat == "Dezimalstunden"
-                else to_hhmmss(gesamt_dauer)
-            )
-        
-            # Summenzeile anfügen
-            summenzeile = pd.DataFrame([{
-                "Baggerfeld": "Σ",
-                "Startzeit": "-",
-                "Endzeit": "-",
-                "Dauer": gesamt_dauer_formatiert,
-                "Anzahl": gesamt_anzahl,
-                "Fehlgrund": "-"
-            }])
-        
-            df_anzeige = pd.concat([df_gruppen.drop(columns=["Dauer_raw"]), summenzeile], ignore_index=True)
-        
+        df_anzeige = fehlerzeitraeume_tabelle(df_gruppen, formatiere)
+        if df_anzeige is not None:
             st.dataframe(df_anzeige, use_container_width=True, hide_index=True)
             
         # Export nach Excel
-            excel_data_1 = convert_df_to_excel(df_anzeige)
+            excel_data_1 = excel_bytes(df_anzeige)
             st.download_button(
                 label="📥 Fehlerzeiträume als Excel herunterladen",
                 data=excel_data_1,
@@ -920,9 +991,13 @@ if uploaded_mona_files:
          
         else:
             st.success("✅ Keine fehlerhaften Datenpunkte gefunden.")
-            
 
-        
+    # --- Treffer/Neuberechnungen je Stufe (nach allen Tabs, damit der aktuelle Rerun mitzählt)
+    with st.sidebar.expander("🧠 Zwischenspeicher"):
+        st.dataframe(zwischenspeicher.statistik(), use_container_width=True, hide_index=True)
+        # Leert den Speicher für alle Sitzungen, der folgende Rerun berechnet jede Stufe neu
+        st.button("🗑️ Zwischenspeicher leeren", on_click=zwischenspeicher.leeren)
+
         
 # --- Info anzeigen, falls keine Daten vorhanden sind    
 else:
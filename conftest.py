@@ -0,0 +1,2 @@
+# conftest.py
+# ⤷ Liegt im Projektverzeichnis, damit pytest es in sys.path aufnimmt und die Tests die modul_*.py importieren können
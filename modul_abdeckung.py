@@ -0,0 +1,158 @@
+# abdeckung.py
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from modul_track_lod import MAX_LUECKE_S
+
+
+#=== Überstrichene Fläche (Abdeckung) je Baggerfeld ==============================================================
+# ⤷ Zwischen zwei aufeinanderfolgenden Datenpunkten eines Schiffs (beide Status 2, Lücke ≤ MAX_LUECKE_S) überstreicht
+#   der Spülbalken das Viereck BB_i – SB_i – SB_i+1 – BB_i+1 (als konvexe Hülle, damit Drehungen gültig bleiben)
+# ⤷ Alle Vierecke eines Abschnitts entstehen in einem shapely-2-Aufruf, vereinigt wird nur der neue Abschnitt,
+#   danach einmal mit der bisherigen Fläche → neue Daten berechnen die Vereinigung nicht komplett neu
+# ⤷ Gerechnet wird im metrischen RW/HW-System der Daten, ausgewertet gegen polygon_lokal der Baggerfelder
+
+ABDECKUNG_SPALTEN = ["RW_BB", "HW_BB", "RW_SB", "HW_SB"]
+ABDECKUNG_BLOCK = 256  # zeitlich benachbarte Vierecke, die zuerst untereinander vereinigt werden
+
+
+class Abdeckung:
+    """
+    Fortschreibbare Vereinigung der vom Spülbalken überstrichenen Fläche.
+
+    Args:
+        schluessel (tuple): Kennung von Datenquelle, Koordinatensystem und Filter – ändert er sich,
+                            passt die Fläche nicht mehr zu den Daten (siehe aktualisiere_abdeckung)
+        max_luecke_s (int): Zeitlücke (s), über die hinweg keine Fläche entsteht
+    """
+
+    def __init__(self, schluessel=(), max_luecke_s=MAX_LUECKE_S):
+        self.schluessel = schluessel
+        self.max_luecke_s = max_luecke_s
+        self.flaeche = shapely.Polygon()
+        self.letzte = {}    # Baggernummer -> letzte Zeile (timestamp, Status, RW/HW von BB und SB)
+        self.bis = None     # jüngster eingearbeiteter Zeitstempel
+        self.zeilen = 0     # Anzahl eingearbeiteter Zeilen
+
+    def fortsetzung(self):
+        """
+        Neue Abdeckung mit dem Stand dieser – zum Fortschreiben, ohne diese zu verändern
+        (sie kann im Zwischenspeicher liegen und wird dort unter ihrem Schlüssel weiter ausgegeben).
+
+        Returns:
+            Abdeckung: unabhängige Kopie (Geometrie ist unveränderlich und wird geteilt)
+        """
+        kopie = Abdeckung(self.schluessel, self.max_luecke_s)
+        kopie.flaeche = self.flaeche
+        kopie.letzte = dict(self.letzte)
+        kopie.bis = self.bis
+        kopie.zeilen = self.zeilen
+        return kopie
+
+    def ergaenze(self, df):
+        """
+        Arbeitet neue, zeitlich an den bisherigen Stand anschließende Zeilen ein (verändert self).
+
+        Args:
+            df (pd.DataFrame): Neue MoNa-Zeilen mit normalisierten Rechtswerten, Status und Baggernummer
+
+        Returns:
+            Abdeckung: self
+        """
+        if df.empty:
+            return self
+
+        spalten = ["Baggernummer", "timestamp", "Status"] + ABDECKUNG_SPALTEN
+        neu = df[spalten].sort_values("timestamp", kind="stable")
+
+        # Letzte Zeile je Schiff voranstellen → das erste neue Viereck schließt an den alten Stand an
+        if self.letzte:
+            neu = pd.concat([pd.DataFrame(list(self.letzte.values()), columns=spalten), neu], ignore_index=True)
+        neu = neu.sort_values(["Baggernummer", "timestamp"], kind="stable")
+
+        schiff = neu["Baggernummer"].astype(str).to_numpy()
+        zeit = neu["timestamp"].to_numpy()
+        baggern = (neu["Status"] == 2).to_numpy()
+        xy = np.column_stack([neu[spalte].to_numpy(dtype="float64", na_value=np.nan) for spalte in ABDECKUNG_SPALTEN])
+
+        # Viereck zwischen Zeile i und i+1: gleiches Schiff, beide baggern, gültige Positionen, keine Lücke
+        paar = (
+            (schiff[1:] == schiff[:-1]) & baggern[1:] & baggern[:-1]
+            & np.isfinite(xy).all(axis=1)[1:] & np.isfinite(xy).all(axis=1)[:-1]
+            & (np.diff(zeit) <= np.timedelta64(self.max_luecke_s, "s"))
+        )
+        i = np.flatnonzero(paar)
+        if len(i):
+            ecken = np.stack([xy[i, 0:2], xy[i, 2:4], xy[i + 1, 2:4], xy[i + 1, 0:2]], axis=1)
+            vierecke = shapely.convex_hull(shapely.multipoints(ecken))
+            vierecke = vierecke[shapely.area(vierecke) > 0]  # Stillstand: Hülle ist nur Linie/Punkt
+            if len(vierecke):
+                # Erst kleine, räumlich zusammenhängende Blöcke vereinigen, dann die Blöcke – deutlich schneller
+                # als ein union_all über alle Vierecke, da sich vor allem Nachbarn überlappen
+                bloecke = [
+                    shapely.union_all(vierecke[k:k + ABDECKUNG_BLOCK])
+                    for k in range(0, len(vierecke), ABDECKUNG_BLOCK)
+                ]
+                self.flaeche = shapely.union(self.flaeche, shapely.union_all(bloecke))
+
+        # Stand je Schiff für den nächsten Abschnitt merken
+        for _, zeile in neu.groupby("Baggernummer", observed=True, sort=False).tail(1).iterrows():
+            self.letzte[zeile["Baggernummer"]] = zeile.tolist()
+        self.bis = neu["timestamp"].max() if self.bis is None else max(self.bis, neu["timestamp"].max())
+        self.zeilen += len(df)
+        return self
+
+    def auswertung(self, baggerfelder):
+        """
+        Schneidet die überstrichene Fläche mit jedem Baggerfeld.
+
+        Args:
+            baggerfelder (list): Ergebnis von parse_baggerfelder (mit "polygon_lokal")
+
+        Returns:
+            pd.DataFrame: je Feld Fläche, abgedeckte Fläche [m²], Anteil [%], Anzahl und Fläche der Lücken sowie
+                          die Lücken-Geometrie (Spalte "luecken", RW/HW)
+        """
+        polygone = np.array([feld["polygon_lokal"] for feld in baggerfelder], dtype=object)
+        luecken = shapely.difference(polygone, self.flaeche)
+        flaeche = shapely.area(polygone)
+        abgedeckt = flaeche - shapely.area(luecken)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            anteil = np.where(flaeche > 0, abgedeckt / flaeche * 100, np.nan)
+
+        return pd.DataFrame({
+            "Baggerfeld": [feld["name"] for feld in baggerfelder],
+            "Fläche [m²]": flaeche.round(0),
+            "abgedeckt [m²]": abgedeckt.round(0),
+            "Anteil [%]": anteil.round(1),
+            "Lücken": shapely.get_num_geometries(luecken) * ~shapely.is_empty(luecken),
+            "Lücken [m²]": shapely.area(luecken).round(0),
+            "luecken": luecken,
+        })
+
+
+def aktualisiere_abdeckung(abdeckung, df, schluessel):
+    """
+    Schreibt eine Abdeckung mit den seit dem letzten Aufruf hinzugekommenen Zeilen fort.
+
+    Neu gerechnet wird nur, wenn sich der Schlüssel ändert oder der bisher eingearbeitete Teil der Daten
+    nicht mehr übereinstimmt (z. B. Datei ersetzt, Zeitfilter verkleinert, nachgereichte ältere Zeilen).
+
+    Args:
+        abdeckung (Abdeckung | None): Stand des letzten Aufrufs
+        df (pd.DataFrame): Gesamter (gefilterter) Datensatz
+        schluessel (tuple): Datenquelle, Koordinatensystem und Filter
+
+    Die übergebene Abdeckung bleibt unverändert (sie stammt aus dem Zwischenspeicher), fortgeschrieben
+    wird eine Kopie ihres Stands.
+
+    Returns:
+        Abdeckung: fortgeschriebener oder neu berechneter Stand
+    """
+    if abdeckung is not None and abdeckung.schluessel == schluessel and abdeckung.bis is not None:
+        bisher = (df["timestamp"] <= abdeckung.bis).to_numpy()
+        if int(bisher.sum()) == abdeckung.zeilen:
+            return abdeckung.fortsetzung().ergaenze(df[~bisher])
+    return Abdeckung(schluessel).ergaenze(df)
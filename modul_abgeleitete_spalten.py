@@ -0,0 +1,67 @@
+# abgeleitete_spalten.py
+
+from modul_solltiefe_berechnen import solltiefe_spalte
+
+
+#=== Abgeleitete Spalten mit deklarierten Abhängigkeiten =========================================================
+# ⤷ Jede abgeleitete Spalte nennt ihre Eingabe-Spalten und Parameter; ihr Schlüssel im Zwischenspeicher besteht
+#   aus Datensatz, Parametern und den Schlüsseln ihrer Eingaben → nur Spalten mit geänderten Eingaben werden neu
+#   berechnet (z. B. neue obere Toleranz: nur Solltiefe_Oben, Solltiefe und Kanäle bleiben)
+# ⤷ Einmal je (Datensatz, Toleranzen) berechnet, alle Reiter lesen danach nur noch Ausschnitte (df_filtered)
+# ⤷ Die Normierung im Zeitdiagramm hängt vom gefilterten Ausschnitt ab und bleibt dort (eine Vektor-Operation)
+
+DIAGRAMM_KANAELE = ["Status", "Pegel", "P1_Fluss", "P2_Fluss", "P3_Fluss", "Geschwindigkeit", "Abs_Balkentiefe"]
+
+
+def diagramm_spalte(kanal):
+    # Name der bereinigten Kanal-Spalte (Zahl, 999 = fehlt → NaN) für das Zeitdiagramm
+    return f"{kanal}_bereinigt"
+
+
+def _bereinige(kanal):
+    def berechnung(df, parameter):
+        werte = df[kanal]
+        return werte.where(werte != 999)
+    return berechnung
+
+
+ABGELEITETE_SPALTEN = {
+    # Spalte → (Eingabe-Spalten, Parameter, Berechnung(df, parameter)); Eingaben stehen vor ihren Nutzern
+    "Solltiefe": (["Status", "Solltiefe_BB", "Solltiefe_SB"], [], lambda df, p: solltiefe_spalte(df)),
+    "Solltiefe_Oben": (["Solltiefe"], ["toleranz_oben"], lambda df, p: df["Solltiefe"] + p["toleranz_oben"]),
+    "Solltiefe_Unten": (["Solltiefe"], ["toleranz_unten"], lambda df, p: df["Solltiefe"] - p["toleranz_unten"]),
+    **{diagramm_spalte(kanal): ([kanal], [], _bereinige(kanal)) for kanal in DIAGRAMM_KANAELE},
+}
+
+
+def ergaenze_abgeleitete_spalten(df, datensatz, parameter, zwischenspeicher):
+    """
+    Ergänzt alle abgeleiteten Spalten, jede als eigene Stufe im Zwischenspeicher.
+
+    Bereits vorhandene Spalten bleiben unverändert (z. B. die fortgeschriebene Solltiefe aus dem Live-Modus).
+
+    Args:
+        df (pd.DataFrame): Zeitlich sortierter Datensatz
+        datensatz (tuple): Schlüssel des Datensatzes (z. B. Datei-Hashes)
+        parameter (dict): Parameter der Spalten, z. B. {"toleranz_oben": 1.0, "toleranz_unten": 0.5}
+        zwischenspeicher (Zwischenspeicher | None): Ablage der einzelnen Spalten (None = direkt berechnen,
+                                                  z. B. für den Zuwachs im Live-Modus)
+
+    Returns:
+        pd.DataFrame: flache Kopie mit allen Spalten aus ABGELEITETE_SPALTEN
+    """
+    df = df.copy(deep=False)
+    schluessel = {}
+    for spalte, (eingaben, parameter_namen, berechnung) in ABGELEITETE_SPALTEN.items():
+        schluessel[spalte] = (
+            datensatz,
+            tuple(schluessel.get(eingabe, eingabe) for eingabe in eingaben),
+            tuple(parameter[name] for name in parameter_namen),
+        )
+        if spalte in df.columns:
+            continue
+        if zwischenspeicher is None:
+            df[spalte] = berechnung(df, parameter)
+        else:
+            df[spalte] = zwischenspeicher.hole(f"spalte {spalte}", schluessel[spalte], lambda: berechnung(df, parameter))
+    return df
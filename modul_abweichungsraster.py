@@ -0,0 +1,115 @@
+# abweichungsraster.py
+
+import numpy as np
+import pandas as pd
+
+from modul_koordinatentransformation import transformiere
+
+
+#=== Tiefenabweichung im metrischen Raster je Baggerfeld =========================================================
+# ⤷ BB- und SB-Positionen (Status == 2) werden in Rasterzellen fester Kantenlänge (m) im RW/HW-System einsortiert
+# ⤷ Je Baggerfeld und Zelle: Anzahl Datenpunkte, mittlere Abweichung Abs_Balkentiefe − Solltiefe und Anteil
+#   außerhalb der Toleranz – alles über np.unique/np.bincount, ohne Schleife über Punkte oder Zellen
+# ⤷ Das Raster liegt für alle Felder auf denselben Vielfachen der Zellgröße, damit Nachbarfelder bündig anschließen
+
+ZELLGROESSE_M = 10.0
+RASTER_SEITEN = {
+    # Seite → (Rechtswert, Hochwert, Feld aus der geometrischen Zuordnung)
+    "BB": ("RW_BB", "HW_BB", "Feld_BB"),
+    "SB": ("RW_SB", "HW_SB", "Feld_SB"),
+}
+
+
+def berechne_abweichungsraster(df, toleranz_oben, toleranz_unten, zellgroesse=ZELLGROESSE_M):
+    """
+    Aggregiert die Tiefenabweichung von BB und SB in ein Raster je Baggerfeld.
+
+    Mit Feldzuordnung (Feld_BB/Feld_SB, modul_feldzuordnung.py) zählt das geometrische Feld der Position,
+    Punkte außerhalb aller Felder entfallen. Ohne Baggerfeldgrenzen wird die Spalte Baggerfeld verwendet.
+
+    Args:
+        df (pd.DataFrame): MoNa-Daten mit Solltiefe (berechne_solltiefe)
+        toleranz_oben (float): Obere Toleranz (m)
+        toleranz_unten (float): Untere Toleranz (m)
+        zellgroesse (float): Kantenlänge einer Rasterzelle (m)
+
+    Returns:
+        pd.DataFrame: je Zelle Baggerfeld, RW/HW (Zellmitte), Anzahl, Abweichung_Mittel [m], Anteil_ausserhalb
+    """
+    tiefe = pd.to_numeric(df["Abs_Balkentiefe"], errors="coerce").to_numpy(dtype=float)
+    soll = pd.to_numeric(df["Solltiefe"], errors="coerce").to_numpy(dtype=float)
+    abweichung = tiefe - soll
+    gueltig = (df["Status"] == 2).to_numpy() & np.isfinite(abweichung) & (tiefe != 999)
+
+    # BB und SB hintereinander: beide Enden des Balkens tragen dieselbe Abweichung
+    x, y, felder = [], [], []
+    for rw, hw, feld in RASTER_SEITEN.values():
+        x.append(df[rw].to_numpy(dtype="float64", na_value=np.nan))
+        y.append(df[hw].to_numpy(dtype="float64", na_value=np.nan))
+        felder.append(df[feld] if feld in df.columns else df["Baggerfeld"])
+    x, y = np.concatenate(x), np.concatenate(y)
+    feld_codes, feld_namen = pd.factorize(pd.concat(felder, ignore_index=True).astype("string"))
+    abweichung = np.tile(abweichung, len(RASTER_SEITEN))
+
+    auswahl = np.tile(gueltig, len(RASTER_SEITEN)) & np.isfinite(x) & np.isfinite(y) & (feld_codes >= 0)
+    x, y, feld_codes, abweichung = x[auswahl], y[auswahl], feld_codes[auswahl], abweichung[auswahl]
+
+    spalten = ["Baggerfeld", "RW", "HW", "Anzahl", "Abweichung_Mittel", "Anteil_ausserhalb"]
+    if len(x) == 0:
+        return pd.DataFrame(columns=spalten)
+
+    # Zellindex je Punkt, dann ein gemeinsamer int64-Schlüssel aus (Feld, Zeile, Spalte)
+    ix = np.floor(x / zellgroesse).astype(np.int64)
+    iy = np.floor(y / zellgroesse).astype(np.int64)
+    ix0, iy0 = ix.min(), iy.min()
+    nx, ny = ix.max() - ix0 + 1, iy.max() - iy0 + 1
+    schluessel, zelle = np.unique((feld_codes * ny + (iy - iy0)) * nx + (ix - ix0), return_inverse=True)
+    zelle = zelle.ravel()
+    zell_feld, rest = np.divmod(schluessel, nx * ny)
+    zell_iy, zell_ix = np.divmod(rest, nx)
+
+    ausserhalb = (abweichung > toleranz_oben) | (abweichung < -toleranz_unten)
+    anzahl = np.bincount(zelle)
+    summe = np.bincount(zelle, weights=abweichung)
+    anzahl_ausserhalb = np.bincount(zelle, weights=ausserhalb)
+
+    return pd.DataFrame({
+        "Baggerfeld": pd.Categorical.from_codes(zell_feld, feld_namen),
+        "RW": (zell_ix + ix0 + 0.5) * zellgroesse,
+        "HW": (zell_iy + iy0 + 0.5) * zellgroesse,
+        "Anzahl": anzahl,
+        "Abweichung_Mittel": summe / anzahl,
+        "Anteil_ausserhalb": anzahl_ausserhalb / anzahl,
+    }, columns=spalten)
+
+
+def raster_geojson(raster, zellgroesse, epsg_code):
+    """
+    Wandelt die Rasterzellen in eine GeoJSON-FeatureCollection (WGS84) für eine Choroplethmapbox-Ebene.
+
+    Args:
+        raster (pd.DataFrame): Ergebnis von berechne_abweichungsraster
+        zellgroesse (float): Kantenlänge der Zellen (m)
+        epsg_code (str): EPSG-Code der RW/HW-Spalten
+
+    Returns:
+        dict: FeatureCollection, die Feature-ID ist die Zeilennummer im Raster
+    """
+    halb = zellgroesse / 2
+    rw, hw = raster["RW"].to_numpy(dtype=float), raster["HW"].to_numpy(dtype=float)
+
+    # Alle Ecken (links unten, rechts unten, rechts oben, links oben) in einem Aufruf transformieren
+    ecken_x = np.concatenate([rw - halb, rw + halb, rw + halb, rw - halb])
+    ecken_y = np.concatenate([hw - halb, hw - halb, hw + halb, hw + halb])
+    lon, lat = transformiere(ecken_x, ecken_y, epsg_code)
+    lon, lat = lon.reshape(4, -1).T, lat.reshape(4, -1).T
+
+    features = []
+    for i, (zell_lon, zell_lat) in enumerate(zip(lon.tolist(), lat.tolist())):
+        ring = list(zip(zell_lon, zell_lat))
+        features.append({
+            "type": "Feature",
+            "id": i,
+            "geometry": {"type": "Polygon", "coordinates": [ring + ring[:1]]},
+        })
+    return {"type": "FeatureCollection", "features": features}
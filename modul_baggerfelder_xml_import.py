@@ -1,65 +1,189 @@
+import io
 import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+import shapely
 from shapely.geometry import Polygon
-from pyproj import Transformer
 
-def parse_baggerfelder(xml_path, epsg_code_from_mona):
-    """
-    Liest Baggerfelder aus einer LandXML-Datei ein und wandelt sie in WGS84 um.
+from modul_koordinatenerkennung import entferne_zonenkennung
+from modul_koordinatentransformation import transformiere
+from modul_mona_cache import datei_hash
 
-    Args:
-        xml_path (str): Pfad zur XML-Datei
-        epsg_code_from_mona (str): EPSG-Code, z. B. 'EPSG:25832'
 
-    Returns:
-        List[Dict]: Liste von Dicts mit Polygon, Name und Solltiefe
-    """
-    transformer = Transformer.from_crs(epsg_code_from_mona, "EPSG:4326", always_xy=True)
+#=== LandXML-Baggerfelder streamend einlesen =====================================================================
+# ⤷ iterparse statt ElementTree: jedes fertig gelesene Element wird aus dem Baum gelöst, der Speicher wächst
+#   nicht mit der Dateigröße
+# ⤷ Die Eckpunkte vieler Felder werden gesammelt und als Block verarbeitet: Text → float-Array in einem Schritt,
+#   Zonenkennung und WGS84-Transformation in je einem Aufruf je Block
+# ⤷ Die fertigen Polygone landen je (XML-Hash, EPSG) im Dateicache (modul_mona_cache.py)
 
-    ns = {'ns': 'http://www.landxml.org/schema/LandXML-1.2'}
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
+LANDXML_NS = "{http://www.landxml.org/schema/LandXML-1.2}"
+BLOCK_ECKPUNKTE = 50_000  # Eckpunkte je Block (Zonenkennung + Transformation)
 
-    polygons = []
 
-    for plan_feature in root.findall(".//ns:PlanFeature", ns):
-        name = plan_feature.attrib.get("name", "Unbenannt")
-        coord_geom = plan_feature.find("ns:CoordGeom", ns)
-        if coord_geom is None:
-            continue
+def _start_werte(texte):
+    # Start-Texte "HW RW Tiefe" aller Linien eines Feldes → Array (n, 3); fehlende Werte werden NaN
+    werte = np.array(" ".join(texte).split(), dtype="float64")
+    if werte.size == 3 * len(texte):
+        return werte.reshape(-1, 3)
+    zeilen = [np.array(text.split()[:3], dtype="float64") for text in texte]
+    return np.array([np.pad(z, (0, 3 - len(z)), constant_values=np.nan) for z in zeilen])
+
 
-        points = []
-        tiefen = []
+def _verarbeite_block(block, epsg_code_from_mona):
+    # block: Liste (Name, Array (n, 3)) → Baggerfeld-Dicts, alle Eckpunkte des Blocks in einem Aufruf
+    anzahl = [len(werte) for _, werte in block]
+    alle = np.concatenate([werte for _, werte in block]) if sum(anzahl) else np.zeros((0, 3))
 
-        for line in coord_geom.findall("ns:Line", ns):
-            start = line.find("ns:Start", ns)
-            end = line.find("ns:End", ns)
-            if start is not None and end is not None:
-                start_vals = list(map(float, start.text.strip().split()))
-                end_vals = list(map(float, end.text.strip().split()))
+    # Koordinaten zuweisen: HW = Y, RW = X
+    rw, hw = alle[:, 1], alle[:, 0]
 
-                # Koordinaten zuweisen: HW = Y, RW = X
-                hw_raw = start_vals[0]
-                rw_raw = start_vals[1]
+    # Normalisierung wie beim MoNa-Import (UTM mit Zonenkennung)
+    if epsg_code_from_mona.startswith("EPSG:258"):
+        rw, _ = entferne_zonenkennung(rw)
 
-                # Normalisierung wie bei MoNa (z. B. UTM mit Zonenkennung)
-                if epsg_code_from_mona.startswith("EPSG:258") and rw_raw > 30_000_000:
-                    rw_raw -= int(epsg_code_from_mona[-2:]) * 1_000_000
+    lons, lats = transformiere(rw, hw, epsg_code_from_mona)
+    grenzen = np.cumsum([0] + anzahl)
 
-                points.append((rw_raw, hw_raw))  # (RW, HW) = (X, Y)
-                tiefen.append(start_vals[2])
+    felder = []
+    for (name, werte), von, bis in zip(block, grenzen[:-1], grenzen[1:]):
+        points = list(zip(rw[von:bis].tolist(), hw[von:bis].tolist()))  # (RW, HW) = (X, Y)
+        transformed = list(zip(lons[von:bis].tolist(), lats[von:bis].tolist()))
 
         if points and points[0] != points[-1]:
             points.append(points[0])  # Polygon schließen
+            transformed.append(transformed[0])
 
-        # Transformation in WGS84
-        transformed = [transformer.transform(x, y) for x, y in points]
-
+        tiefen = werte[:, 2].tolist()
         solltiefe = round(sum(tiefen) / len(tiefen), 2) if tiefen else None
+        if len(points) > len(tiefen):
+            tiefen.append(tiefen[0])  # Tiefe je Eckpunkt von polygon_lokal, inkl. Schlusspunkt
 
-        polygons.append({
+        felder.append({
             "name": name,
             "polygon": Polygon(transformed),
-            "solltiefe": solltiefe
+            "polygon_lokal": Polygon(points),
+            "solltiefe": solltiefe,
+            "tiefen": tiefen
         })
+    return felder
+
+
+def parse_baggerfelder(xml_path, epsg_code_from_mona):
+    """
+    Liest Baggerfelder aus einer LandXML-Datei ein und wandelt sie in WGS84 um.
+
+    Args:
+        xml_path (str | file-like): Pfad zur XML-Datei oder Datei-Objekt (z. B. Streamlit-Upload)
+        epsg_code_from_mona (str): EPSG-Code, z. B. 'EPSG:25832'
+
+    Returns:
+        List[Dict]: Liste von Dicts mit Polygon (WGS84), polygon_lokal (RW/HW wie die MoNa-Daten), Name, Solltiefe
+                    (Mittel) und tiefen (Tiefe je Eckpunkt von polygon_lokal, für modul_solloberflaeche.py)
+    """
+    if hasattr(xml_path, "getvalue"):
+        xml_path = io.BytesIO(xml_path.getvalue())  # unabhängig von der Leseposition des Uploads
+
+    polygons = []
+    block, block_eckpunkte = [], 0
+
+    stapel = []      # offene Elemente (Vorfahren des aktuellen Elements)
+    im_feature = 0   # > 0, solange ein PlanFeature offen ist – dessen Kinder werden noch gebraucht
+
+    for ereignis, element in ET.iterparse(xml_path, events=("start", "end")):
+        if ereignis == "start":
+            stapel.append(element)
+            im_feature += element.tag == f"{LANDXML_NS}PlanFeature"
+            continue
+        stapel.pop()
+
+        if element.tag == f"{LANDXML_NS}PlanFeature":
+            im_feature -= 1
+            feature = _lies_feature(element)
+            if feature is not None:
+                block.append(feature)
+                block_eckpunkte += len(feature[1])
+            if block_eckpunkte >= BLOCK_ECKPUNKTE:
+                polygons.extend(_verarbeite_block(block, epsg_code_from_mona))
+                block, block_eckpunkte = [], 0
+
+        # Fertige Elemente vom Elternelement lösen → im Baum bleibt nur der offene Pfad, der Speicher wächst
+        # nicht mit der Dateigröße (auch nicht durch Elemente außerhalb der PlanFeatures, z. B. Surfaces)
+        if not im_feature and stapel:
+            stapel[-1].remove(element)
+
+    if block:
+        polygons.extend(_verarbeite_block(block, epsg_code_from_mona))
 
     return polygons
+
+
+def _lies_feature(element):
+    # Name und Startpunkte (RW, HW, Tiefe) eines PlanFeatures; None ohne CoordGeom
+    coord_geom = element.find(f"{LANDXML_NS}CoordGeom")
+    if coord_geom is None:
+        return None
+    # Nur Linien mit Start und Ende, verwendet wird der Startpunkt
+    texte = [
+        line.find(f"{LANDXML_NS}Start").text.strip()
+        for line in coord_geom.iterfind(f"{LANDXML_NS}Line")
+        if line.find(f"{LANDXML_NS}Start") is not None and line.find(f"{LANDXML_NS}End") is not None
+    ]
+    werte = _start_werte(texte) if texte else np.zeros((0, 3))
+    return element.attrib.get("name", "Unbenannt"), werte
+
+
+#=== Polygon-Cache je (XML-Hash, EPSG) ===========================================================================
+# ⤷ Ablage im MonaCache als Parquet-Tabelle mit WKB-Geometrien – überlebt Reruns, Sitzungen und Neustarts
+
+def _als_tabelle(baggerfelder):
+    return pd.DataFrame({
+        "name": [feld["name"] for feld in baggerfelder],
+        "solltiefe": pd.array([feld["solltiefe"] for feld in baggerfelder], dtype="Float64"),
+        "polygon": shapely.to_wkb([feld["polygon"] for feld in baggerfelder]),
+        "polygon_lokal": shapely.to_wkb([feld["polygon_lokal"] for feld in baggerfelder]),
+        "tiefen": [feld["tiefen"] for feld in baggerfelder],
+    })
+
+
+def _aus_tabelle(df):
+    polygone = shapely.from_wkb(df["polygon"].to_numpy())
+    polygone_lokal = shapely.from_wkb(df["polygon_lokal"].to_numpy())
+    return [
+        {
+            "name": name,
+            "polygon": polygon,
+            "polygon_lokal": polygon_lokal,
+            "solltiefe": None if pd.isna(solltiefe) else float(solltiefe),
+            "tiefen": list(tiefen),
+        }
+        for name, solltiefe, polygon, polygon_lokal, tiefen in zip(
+            df["name"], df["solltiefe"], polygone, polygone_lokal, df["tiefen"]
+        )
+    ]
+
+
+def lade_baggerfelder(raw, epsg_code_from_mona, cache=None):
+    """
+    Liefert die Baggerfelder einer LandXML-Datei aus dem Cache oder parst sie und legt sie ab.
+
+    Args:
+        raw (bytes): Inhalt der XML-Datei
+        epsg_code_from_mona (str): EPSG-Code, z. B. 'EPSG:25832'
+        cache (MonaCache, optional): Dateicache, Schlüssel aus SHA-256 der Datei und EPSG-Code
+
+    Returns:
+        List[Dict]: wie parse_baggerfelder
+    """
+    if cache is None:
+        return parse_baggerfelder(io.BytesIO(raw), epsg_code_from_mona)
+
+    schluessel = f"landxml-{datei_hash(raw)}-{epsg_code_from_mona.replace(':', '')}"
+    df = cache.lade(schluessel)
+    if df is not None:
+        return _aus_tabelle(df)
+
+    baggerfelder = parse_baggerfelder(io.BytesIO(raw), epsg_code_from_mona)
+    cache.speichere(schluessel, _als_tabelle(baggerfelder))
+    return baggerfelder
@@ -0,0 +1,75 @@
+# feldzuordnung.py
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely import STRtree
+
+
+#=== Geometrische Zuordnung der Spülbalken-Positionen zu den Baggerfeldern =======================================
+# ⤷ Alle Polygone aus parse_baggerfelder kommen einmal in einen STRtree (räumlicher Index)
+# ⤷ Alle BB-/SB-Positionen werden als Punkt-Array in einem Aufruf gegen den Baum geprüft (shapely 2)
+# ⤷ Punkte auf dem Rand zählen als innerhalb, bei überlappenden Feldern gewinnt das erste Feld der XML
+
+class FeldIndex:
+    """
+    Räumlicher Index über die Baggerfeld-Polygone.
+
+    Args:
+        baggerfelder (list): Ergebnis von parse_baggerfelder
+        geometrie (str): "polygon_lokal" (RW/HW wie die MoNa-Daten) oder "polygon" (WGS84)
+    """
+
+    def __init__(self, baggerfelder, geometrie="polygon_lokal"):
+        self.namen = [feld["name"] for feld in baggerfelder]
+        self.polygone = [feld[geometrie] for feld in baggerfelder]
+        self.baum = STRtree(self.polygone)
+
+    def zuordnen(self, x, y):
+        """
+        Ermittelt für jeden Punkt das Baggerfeld, in dem er liegt.
+
+        Args:
+            x, y (array-like): Koordinaten im System der Polygone (NaN = keine Position)
+
+        Returns:
+            np.ndarray: Index des Feldes je Punkt (-1 = außerhalb aller Felder oder keine Position)
+        """
+        x = np.asarray(x, dtype="float64")
+        y = np.asarray(y, dtype="float64")
+        zuordnung = np.full(len(x), -1, dtype=np.int32)
+        if len(x) == 0 or not self.polygone:
+            return zuordnung
+
+        punkte, felder = self.baum.query(shapely.points(x, y), predicate="intersects")
+        # Absteigend nach Feld schreiben → bei Überlappung bleibt das Feld mit dem kleinsten Index stehen
+        reihenfolge = np.argsort(felder, kind="stable")[::-1]
+        zuordnung[punkte[reihenfolge]] = felder[reihenfolge]
+        return zuordnung
+
+
+def ergaenze_feldzuordnung(df, baggerfelder):
+    """
+    Ergänzt je Datenpunkt das Baggerfeld von BB und SB sowie das Kennzeichen "außerhalb".
+
+    Args:
+        df (pd.DataFrame): MoNa-Daten mit normalisierten Rechtswerten (RW_BB/HW_BB, RW_SB/HW_SB)
+        baggerfelder (list): Ergebnis von parse_baggerfelder (mit "polygon_lokal")
+
+    Returns:
+        pd.DataFrame: flache Kopie mit Feld_BB, Feld_SB (Kategorie, leer = außerhalb) und
+                      ausserhalb_feld (True, wenn BB oder SB in keinem Baggerfeld liegt)
+    """
+    index = FeldIndex(baggerfelder)
+    kategorien = pd.Index(index.namen).unique()
+    codes_namen = kategorien.get_indexer(index.namen)
+
+    df = df.copy(deep=False)
+    ausserhalb = np.zeros(len(df), dtype=bool)
+    for seite in ["BB", "SB"]:
+        feld = index.zuordnen(df[f"RW_{seite}"], df[f"HW_{seite}"])
+        codes = np.where(feld >= 0, codes_namen[np.maximum(feld, 0)], -1) if len(codes_namen) else feld
+        df[f"Feld_{seite}"] = pd.Categorical.from_codes(codes, kategorien)
+        ausserhalb |= feld < 0
+    df["ausserhalb_feld"] = ausserhalb
+    return df
@@ -1,28 +1,105 @@
-def erkenne_koordinatensystem(df, st=None, sidebar=None):
-    rw_max = df["RW_Schiff"].dropna().astype(float).max()
-    hw_max = df["HW_Schiff"].dropna().astype(float).max()
+import numpy as np
+
+
+#=== Zonenkennung der UTM-Rechtswerte ============================================================================
+# ⤷ MoNa schreibt UTM-Rechtswerte teils mit vorangestellter Zone (32 500 000 statt 500 000)
+# ⤷ Wird beim Import einmal für alle RW-Spalten entfernt, die Zone steht danach in df.attrs["rw_zone"]
+
+ZONEN_SCHWELLE = 30_000_000
+RW_SPALTEN = ["RW_Schiff", "RW_BB", "RW_SB"]
+
+
+def entferne_zonenkennung(rw):
+    """
+    Entfernt die vorangestellte UTM-Zone aus Rechtswerten (vektorisiert).
+
+    Args:
+        rw (array-like): Rechtswerte (NaN erlaubt)
+
+    Returns:
+        tuple: (Rechtswerte ohne Zone als float64-Array, größte gefundene Zone oder None)
+    """
+    rw = np.asarray(rw, dtype="float64")
+    mit_zone = rw > ZONEN_SCHWELLE
+    if not mit_zone.any():
+        return rw, None
+    zone = np.floor(rw[mit_zone] / 1_000_000)
+    rw = rw.copy()
+    rw[mit_zone] -= zone * 1_000_000
+    return rw, int(zone.max())
+
+
+def normalisiere_zonen(df):
+    """
+    Entfernt die Zonenkennung aus RW_Schiff, RW_BB und RW_SB und merkt sich die Zone.
+
+    Args:
+        df (pd.DataFrame): MoNa-Daten (wird verändert)
+
+    Returns:
+        int | None: Erkannte UTM-Zone (auch in df.attrs["rw_zone"])
+    """
+    zonen = []
+    for col in RW_SPALTEN:
+        df[col], zone = entferne_zonenkennung(df[col])
+        if zone is not None:
+            zonen.append(zone)
+    df.attrs["rw_zone"] = max(zonen) if zonen else None
+    return df.attrs["rw_zone"]
 
-    proj_system = None
-    epsg_code = None
-    auto_erkannt = False
 
-    if rw_max > 30_000_000:
+def erkenne_epsg(rw_max, hw_max, rw_zone=None):
+    """
+    Leitet das Koordinatensystem aus den größten Rechts-/Hochwerten ab.
+
+    Args:
+        rw_max (float | None): Größter Rechtswert (nach Entfernen der Zonenkennung)
+        hw_max (float | None): Größter Hochwert
+        rw_zone (int | None): Beim Import entfernte UTM-Zone (normalisiere_zonen)
+
+    Returns:
+        tuple: (proj_system, epsg_code, auto_erkannt) – (None, None, False), wenn nichts passt
+    """
+    rw_max = np.nan if rw_max is None else float(rw_max)
+    hw_max = np.nan if hw_max is None else float(hw_max)
+
+    # Zone wurde beim Import entfernt (normalisiere_zonen), sonst steht sie noch im Rechtswert
+    erkannte_zone = rw_zone
+    if erkannte_zone is None and rw_max > ZONEN_SCHWELLE:
         erkannte_zone = str(int(rw_max))[:2]
-        proj_system = "UTM"
-        epsg_code = f"EPSG:258{erkannte_zone}"
-        auto_erkannt = True
 
-    elif 2_000_000 < rw_max < 5_000_000:
+    if erkannte_zone is not None:
+        return "UTM", f"EPSG:258{erkannte_zone}", True
+
+    if 2_000_000 < rw_max < 5_000_000:
         zone = str(int(rw_max))[0]
-        proj_system = "Gauß-Krüger"
-        epsg_code = f"EPSG:3146{zone}"
-        auto_erkannt = True
+        return "Gauß-Krüger", f"EPSG:3146{zone}", True
+
+    if 150_000 < rw_max < 300_000 and 300_000 < hw_max < 620_000:
+        return "RD", "EPSG:28992", True
+
+    return None, None, False
+
 
-    elif 150_000 < rw_max < 300_000 and 300_000 < hw_max < 620_000:
-        proj_system = "RD"
-        epsg_code = "EPSG:28992"
-        auto_erkannt = True
+def erkenne_koordinatensystem(df, st=None, sidebar=None, erkennung=None):
+    # erkennung: bereits ermitteltes Ergebnis (proj_system, epsg_code, auto_erkannt) – dann nur Anzeige/Auswahl
+    if erkennung is not None:
+        proj_system, epsg_code, auto_erkannt = erkennung
+        return _anzeigen(proj_system, epsg_code, auto_erkannt, st, sidebar)
 
+    # Beim Import je Datei erkannt (datei_statistik in modul_mona_import.py) → kein erneuter Scan der Spalten
+    statistik = df.attrs.get("statistik")
+    if statistik is not None:
+        proj_system, epsg_code = statistik["proj_system"], statistik["epsg"]
+        return _anzeigen(proj_system, epsg_code, epsg_code is not None, st, sidebar)
+
+    rw_max = df["RW_Schiff"].dropna().astype(float).max()
+    hw_max = df["HW_Schiff"].dropna().astype(float).max()
+    proj_system, epsg_code, auto_erkannt = erkenne_epsg(rw_max, hw_max, df.attrs.get("rw_zone"))
+    return _anzeigen(proj_system, epsg_code, auto_erkannt, st, sidebar)
+
+
+def _anzeigen(proj_system, epsg_code, auto_erkannt, st=None, sidebar=None):
     if st:  # Platzhalter für Status (empty())
         if auto_erkannt:
             st.success(f"Automatisch erkannt: {proj_system} ({epsg_code})")
@@ -40,4 +117,3 @@ def erkenne_koordinatensystem(df, st=None, sidebar=None):
             elif proj_system == "RD (Niederlande)":
                 epsg_code = "EPSG:28992"
     return proj_system, epsg_code, auto_erkannt
-
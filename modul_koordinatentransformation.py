@@ -0,0 +1,84 @@
+# koordinatentransformation.py
+
+import threading
+
+import numpy as np
+from pyproj import Transformer
+
+
+#=== Koordinatentransformation (lokales System → WGS84) ==========================================================
+# ⤷ Ein Transformer je EPSG-Paar und Thread (pyproj-Transformer sind nicht threadsicher, Streamlit-Sitzungen
+#   laufen in eigenen Threads) – wird nur einmal aufgebaut und danach wiederverwendet
+# ⤷ Transformiert ganze NumPy-Arrays in einem Aufruf statt Punkt für Punkt
+
+WGS84 = "EPSG:4326"
+
+# Koordinatenpaare der MoNa-Daten: Name → (Rechtswert, Hochwert)
+KOORDINATEN_PAARE = {
+    "Schiff": ("RW_Schiff", "HW_Schiff"),
+    "BB": ("RW_BB", "HW_BB"),
+    "SB": ("RW_SB", "HW_SB"),
+}
+
+_registry = threading.local()
+
+
+def hole_transformer(quelle, ziel=WGS84):
+    """
+    Liefert den (gecachten) Transformer für ein EPSG-Paar.
+
+    Args:
+        quelle (str): EPSG-Code des Quellsystems, z. B. 'EPSG:25832'
+        ziel (str): EPSG-Code des Zielsystems (Standard: WGS84)
+
+    Returns:
+        pyproj.Transformer: Transformer mit always_xy=True (x = RW/Länge, y = HW/Breite)
+    """
+    transformer = getattr(_registry, "transformer", None)
+    if transformer is None:
+        transformer = _registry.transformer = {}
+    if (quelle, ziel) not in transformer:
+        transformer[(quelle, ziel)] = Transformer.from_crs(quelle, ziel, always_xy=True)
+    return transformer[(quelle, ziel)]
+
+
+def transformiere(x, y, quelle, ziel=WGS84):
+    """
+    Transformiert Koordinaten-Arrays in einem Aufruf.
+
+    Args:
+        x, y (array-like): Rechts-/Hochwerte (NaN bleibt NaN)
+        quelle (str): EPSG-Code des Quellsystems
+        ziel (str): EPSG-Code des Zielsystems
+
+    Returns:
+        tuple: (x, y) als float64-Arrays im Zielsystem
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    if x.size == 0:
+        return x.copy(), y.copy()
+    x_neu, y_neu = hole_transformer(quelle, ziel).transform(x, y)
+    x_neu, y_neu = np.asarray(x_neu, dtype="float64"), np.asarray(y_neu, dtype="float64")
+    # Außerhalb des Gültigkeitsbereichs liefert PROJ inf → wie fehlende Koordinaten behandeln
+    ungueltig = ~(np.isfinite(x_neu) & np.isfinite(y_neu))
+    x_neu[ungueltig] = np.nan
+    y_neu[ungueltig] = np.nan
+    return x_neu, y_neu
+
+
+def ergaenze_wgs84(df, epsg_code):
+    """
+    Ergänzt einmal je Datensatz die WGS84-Spalten lon_*/lat_* für Schiff, BB und SB.
+
+    Args:
+        df (pd.DataFrame): MoNa-Daten mit normalisierten Rechtswerten
+        epsg_code (str): EPSG-Code der RW/HW-Spalten
+
+    Returns:
+        pd.DataFrame: flache Kopie mit lon_Schiff, lat_Schiff, lon_BB, lat_BB, lon_SB, lat_SB
+    """
+    df = df.copy(deep=False)
+    for name, (rw, hw) in KOORDINATEN_PAARE.items():
+        df[f"lon_{name}"], df[f"lat_{name}"] = transformiere(df[rw], df[hw], epsg_code)
+    return df
@@ -0,0 +1,85 @@
+# mona_cache.py
+
+import hashlib
+import os
+import tempfile
+
+import pandas as pd
+
+
+#=== Dateicache für geparste MoNa-Dateien ========================================================================
+# ⤷ Schlüssel ist der SHA-256 der hochgeladenen Bytes – gleiche Datei = gleicher Eintrag, egal wie sie heißt
+# ⤷ Ablage als Parquet (Arrow) auf der lokalen Platte, Größe begrenzt per LRU (Zugriffszeit = mtime)
+
+CACHE_VERSION = 6  # erhöhen, sobald sich das Ergebnis von parse_mona_datei oder lade_baggerfelder ändert
+CACHE_VERZEICHNIS = os.environ.get(
+    "MONA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "wi_mona_cache")
+)
+CACHE_MAX_BYTES = int(os.environ.get("MONA_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+
+def datei_hash(raw):
+    return hashlib.sha256(raw).hexdigest()
+
+
+class MonaCache:
+    """
+    Größenbegrenzter Parquet-Cache für geparste MoNa-Dateien.
+
+    Args:
+        verzeichnis (str): Ablageort der Parquet-Dateien
+        max_bytes (int): Maximale Gesamtgröße, darüber werden die ältesten Einträge gelöscht
+    """
+
+    def __init__(self, verzeichnis=CACHE_VERZEICHNIS, max_bytes=CACHE_MAX_BYTES):
+        self.verzeichnis = verzeichnis
+        self.max_bytes = max_bytes
+        os.makedirs(self.verzeichnis, exist_ok=True)
+
+    def _pfad(self, schluessel):
+        return os.path.join(self.verzeichnis, f"{schluessel}.v{CACHE_VERSION}.parquet")
+
+    def lade(self, schluessel):
+        pfad = self._pfad(schluessel)
+        try:
+            df = pd.read_parquet(pfad)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        os.utime(pfad)  # Zugriff vermerken (LRU)
+        return df
+
+    def speichere(self, schluessel, df):
+        pfad = self._pfad(schluessel)
+        tmp = f"{pfad}.{os.getpid()}.tmp"
+        try:
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, pfad)
+        except (OSError, ValueError, ImportError):
+            # Cache ist optional – bei Schreibfehlern einfach ohne weitermachen
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self.aufraeumen()
+
+    def aufraeumen(self):
+        # Älteste Einträge löschen, bis die Gesamtgröße wieder unter max_bytes liegt
+        eintraege = []
+        for name in os.listdir(self.verzeichnis):
+            if not name.endswith(".parquet"):
+                continue
+            pfad = os.path.join(self.verzeichnis, name)
+            try:
+                info = os.stat(pfad)
+            except OSError:
+                continue
+            eintraege.append((info.st_mtime, info.st_size, pfad))
+
+        gesamt = sum(groesse for _, groesse, _ in eintraege)
+        for _, groesse, pfad in sorted(eintraege):
+            if gesamt <= self.max_bytes:
+                break
+            try:
+                os.remove(pfad)
+            except OSError:
+                continue
+            gesamt -= groesse
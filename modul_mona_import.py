@@ -1,54 +1,447 @@
 # mona_import.py
 
+import csv
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+from modul_mona_cache import datei_hash
+from modul_koordinatenerkennung import normalisiere_zonen, erkenne_epsg
+from modul_koordinatentransformation import transformiere, KOORDINATEN_PAARE
+
+
+#=== Spaltenschema der MoNa-Dateien ==============================================================================
+# ⤷ 46 tabulatorgetrennte Felder je Zeile, eingerahmt von STX (\x02) und ETX (\x03)
+
+MONA_SPALTEN = [
+    "Datum", "Zeit", "Status", "RW_Schiff", "HW_Schiff",
+    "RW_BB", "HW_BB", "RW_SB", "HW_SB", "Geschwindigkeit",
+    "Kurs", "Balkentiefe", "Druck_Balken", "Zugkraft", "Düsenwinkel",
+    "P1_Vakuum", "P1_Druck", "P1_Fluss", "P1_Drehzahl", "P1_Leistung",
+    "P2_Vakuum", "P2_Druck", "P2_Fluss", "P2_Drehzahl", "P2_Leistung",
+    "P3_Vakuum", "P3_Druck", "P3_Fluss", "P3_Drehzahl", "P3_Leistung",
+    "P4_Vakuum", "P4_Druck", "P4_Fluss", "P4_Drehzahl", "P4_Leistung",
+    "Pegel", "Pegelkennung", "Pegelstatus", "Tiefgang", "Tiefe_Echolot",
+    "Temp_Balken", "Baggernummer", "Baggerfeld", "Abs_Balkentiefe", "Solltiefe_BB", "Solltiefe_SB"
+]
+
+# --- Typisiertes Schema (spart Speicher und beschleunigt alle späteren Filter) ---
+# ⤷ float64 nur für Koordinaten und für Werte, die gegen Grenzwerte verglichen werden
+# ⤷ float32 für alle übrigen Sensorkanäle, Kategorien für wiederkehrende Kennungen
+MONA_KOORDINATEN = ["RW_Schiff", "HW_Schiff", "RW_BB", "HW_BB", "RW_SB", "HW_SB"]
+MONA_GRENZWERTE = ["Geschwindigkeit", "Abs_Balkentiefe", "Solltiefe_BB", "Solltiefe_SB"]
+MONA_KATEGORIEN = ["Pegelkennung", "Pegelstatus", "Baggernummer", "Baggerfeld"]
+MONA_DATUM_ZEIT = ["Datum", "Zeit"]  # JJJJMMTT / hhmmss als Zahl, nach dem Parsen int32
+MONA_SENSOREN = [
+    col for col in MONA_SPALTEN
+    if col not in ["Status"] + MONA_KOORDINATEN + MONA_GRENZWERTE + MONA_KATEGORIEN + MONA_DATUM_ZEIT
+]
+
+# Spalten, die direkt von der C-Engine als Zahl gelesen werden
+MONA_NUMERISCH = MONA_DATUM_ZEIT + ["Status"] + MONA_KOORDINATEN + MONA_GRENZWERTE + MONA_SENSOREN
+
+MONA_DTYPES = {
+    **{col: "category" for col in MONA_KATEGORIEN},
+    **{col: "float64" for col in MONA_DATUM_ZEIT + ["Status"] + MONA_KOORDINATEN + MONA_GRENZWERTE},
+    **{col: "float32" for col in MONA_SENSOREN},
+}
+
+STATUS_FEHLT = -1  # Platzhalter für fehlenden/ungültigen Status (Spalte ist int8)
+
+SCHIFFSNAMEN = {
+    "131": "WID AKKE",
+    "167": "WID AQUADELTA",
+    "137": "WID JAN",
+    "129": "WID MAASMOND"
+}
+
 
 #=== Einlesen und Parsen der MoNa-Dateien ========================================================================
-# ⤷ Zeilenweise Aufbereitung, Umwandlung der Spaltennamen, erste Typkonvertierung
+# ⤷ STX/ETX-Rahmen werden auf Byte-Ebene entfernt, danach liest die C-Engine von pandas den Tab-Strom
 # ⤷ Timestamp muss vorhanden sein, daher Drop von Zeilen ohne Zeitstempel
 
 
-def parse_mona(files):
-    all_data = []
-    for file in files:
-        lines = file.read().decode("utf-8").splitlines()
-        cleaned = [line.strip().strip("\x02").strip("\x03").split("\t") for line in lines if line.strip()]
-        all_data.extend(cleaned)
-
-    columns = [
-        "Datum", "Zeit", "Status", "RW_Schiff", "HW_Schiff",
-        "RW_BB", "HW_BB", "RW_SB", "HW_SB", "Geschwindigkeit",
-        "Kurs", "Balkentiefe", "Druck_Balken", "Zugkraft", "Düsenwinkel",
-        "P1_Vakuum", "P1_Druck", "P1_Fluss", "P1_Drehzahl", "P1_Leistung",
-        "P2_Vakuum", "P2_Druck", "P2_Fluss", "P2_Drehzahl", "P2_Leistung",
-        "P3_Vakuum", "P3_Druck", "P3_Fluss", "P3_Drehzahl", "P3_Leistung",
-        "P4_Vakuum", "P4_Druck", "P4_Fluss", "P4_Drehzahl", "P4_Leistung",
-        "Pegel", "Pegelkennung", "Pegelstatus", "Tiefgang", "Tiefe_Echolot",
-        "Temp_Balken", "Baggernummer", "Baggerfeld", "Abs_Balkentiefe", "Solltiefe_BB", "Solltiefe_SB"
-    ]
-    
+def lese_mona_bytes(raw):
+    """
+    Liest den Inhalt einer MoNa-Datei (Bytes) in einen DataFrame mit festen Spalten ein.
+
+    Args:
+        raw (bytes): Dateiinhalt inkl. STX/ETX-Rahmung
+
+    Returns:
+        pd.DataFrame: Rohdaten mit den Spalten aus MONA_SPALTEN
+    """
+    raw = raw.translate(None, b"\x02\x03")
+    optionen = dict(
+        sep="\t",
+        header=None,
+        names=MONA_SPALTEN,
+        index_col=False,
+        quoting=csv.QUOTE_NONE,
+        skip_blank_lines=True,
+        keep_default_na=False,
+        encoding="utf-8",
+        engine="c",
+    )
+    try:
+        return pd.read_csv(
+            io.BytesIO(raw),
+            dtype=MONA_DTYPES,
+            na_values={col: [""] for col in MONA_NUMERISCH},
+            **optionen
+        )
+    except ValueError:
+        # Fallback bei defekten Zahlenfeldern: alles als Text lesen und gezielt konvertieren
+        df = pd.read_csv(io.BytesIO(raw), dtype=str, **optionen)
+        df[MONA_NUMERISCH] = df[MONA_NUMERISCH].apply(pd.to_numeric, errors="coerce")
+        return df.astype(MONA_DTYPES)
+
+
+#=== Zeitstempel aus Datum (JJJJMMTT) und Zeit (hhmmss) ==========================================================
+# ⤷ Reine Ganzzahl-Arithmetik auf den Zahlenspalten, kein String-Verketten und kein strptime
+# ⤷ Tage seit 1970 nach dem "days from civil"-Verfahren (proleptischer Gregorianischer Kalender)
+
+_TAGE_IM_MONAT = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def dekodiere_zeitstempel(datum, zeit):
+    """
+    Baut Zeitstempel aus den Spalten Datum und Zeit und markiert ungültige Zeilen.
+
+    Args:
+        datum (pd.Series): Datum als Zahl JJJJMMTT
+        zeit (pd.Series): Uhrzeit als Zahl hhmmss (führende Nullen dürfen fehlen)
+
+    Returns:
+        Tuple[pd.Series, np.ndarray]: Zeitstempel (datetime64[ns], NaT bei Fehlern) und Maske der ungültigen Zeilen
+    """
+    d = datum.to_numpy(dtype="float64", na_value=np.nan)
+    z = zeit.to_numpy(dtype="float64", na_value=np.nan)
+    gueltig = np.isfinite(d) & np.isfinite(z) & (d == np.floor(d)) & (z == np.floor(z))
+    d = np.where(gueltig, d, 19700101).astype("int64")
+    z = np.where(gueltig, z, 0).astype("int64")
+
+    jahr, monat, tag = d // 10000, d // 100 % 100, d % 100
+    stunde, minute, sekunde = z // 10000, z // 100 % 100, z % 100
+
+    schaltjahr = (jahr % 4 == 0) & ((jahr % 100 != 0) | (jahr % 400 == 0))
+    monat_idx = np.clip(monat, 0, 12)
+    max_tag = _TAGE_IM_MONAT[monat_idx] + ((monat_idx == 2) & schaltjahr)
+    gueltig &= (jahr >= 1900) & (jahr <= 2200) & (monat >= 1) & (monat <= 12) & (tag >= 1) & (tag <= max_tag)
+    gueltig &= (z >= 0) & (stunde <= 23) & (minute <= 59) & (sekunde <= 59)
+
+    j = jahr - (monat <= 2)
+    era = j // 400
+    yoe = j - era * 400
+    doy = (153 * (monat + np.where(monat > 2, -3, 9)) + 2) // 5 + tag - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    tage = era * 146097 + doe - 719468
+
+    ns = (tage * 86400 + stunde * 3600 + minute * 60 + sekunde) * 1_000_000_000
+    ns[~gueltig] = np.iinfo("int64").min  # = NaT
+    return pd.Series(ns.view("datetime64[ns]"), index=datum.index), ~gueltig
+
+
+def _kategorie_strip(s, zeichen=None):
+    # Strip nur auf den (wenigen) Kategorien statt auf jeder Zeile
+    s = s.astype("category")
+    bereinigt = pd.Categorical(s.cat.categories.astype(str).str.strip(zeichen))
+    codes = pd.Series(bereinigt.codes).reindex(s.cat.codes.to_numpy(), fill_value=-1).to_numpy()
+    return pd.Series(pd.Categorical.from_codes(codes, bereinigt.categories), index=s.index)
+
+
+def verbinde_mona_frames(frames):
+    # Kategorien aller Teile vereinheitlichen, damit concat die Kategorie-Spalten nicht zu object macht
+    # ⤷ sortiert, damit groupby/Tabellen unabhängig von der Dateireihenfolge alphabetisch bleiben
+    frames = [f.copy(deep=False) for f in frames if len(f)] or frames[:1]
+    for col in MONA_KATEGORIEN + ["Schiffsname"]:
+        kategorien = pd.api.types.union_categoricals(
+            [f[col] for f in frames], sort_categories=True
+        ).categories
+        for f in frames:
+            f[col] = f[col].cat.set_categories(kategorien)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _datei_bytes(file):
+    # Dateipfad (Batch-Auswertung) oder Streamlit-UploadedFile (getvalue() unabhängig von der Leseposition)
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            return f.read()
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    return file.read()
+
+
+def parse_mona_datei(raw):
+    """
+    Parst eine einzelne MoNa-Datei inkl. Zeitstempel, Baggerfeld und Schiffsname.
+
+    Args:
+        raw (bytes): Dateiinhalt
+
+    Returns:
+        pd.DataFrame: Aufbereitete Daten (nur Zeilen mit gültigem Zeitstempel)
+    """
+    if raw.strip():
+        df = lese_mona_bytes(raw)
+    else:
+        df = pd.DataFrame(columns=MONA_SPALTEN).astype(MONA_DTYPES)
+
     # --- DataFrame setzen ---
-    df = pd.DataFrame(all_data, columns=columns)
-    df['timestamp'] = pd.to_datetime(df['Datum'].astype(str) + df['Zeit'].astype(str), format="%Y%m%d%H%M%S", errors='coerce')
-    df['Baggerfeld'] = df['Baggerfeld'].astype(str).str.strip('"')
-    
-    cols_to_convert = [
-        "Status", "HW_BB", "RW_SB", "HW_SB", "RW_Schiff",
-        "HW_Schiff", "Abs_Balkentiefe"
-    ]
-    df[cols_to_convert] = df[cols_to_convert].apply(pd.to_numeric, errors="coerce")
-    
+    df['timestamp'], ungueltig = dekodiere_zeitstempel(df['Datum'], df['Zeit'])
+    df['Baggerfeld'] = _kategorie_strip(df['Baggerfeld'], '"')
+    df['Status'] = df['Status'].fillna(STATUS_FEHLT).astype("int8")
+
     for col in ["Solltiefe_BB", "Solltiefe_SB"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
         df.loc[df[col] == 999.0, col] = None  # falls 999 als Platzhalter drin ist
-    
-    df["Baggernummer"] = df["Baggernummer"].astype(str).str.strip()    
-    df["Schiffsname"] = df["Baggernummer"].map({
-        "131": "WID AKKE",
-        "167": "WID AQUADELTA",
-        "137": "WID JAN",
-        "129": "WID MAASMOND"
-    })
-
-    return df.dropna(subset=['timestamp'])
+
+    df["Baggernummer"] = _kategorie_strip(df["Baggernummer"])
+    df["Schiffsname"] = df["Baggernummer"].map(SCHIFFSNAMEN).astype("category")
+
+    df = df.dropna(subset=['timestamp']).reset_index(drop=True)
+    df[MONA_DATUM_ZEIT] = df[MONA_DATUM_ZEIT].astype("int32")
+    for col in MONA_KATEGORIEN + ["Schiffsname"]:
+        df[col] = df[col].cat.remove_unused_categories()
+
+    # UTM-Zone aus den Rechtswerten entfernen (einmalig, Zone → df.attrs["rw_zone"])
+    normalisiere_zonen(df)
+
+    # Zeilen mit defektem Datum/Zeit werden verworfen, aber gezählt (Anzeige im Dashboard)
+    df.attrs["ungueltige_zeitstempel"] = int(ungueltig.sum())
+
+    # Kennzahlen und Koordinatensystem der Datei (liegen mit im Cache)
+    df.attrs["statistik"] = datei_statistik(df)
+    return df
+
+
+def parse_mona(files, cache=None, worker=1, nach_schiff=False):
+    """
+    Parst mehrere MoNa-Dateien und fügt sie zu einem DataFrame zusammen.
+
+    Args:
+        files (list): Hochgeladene Dateien (file-like, z. B. Streamlit-UploadedFile) oder Dateipfade
+        cache (MonaCache, optional): Cache für bereits geparste Dateien (modul_mona_cache.py)
+        worker (int): Anzahl Prozesse für das Parsen (1 = ohne Prozess-Pool)
+        nach_schiff (bool): Ergebnis je Schiff (Baggernummer) und darin nach Zeit ordnen
+
+    Returns:
+        pd.DataFrame: Alle Datenpunkte mit Zeitstempel, zeitlich sortiert
+    """
+    rohdaten = [_datei_bytes(file) for file in files]
+    frames = [None] * len(rohdaten)
+
+    # Erst im Cache nachsehen, nur die fehlenden Dateien werden geparst
+    offen = []
+    for i, raw in enumerate(rohdaten):
+        if cache is not None:
+            frames[i] = cache.lade(datei_hash(raw))
+        if frames[i] is None:
+            offen.append(i)
+
+    if worker > 1 and len(offen) > 1:
+        # "spawn" statt fork: Aufrufer können mehrere Threads haben (z. B. Streamlit-Server), ein Fork
+        # übernähme deren gehaltene Locks in die Kindprozesse
+        kontext = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(worker, len(offen)), mp_context=kontext) as pool:
+            geparst = list(pool.map(parse_mona_datei, [rohdaten[i] for i in offen]))
+    else:
+        geparst = [parse_mona_datei(rohdaten[i]) for i in offen]
+
+    for i, df_datei in zip(offen, geparst):
+        frames[i] = df_datei
+        if cache is not None:
+            cache.speichere(datei_hash(rohdaten[i]), df_datei)
+
+    if not frames:
+        return parse_mona_datei(b"")
+
+    namen = [_datei_name(file) for file in files]
+    sortierung = ["Baggernummer", "timestamp"] if nach_schiff else ["timestamp"]
+    return fuehre_zusammen(frames, namen, sortierung)
+
+
+def _datei_name(file):
+    if isinstance(file, (str, os.PathLike)):
+        return os.path.basename(file)
+    return getattr(file, "name", None)
+
+
+def fuehre_zusammen(frames, namen, sortierung=("timestamp",)):
+    """
+    Fügt geparste Dateien zu einem Datensatz zusammen (auch für den Live-Modus, modul_mona_tail.py).
+
+    Liegen die Dateien in unterschiedlichen Koordinatensystemen (z. B. UTM und RD aus deutschen und
+    niederländischen Einsätzen), werden die Koordinaten ins System mit den meisten Datenpunkten umgerechnet.
+
+    Args:
+        frames (list): Ergebnisse von parse_mona_datei (mit attrs["statistik"])
+        namen (list): Dateinamen in derselben Reihenfolge (für Hinweise im Dashboard)
+        sortierung (sequence): Sortierspalten
+
+    Returns:
+        pd.DataFrame: Datensatz mit attrs["statistik"] (datensatz_statistik), "ungueltige_zeitstempel", "rw_zone"
+    """
+    statistiken = [
+        Statistik(f.attrs.get("statistik") or datei_statistik(f), datei=name) for f, name in zip(frames, namen)
+    ]
+    ziel = datensatz_statistik(statistiken)["epsg"]
+    for i, (df_datei, statistik) in enumerate(zip(frames, statistiken)):
+        if statistik["epsg"] is not None and statistik["epsg"] != ziel:
+            frames[i] = projiziere_koordinaten(df_datei, statistik["epsg"], ziel)
+            statistiken[i] = Statistik(
+                statistik, koordinaten=_koordinaten_spannen(frames[i], _gueltige_zeilen(frames[i])), umgerechnet=ziel
+            )
+
+    # --- Zusammenführen in Zeitreihenfolge (stabil, d. h. Dateireihenfolge bei gleichen Zeiten) ---
+    df = verbinde_mona_frames(frames)
+    df = df.sort_values(by=list(sortierung), kind="stable").reset_index(drop=True)
+    df.attrs["ungueltige_zeitstempel"] = sum(f.attrs.get("ungueltige_zeitstempel", 0) for f in frames)
+    df.attrs["rw_zone"] = gemeinsame_rw_zone(frames)
+    df.attrs["statistik"] = datensatz_statistik(statistiken)
+    return df
+
+
+def projiziere_koordinaten(df, quelle, ziel):
+    # Alle Koordinatenpaare einer Datei in ein anderes System umrechnen (Kopie, der Cache bleibt unverändert)
+    df = df.copy()
+    for rw, hw in KOORDINATEN_PAARE.values():
+        df[rw], df[hw] = transformiere(df[rw], df[hw], quelle, ziel)
+    return df
+
+
+def gemeinsame_rw_zone(frames):
+    # UTM-Zone über mehrere Dateien (größte, wie die Erkennung über das Maximum der Rechtswerte)
+    zonen = [f.attrs["rw_zone"] for f in frames if f.attrs.get("rw_zone") is not None]
+    return max(zonen) if zonen else None
+
+
+UNGUELTIGE_BAGGERFELDER = ["", "0"]
+
+
+def nur_gueltige_baggerfelder(df):
+    # Baggerfeld "0" oder leer entfernen
+    return df[~df["Baggerfeld"].isin(UNGUELTIGE_BAGGERFELDER)]
+
+
+#=== Statistik je Datei und Datensatz ============================================================================
+# ⤷ Wird einmal beim Parsen je Datei erhoben (über die Zeilen mit gültigem Baggerfeld) und liegt im Cache mit
+# ⤷ Kopfzeile, Zeit-Slider, Feldliste und Koordinatensystem im Dashboard kommen daraus – ohne erneuten Scan
+# ⤷ Nur JSON-Typen (Zeiten als ns seit 1970), damit die attrs den Parquet-Cache überstehen
+
+class Statistik(dict):
+    """
+    Statistik einer Datei oder eines Datensatzes (wird nach dem Erheben nicht mehr verändert).
+
+    pandas kopiert df.attrs bei fast jeder Operation tief – die Statistik gibt beim Kopieren sich selbst zurück.
+    """
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def _gueltige_zeilen(df):
+    return ~df["Baggerfeld"].isin(UNGUELTIGE_BAGGERFELDER).to_numpy()
+
+
+def _koordinaten_spannen(df, maske):
+    spannen = {}
+    for rw, hw in KOORDINATEN_PAARE.values():
+        for col in (rw, hw):
+            werte = df[col].to_numpy(dtype="float64", na_value=np.nan)[maske]
+            werte = werte[np.isfinite(werte)]
+            spannen[col] = [float(werte.min()), float(werte.max())] if len(werte) else [None, None]
+    return spannen
+
+
+def datei_statistik(df):
+    """
+    Erhebt Kennzahlen einer geparsten MoNa-Datei und erkennt ihr Koordinatensystem.
+
+    Args:
+        df (pd.DataFrame): Ergebnis von parse_mona_datei (zeitlich noch unsortiert möglich)
+
+    Returns:
+        Statistik: zeilen, zeit_min/zeit_max (ns), koordinaten {Spalte: [min, max]}, schiffe {Name: erster
+                   Zeitstempel (ns)}, baggerfelder, rw_zone, proj_system, epsg
+    """
+    maske = _gueltige_zeilen(df)
+    zeit = df["timestamp"].to_numpy(dtype="datetime64[ns]")[maske].view("int64")
+    koordinaten = _koordinaten_spannen(df, maske)
+
+    # Erster Zeitstempel je Schiff, Reihenfolge nach erstem Auftreten
+    schiffsname = df["Schiffsname"].to_numpy()[maske]
+    erstes_auftreten = pd.Series(zeit).groupby(schiffsname, sort=False, dropna=True).min().sort_values(kind="stable")
+
+    baggerfelder = df["Baggerfeld"].to_numpy()[maske]
+    proj_system, epsg, _ = erkenne_epsg(
+        koordinaten["RW_Schiff"][1], koordinaten["HW_Schiff"][1], df.attrs.get("rw_zone")
+    )
+    return Statistik(
+        zeilen=int(maske.sum()),
+        zeit_min=int(zeit.min()) if len(zeit) else None,
+        zeit_max=int(zeit.max()) if len(zeit) else None,
+        koordinaten=koordinaten,
+        schiffe={str(name): int(ts) for name, ts in erstes_auftreten.items()},
+        baggerfelder=sorted(str(feld) for feld in pd.unique(baggerfelder) if pd.notna(feld)),
+        rw_zone=df.attrs.get("rw_zone"),
+        proj_system=proj_system,
+        epsg=epsg,
+    )
+
+
+def datensatz_statistik(statistiken):
+    """
+    Fasst die Statistiken mehrerer Dateien (oder Teilstücke einer Datei) zusammen.
+
+    Das Koordinatensystem des Datensatzes ist das der Dateien mit den meisten Datenpunkten.
+
+    Args:
+        statistiken (list): Ergebnisse von datei_statistik
+
+    Returns:
+        Statistik: wie datei_statistik, zusätzlich dateien (Einzelstatistiken) und epsg_gemischt
+    """
+    def grenze(werte, funktion):
+        werte = [w for w in werte if w is not None]
+        return funktion(werte) if werte else None
+
+    koordinaten = {
+        col: [
+            grenze([s["koordinaten"][col][0] for s in statistiken], min),
+            grenze([s["koordinaten"][col][1] for s in statistiken], max),
+        ]
+        for col in (statistiken[0]["koordinaten"] if statistiken else {})
+    }
+
+    schiffe = {}
+    for s in statistiken:
+        for name, ts in s["schiffe"].items():
+            schiffe[name] = min(ts, schiffe.get(name, ts))
+
+    # Datenpunkte je erkanntem System, das größte gewinnt (bei Gleichstand die erste Datei)
+    punkte_je_epsg = {}
+    for s in statistiken:
+        if s["epsg"] is not None:
+            punkte_je_epsg[s["epsg"]] = punkte_je_epsg.get(s["epsg"], 0) + s["zeilen"]
+    epsg = max(punkte_je_epsg, key=punkte_je_epsg.get) if punkte_je_epsg else None
+    proj_system = next((s["proj_system"] for s in statistiken if s["epsg"] == epsg), None)
+
+    return Statistik(
+        zeilen=sum(s["zeilen"] for s in statistiken),
+        zeit_min=grenze([s["zeit_min"] for s in statistiken], min),
+        zeit_max=grenze([s["zeit_max"] for s in statistiken], max),
+        koordinaten=koordinaten,
+        schiffe=dict(sorted(schiffe.items(), key=lambda eintrag: eintrag[1])),
+        baggerfelder=sorted(set().union(*(s["baggerfelder"] for s in statistiken))),
+        rw_zone=grenze([s["rw_zone"] for s in statistiken], max),
+        proj_system=proj_system,
+        epsg=epsg,
+        dateien=list(statistiken),
+        epsg_gemischt=len(punkte_je_epsg) > 1,
+    )
@@ -0,0 +1,189 @@
+# mona_tail.py
+
+import hashlib
+import os
+
+from modul_mona_import import (
+    parse_mona_datei, verbinde_mona_frames, nur_gueltige_baggerfelder, fuehre_zusammen, datensatz_statistik,
+    Statistik
+)
+from modul_solltiefe_berechnen import solltiefe_spalte, letzte_solltiefe
+
+
+#=== Inkrementelles Einlesen wachsender MoNa-Dateien =============================================================
+# ⤷ Der Logger an Bord hängt laufend Zeilen an die Tagesdatei an
+# ⤷ Je Datei werden Byte-Offset und Hash des gelesenen Dateianfangs gemerkt, gelesen werden nur vollständige
+#   neue Zeilen
+# ⤷ Die Solltiefe wird nur für den neuen Abschnitt fortgeschrieben, die Zeilen werden hinten angehängt
+#   (kein erneutes Zusammenführen und Sortieren); nachfolgende Stufen erhalten den Zuwachs über neu_ab
+
+KOPF_BYTES = 4096  # Dateianfang, an dem eine neue/ersetzte Datei erkannt wird
+
+
+def _kopf_hash(raw):
+    # Hash über die bereits gelesenen Bytes des Dateianfangs → (Länge, Hash); wächst die Datei, bleibt er gleich
+    kopf = raw[:KOPF_BYTES]
+    return len(kopf), hashlib.sha256(kopf).hexdigest()
+
+
+class MonaTail:
+    """
+    Hält den Stand mehrerer wachsender MoNa-Dateien und liest bei jedem Aufruf nur das Neue.
+
+    Nach aktualisiere beschreiben drei Attribute den letzten Übergang (für den Zwischenspeicher):
+    schluessel (aktueller Stand), vorher (Stand davor, None = komplett neu eingelesen) und
+    neu_ab (erste neue Zeile in df; alle Zeilen davor sind unverändert die des Stands vorher).
+    """
+
+    def __init__(self):
+        self.offsets = {}               # Pfad -> gelesene Bytes
+        self.koepfe = {}                # Pfad -> (Länge, Hash) des gelesenen Dateianfangs
+        self.teile = {}                 # Pfad -> geparste Teilstücke der Datei (in Lesereihenfolge)
+        self.statistiken = {}           # Pfad -> Statistik der Datei (aus den Teilstücken zusammengefasst)
+        self.ungueltige_zeitstempel = {}  # Pfad -> verworfene Zeilen mit ungültigem Datum/Zeit
+        self.df = None                  # Datensatz mit fortgeschriebener Solltiefe
+        self.schluessel = ()
+        self.vorher = None
+        self.neu_ab = 0
+        self._uebertrag = None          # letzte Solltiefe (Startwert für den nächsten Abschnitt)
+        self._ausstehend = []           # gelesene, aber noch nicht angehängte Zeilen
+
+    def _zuruecksetzen(self, pfad):
+        self.offsets.pop(pfad, None)
+        self.koepfe.pop(pfad, None)
+        self.teile.pop(pfad, None)
+        self.statistiken.pop(pfad, None)
+        self.ungueltige_zeitstempel.pop(pfad, None)
+        self.df = None  # Zeilen der Datei sind schon verarbeitet → komplett neu rechnen
+
+    def lese(self, pfad):
+        """
+        Liest die seit dem letzten Aufruf angehängten, vollständigen Zeilen einer Datei.
+
+        Eine gelöschte oder rotierte Datei (nicht mehr vorhanden) wird zurückgesetzt.
+
+        Args:
+            pfad (str): Pfad zur MoNa-Datei
+
+        Returns:
+            pd.DataFrame: Nur die neuen Zeilen (geparst wie parse_mona_datei)
+        """
+        offset = self.offsets.get(pfad, 0)
+        try:
+            with open(pfad, "rb") as f:
+                kopf = f.read(KOPF_BYTES)
+                groesse = os.fstat(f.fileno()).st_size
+                # Datei ersetzt oder gekürzt (z. B. neuer Tag, Logger-Neustart) → von vorn beginnen;
+                # verglichen wird nur der schon gelesene Teil des Anfangs, kleine Dateien wachsen ja noch
+                laenge, _ = self.koepfe.get(pfad, (0, None))
+                if offset and (groesse < offset or _kopf_hash(kopf[:laenge]) != self.koepfe.get(pfad)):
+                    self._zuruecksetzen(pfad)
+                    offset = 0
+                f.seek(offset)
+                raw = f.read()
+        except FileNotFoundError:
+            if pfad in self.offsets:
+                self._zuruecksetzen(pfad)
+            return parse_mona_datei(b"")
+
+        # Nur bis zum letzten Zeilenende lesen, die angefangene Zeile kommt beim nächsten Mal
+        ende = raw.rfind(b"\n") + 1
+        if ende == 0:
+            return parse_mona_datei(b"")
+        raw = raw[:ende]
+
+        if offset < KOPF_BYTES:
+            self.koepfe[pfad] = _kopf_hash(kopf[:offset] + raw)
+        self.offsets[pfad] = offset + ende
+
+        neu = parse_mona_datei(raw)
+        self.ungueltige_zeitstempel[pfad] = (
+            self.ungueltige_zeitstempel.get(pfad, 0) + neu.attrs.get("ungueltige_zeitstempel", 0)
+        )
+        self.teile.setdefault(pfad, []).append(neu)
+        self.statistiken[pfad] = (
+            datensatz_statistik([self.statistiken[pfad], neu.attrs["statistik"]])
+            if pfad in self.statistiken else neu.attrs["statistik"]
+        )
+
+        if not neu.empty:
+            self._ausstehend.append(neu)
+        return neu
+
+    def _datei(self, pfad):
+        # Teilstücke einer Datei zu einem Frame (nur für das komplette Neueinlesen)
+        df = verbinde_mona_frames(self.teile[pfad])
+        df.attrs["statistik"] = self.statistiken[pfad]
+        df.attrs["ungueltige_zeitstempel"] = self.ungueltige_zeitstempel.get(pfad, 0)
+        df.attrs["rw_zone"] = self.statistiken[pfad]["rw_zone"]
+        return df
+
+    def rohdaten(self):
+        # Alle bisher gelesenen Zeilen, zeitlich sortiert
+        if not self.teile:
+            return parse_mona_datei(b"")
+        return fuehre_zusammen([self._datei(pfad) for pfad in self.teile], [os.path.basename(p) for p in self.teile])
+
+    def _attrs(self):
+        # Kennzahlen des Datensatzes aus den Statistiken der Dateien (wie fuehre_zusammen, ohne Umrechnung)
+        statistik = datensatz_statistik([
+            Statistik(statistik, datei=os.path.basename(pfad)) for pfad, statistik in self.statistiken.items()
+        ])
+        return {
+            "statistik": statistik,
+            "ungueltige_zeitstempel": sum(self.ungueltige_zeitstempel.get(pfad, 0) for pfad in self.teile),
+            "rw_zone": statistik["rw_zone"],
+        }
+
+    def _komplett(self):
+        df = nur_gueltige_baggerfelder(self.rohdaten()).reset_index(drop=True)
+        df["Solltiefe"] = solltiefe_spalte(df)
+        return df
+
+    def aktualisiere(self, pfade):
+        """
+        Liest alle Dateien nach und hängt die neuen Zeilen mit fortgeschriebener Solltiefe an.
+
+        Komplett neu eingelesen wird nur, wenn eine Datei ersetzt wurde oder wegfällt, die Dateien in
+        unterschiedlichen Koordinatensystemen vorliegen oder neue Zeilen vor dem bisherigen Ende liegen.
+
+        Args:
+            pfade (list): Pfade der beobachteten MoNa-Dateien
+
+        Returns:
+            pd.DataFrame: Gesamter Datensatz (zeitlich sortiert) mit Spalte "Solltiefe" und attrs wie
+                          fuehre_zusammen
+        """
+        for pfad in pfade:
+            self.lese(pfad)
+        neue, self._ausstehend = self._ausstehend, []
+        for pfad in list(self.teile):
+            if pfad not in pfade:
+                self._zuruecksetzen(pfad)
+
+        schluessel = tuple(sorted(self.offsets.items()))
+        if self.df is not None and schluessel == self.schluessel:
+            return self.df  # nichts Neues – letzter Übergang bleibt gültig
+
+        df_neu = None
+        if self.df is not None and not self.df.empty and not self._attrs()["statistik"]["epsg_gemischt"]:
+            df_neu = nur_gueltige_baggerfelder(verbinde_mona_frames(neue)) if neue else self.df.iloc[:0]
+            df_neu = df_neu.sort_values(by="timestamp", kind="stable").reset_index(drop=True)
+            if len(df_neu) and df_neu["timestamp"].iloc[0] < self.df["timestamp"].iloc[-1]:
+                df_neu = None  # Neue Zeilen liegen vor dem bisherigen Ende (z. B. zweites Schiff hängt nach)
+
+        if df_neu is None:
+            df = self._komplett()
+            self.vorher, self.neu_ab = None, 0
+            self._uebertrag = letzte_solltiefe(df)
+        else:
+            df_neu["Solltiefe"] = solltiefe_spalte(df_neu, self._uebertrag)
+            df = verbinde_mona_frames([self.df, df_neu]) if len(df_neu) else self.df.copy(deep=False)
+            self.vorher, self.neu_ab = self.schluessel, len(self.df)
+            letzte = letzte_solltiefe(df_neu)  # None: keine neue Zeile mit Status 2 → alter Startwert bleibt
+            self._uebertrag = self._uebertrag if letzte is None else letzte
+            df.attrs = {}
+
+        df.attrs.update(self._attrs())
+        self.df, self.schluessel = df, schluessel
+        return df
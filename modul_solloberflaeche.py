@@ -0,0 +1,147 @@
+# solloberflaeche.py
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely import STRtree
+
+
+#=== Soll-Oberfläche aus den Eckpunkt-Tiefen der LandXML (TIN) ===================================================
+# ⤷ Je Baggerfeld werden die Eckpunkte (RW/HW + Tiefe aus dem Start-Tripel) trianguliert
+#   (Constrained Delaunay, d. h. nur innerhalb des Feldumrisses)
+# ⤷ Alle Dreiecke aller Felder kommen in einen STRtree, Abfragen laufen für ganze Punkt-Arrays in einem Aufruf
+# ⤷ Die Solltiefe je Punkt ist die baryzentrische Interpolation der drei Eckpunkt-Tiefen – bei geneigten
+#   Feldern genauer als der Mittelwert "solltiefe" des Feldes
+
+SOLL_SEITEN = {
+    # Seite → (Rechtswert, Hochwert)
+    "BB": ("RW_BB", "HW_BB"),
+    "SB": ("RW_SB", "HW_SB"),
+}
+
+
+def _trianguliere(polygon):
+    # Dreiecke innerhalb des Polygons; ältere shapely-Versionen: Delaunay der Eckpunkte, nur Dreiecke im Feld
+    if hasattr(shapely, "constrained_delaunay_triangles"):
+        return shapely.get_parts(shapely.constrained_delaunay_triangles(polygon))
+    dreiecke = shapely.get_parts(shapely.delaunay_triangles(polygon))
+    return dreiecke[shapely.contains(polygon, shapely.centroid(dreiecke))]
+
+
+class SollOberflaeche:
+    """
+    Triangulierte Soll-Oberfläche aller Baggerfelder mit räumlichem Index.
+
+    Args:
+        baggerfelder (list): Ergebnis von parse_baggerfelder (mit "polygon_lokal" und "tiefen")
+    """
+
+    def __init__(self, baggerfelder):
+        ecken, tiefen, felder = [], [], []
+        for index, feld in enumerate(baggerfelder):
+            polygon = feld["polygon_lokal"]
+            if polygon.is_empty or not feld.get("tiefen"):
+                continue
+
+            # Tiefe je Eckpunkt (Koordinaten wie im Polygon, die Triangulierung erzeugt keine neuen Punkte)
+            tiefe_je_punkt = dict(zip(map(tuple, shapely.get_coordinates(polygon.exterior).tolist()), feld["tiefen"]))
+            dreiecke = _trianguliere(polygon)
+            if len(dreiecke) == 0:
+                continue
+
+            coords = shapely.get_coordinates(dreiecke).reshape(len(dreiecke), 4, 2)[:, :3]
+            ecken.append(coords)
+            tiefen.append(np.array([tiefe_je_punkt.get(tuple(p), np.nan) for p in coords.reshape(-1, 2).tolist()])
+                          .reshape(-1, 3))
+            felder.append(np.full(len(dreiecke), index, dtype=np.int32))
+
+        self.ecken = np.concatenate(ecken) if ecken else np.zeros((0, 3, 2))
+        self.tiefen = np.concatenate(tiefen) if tiefen else np.zeros((0, 3))
+        self.felder = np.concatenate(felder) if felder else np.zeros(0, dtype=np.int32)
+        self.baum = STRtree(shapely.polygons(np.concatenate([self.ecken, self.ecken[:, :1]], axis=1)))
+
+    def solltiefe(self, x, y):
+        """
+        Interpoliert die Solltiefe für viele Punkte in einem Aufruf.
+
+        Args:
+            x, y (array-like): Koordinaten im System der Baggerfelder (NaN = keine Position)
+
+        Returns:
+            np.ndarray: Solltiefe je Punkt (NaN = außerhalb aller Felder); bei Überlappung gilt das erste Feld
+        """
+        x = np.asarray(x, dtype="float64")
+        y = np.asarray(y, dtype="float64")
+        ergebnis = np.full(len(x), np.nan)
+        if len(x) == 0 or len(self.felder) == 0:
+            return ergebnis
+
+        punkte, dreiecke = self.baum.query(shapely.points(x, y), predicate="intersects")
+
+        # Baryzentrische Koordinaten für alle Treffer-Paare auf einmal
+        a, b, c = (self.ecken[dreiecke, i] for i in range(3))
+        p = np.column_stack([x[punkte], y[punkte]])
+        v0, v1, v2 = b - a, c - a, p - a
+        d00, d01, d11 = (v0 * v0).sum(1), (v0 * v1).sum(1), (v1 * v1).sum(1)
+        d20, d21 = (v2 * v0).sum(1), (v2 * v1).sum(1)
+        nenner = d00 * d11 - d01 * d01
+        gueltig = nenner != 0  # entartete (flache) Dreiecke auslassen
+        with np.errstate(invalid="ignore", divide="ignore"):
+            w1 = (d11 * d20 - d01 * d21) / nenner
+            w2 = (d00 * d21 - d01 * d20) / nenner
+        tiefe = self.tiefen[dreiecke]
+        wert = (1 - w1 - w2) * tiefe[:, 0] + w1 * tiefe[:, 1] + w2 * tiefe[:, 2]
+
+        # Je Punkt ein Treffer: kleinstes Feld zuerst (wie FeldIndex), auf Kanten einfach das erste Dreieck
+        punkte, dreiecke, wert = punkte[gueltig], dreiecke[gueltig], wert[gueltig]
+        reihenfolge = np.lexsort((dreiecke, self.felder[dreiecke], punkte))
+        punkte, wert = punkte[reihenfolge], wert[reihenfolge]
+        erste = np.r_[True, punkte[1:] != punkte[:-1]]
+        ergebnis[punkte[erste]] = wert[erste]
+        return ergebnis
+
+
+def ergaenze_solltiefe_flaeche(df, baggerfelder):
+    """
+    Ergänzt je Datenpunkt die Solltiefe aus der Soll-Oberfläche an den Positionen von BB und SB.
+
+    Args:
+        df (pd.DataFrame): MoNa-Daten mit normalisierten Rechtswerten
+        baggerfelder (list): Ergebnis von parse_baggerfelder
+
+    Returns:
+        pd.DataFrame: flache Kopie mit Solltiefe_TIN_BB und Solltiefe_TIN_SB (NaN = außerhalb aller Felder)
+    """
+    oberflaeche = SollOberflaeche(baggerfelder)
+    df = df.copy(deep=False)
+    for seite, (rw, hw) in SOLL_SEITEN.items():
+        df[f"Solltiefe_TIN_{seite}"] = oberflaeche.solltiefe(df[rw], df[hw])
+    return df
+
+
+def vergleiche_solltiefen(df):
+    """
+    Vergleicht die Solltiefe aus der Soll-Oberfläche mit Solltiefe_BB/Solltiefe_SB aus den MoNa-Daten.
+
+    Returns:
+        pd.DataFrame | None: je Baggerfeld und Seite Anzahl, mittlere und größte Abweichung (TIN − MoNa) in m
+    """
+    teile = []
+    for seite in SOLL_SEITEN:
+        differenz = df[f"Solltiefe_TIN_{seite}"] - pd.to_numeric(df[f"Solltiefe_{seite}"], errors="coerce")
+        teile.append(pd.DataFrame({
+            "Baggerfeld": df["Baggerfeld"].astype(str),
+            "Seite": seite,
+            "Differenz": differenz,
+        }).dropna(subset=["Differenz"]))
+
+    vergleich = pd.concat(teile, ignore_index=True)
+    if vergleich.empty:
+        return None
+    tabelle = vergleich.groupby(["Baggerfeld", "Seite"])["Differenz"].agg(
+        Anzahl="size",
+        Mittel="mean",
+        Maximum=lambda d: d.abs().max(),
+    ).reset_index()
+    tabelle[["Mittel", "Maximum"]] = tabelle[["Mittel", "Maximum"]].round(3)
+    return tabelle.rename(columns={"Mittel": "Abweichung Ø [m]", "Maximum": "Abweichung max. |…| [m]"})
@@ -6,7 +6,28 @@
 
 import pandas as pd
 
-def berechne_solltiefe(df, toleranz_oben, toleranz_unten):
+def solltiefe_spalte(df, uebertrag=None):
+    """
+    Solltiefe je Zeile: BB-Wert, sonst SB-Wert (999 = fehlt), nur bei Status == 2, Lücken fortgeschrieben.
+
+    Args:
+        df (pd.DataFrame): Zeitlich sortierte MoNa-Daten
+        uebertrag (float, optional): letzte Solltiefe eines vorherigen Abschnitts (Fortsetzen am Dateiende)
+
+    Returns:
+        pd.Series: float64, NaN bei Status != 2 oder ohne bekannte Solltiefe
+    """
+    bb = pd.to_numeric(df["Solltiefe_BB"], errors="coerce")
+    sb = pd.to_numeric(df["Solltiefe_SB"], errors="coerce")
+    soll_raw = bb.mask(bb == 999).combine_first(sb.mask(sb == 999))
+
+    soll = soll_raw[df["Status"] == 2].ffill()
+    if uebertrag is not None:
+        soll = soll.fillna(uebertrag)
+    return soll.reindex(df.index).astype("float64")
+
+
+def berechne_solltiefe(df, toleranz_oben, toleranz_unten, uebertrag=None):
     df = df.copy()
     df = df.sort_values(by="timestamp").reset_index(drop=True)
     df["Solltiefe_BB"] = pd.to_numeric(df["Solltiefe_BB"], errors="coerce")
@@ -15,15 +36,24 @@ def berechne_solltiefe(df, toleranz_oben, toleranz_unten):
     df.loc[df["Solltiefe_BB"] == 999, "Solltiefe_BB"] = None
     df.loc[df["Solltiefe_SB"] == 999, "Solltiefe_SB"] = None
 
-    soll_raw = df["Solltiefe_BB"].combine_first(df["Solltiefe_SB"])
-
-    df["Solltiefe"] = None
-    df.loc[df["Status"] == 2, "Solltiefe"] = soll_raw[df["Status"] == 2].ffill()
+    # uebertrag: letzte Solltiefe eines vorherigen Abschnitts (für das Fortsetzen am Dateiende)
+    df["Solltiefe"] = solltiefe_spalte(df, uebertrag)
 
-    # Toleranzwerte berechnen – NUR wenn Solltiefe vorhanden
+    # Toleranzwerte berechnen – NUR wenn Solltiefe vorhanden (sonst NaN)
     df["Solltiefe_Oben"] = df["Solltiefe"] + toleranz_oben
     df["Solltiefe_Unten"] = df["Solltiefe"] - toleranz_unten
 
-    df.loc[df["Status"] != 2, ["Solltiefe", "Solltiefe_Oben", "Solltiefe_Unten"]] = None
-
     return df
+
+
+#=== Solltiefe nur für neu angehängte Zeilen berechnen ===========================================================
+# ⤷ Der bisherige Abschnitt muss bereits mit berechne_solltiefe (gleiche Toleranzen) berechnet sein
+# ⤷ Die neuen Zeilen laufen durch berechne_solltiefe(..., uebertrag=letzte_solltiefe(bisher)), siehe modul_mona_tail.py
+
+def letzte_solltiefe(df):
+    # Solltiefe der letzten Zeile mit Status == 2 (Startwert für das ffill des nächsten Abschnitts)
+    soll = df.loc[df["Status"] == 2, "Solltiefe"]
+    if soll.empty or pd.isna(soll.iloc[-1]):
+        return None
+    return soll.iloc[-1]
+
@@ -0,0 +1,186 @@
+# track_lod.py
+
+import numpy as np
+
+
+#=== Detailstufen (Level of Detail) der Fahrspuren für die Karte ==================================================
+# ⤷ Douglas–Peucker im metrischen Koordinatensystem (RW/HW), je Spur (Schiff, BB, SB) und Lückensegment
+# ⤷ Einmal je Datensatz wird für jeden Punkt seine "Signifikanz" berechnet: die Toleranz (m), bis zu der
+#   Douglas–Peucker den Punkt behält → jede Detailstufe ist danach nur noch ein Vergleich (signifikanz > toleranz)
+# ⤷ Die Karte wählt die feinste Stufe, die ins Punktbudget passt; Tabellen und Exporte bleiben in voller Auflösung
+
+LOD_SPUREN = {
+    # Spur → (Status, Rechtswert, Hochwert)
+    "Schiff": (1, "RW_Schiff", "HW_Schiff"),
+    "BB": (2, "RW_BB", "HW_BB"),
+    "SB": (2, "RW_SB", "HW_SB"),
+}
+LOD_TOLERANZEN_M = [0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 25.0, 50.0, 100.0]
+KARTE_PUNKTBUDGET = 30_000
+MAX_LUECKE_S = 120  # wie split_by_gap in der Karte (2 Minuten)
+
+
+def signifikanz(x, y, segment_start):
+    """
+    Berechnet die Douglas–Peucker-Signifikanz aller Punkte einer Spur.
+
+    Alle offenen Teilstrecken einer Rekursionsebene werden gemeinsam mit NumPy bearbeitet,
+    die Python-Schleife läuft also nur über die Tiefe der Rekursion.
+
+    Args:
+        x, y (np.ndarray): Metrische Koordinaten (ohne NaN), zeitlich sortiert
+        segment_start (np.ndarray): bool, True am ersten Punkt jedes Lückensegments
+
+    Returns:
+        np.ndarray: Toleranz in m, bis zu der der Punkt erhalten bleibt (Segmentenden = inf,
+                    unterhalb der feinsten Stufe LOD_TOLERANZEN_M[0] ggf. 0)
+    """
+    n = len(x)
+    sig = np.zeros(n, dtype="float64")
+    if n == 0:
+        return sig
+
+    anfaenge = np.flatnonzero(segment_start)
+    if len(anfaenge) == 0 or anfaenge[0] != 0:
+        anfaenge = np.r_[0, anfaenge]
+    enden = np.r_[anfaenge[1:] - 1, n - 1]
+    sig[anfaenge] = np.inf
+    sig[enden] = np.inf
+
+    # Offene Teilstrecken: Start, Ende (inklusive) und Signifikanz des teilenden Punktes darüber
+    s, e = anfaenge, enden
+    oben = np.full(len(s), np.inf)
+    while True:
+        offen = e - s > 1
+        s, e, oben = s[offen], e[offen], oben[offen]
+        if len(s) == 0:
+            break
+
+        # Alle inneren Punkte aller Teilstrecken hintereinander
+        laengen = e - s - 1
+        versatz = np.r_[0, np.cumsum(laengen)[:-1]]
+        strecke = np.repeat(np.arange(len(s)), laengen)
+        idx = np.arange(laengen.sum()) - versatz[strecke] + s[strecke] + 1
+
+        # Abstand zur Sehne (Strecke Start–Ende, bei gleichem Start/Ende Abstand zum Punkt)
+        x0, y0 = x[s][strecke], y[s][strecke]
+        dx, dy = (x[e] - x[s])[strecke], (y[e] - y[s])[strecke]
+        px, py = x[idx] - x0, y[idx] - y0
+        l2 = dx * dx + dy * dy
+        t = np.clip(np.divide(px * dx + py * dy, l2, out=np.zeros_like(l2), where=l2 > 0), 0.0, 1.0)
+        abstand = np.hypot(px - t * dx, py - t * dy)
+
+        # Je Teilstrecke den ersten Punkt mit dem größten Abstand teilen
+        d_max = np.maximum.reduceat(abstand, versatz)
+        treffer = np.flatnonzero(abstand == d_max[strecke])
+        _, erster = np.unique(strecke[treffer], return_index=True)
+        teiler = idx[treffer[erster]]
+
+        # Monoton nach unten: ein Punkt bleibt nur, solange auch seine Teilstrecke geteilt wird
+        sig[teiler] = np.minimum(d_max, oben)
+
+        # Unterhalb der feinsten Stufe nicht weiter teilen (z. B. Stillstand mit identischen Positionen)
+        weiter = d_max > LOD_TOLERANZEN_M[0]
+        s, e, teiler = s[weiter], e[weiter], teiler[weiter]
+        s, e, oben = np.r_[s, teiler], np.r_[teiler, e], np.r_[sig[teiler], sig[teiler]]
+
+    return sig
+
+
+def _letzter_punkt(df, status, rw, hw):
+    # Position des letzten gültigen Punkts einer Spur, von hinten in wachsenden Blöcken gesucht
+    ende, block = len(df), 256
+    while ende > 0:
+        start = max(0, ende - block)
+        teil = df.iloc[start:ende]
+        treffer = np.flatnonzero(((teil["Status"] == status) & teil[rw].notna() & teil[hw].notna()).to_numpy())
+        if len(treffer):
+            return start + treffer[-1]
+        ende, block = start, block * 4
+    return None
+
+
+def ergaenze_track_lod(df, max_luecke_s=MAX_LUECKE_S, vorher=None):
+    """
+    Ergänzt einmal je Datensatz die Signifikanz-Spalten lod_Schiff, lod_BB und lod_SB.
+
+    Mit vorher (Live-Modus) schließt jede Spur an ihren letzten Punkt im bisherigen Datensatz an: berechnet
+    werden nur die Zeilen von df, die Werte in vorher bleiben unverändert. Der Anschlusspunkt war dort
+    Segmentende und bleibt es, er ist also in jeder Detailstufe enthalten.
+
+    Args:
+        df (pd.DataFrame): MoNa-Daten mit normalisierten Rechtswerten und Status
+        max_luecke_s (int): Zeitlücke (s), ab der eine Spur in ein neues Segment beginnt
+        vorher (pd.DataFrame, optional): bisheriger, zeitlich davor liegender Datensatz
+
+    Returns:
+        pd.DataFrame: flache Kopie mit lod_* (NaN = Punkt gehört nicht zur Spur)
+    """
+    df = df.copy(deep=False)
+    zeit = df["timestamp"].to_numpy()
+    for name, (status, rw, hw) in LOD_SPUREN.items():
+        x = df[rw].to_numpy(dtype="float64", na_value=np.nan)
+        y = df[hw].to_numpy(dtype="float64", na_value=np.nan)
+        zeilen = np.flatnonzero((df["Status"] == status).to_numpy() & ~np.isnan(x) & ~np.isnan(y))
+        zeilen = zeilen[np.argsort(zeit[zeilen], kind="stable")]
+        zx, zy, zt = x[zeilen], y[zeilen], zeit[zeilen]
+
+        anker = _letzter_punkt(vorher, status, rw, hw) if vorher is not None else None
+        if anker is not None:
+            zx = np.r_[vorher[rw].iloc[anker], zx]
+            zy = np.r_[vorher[hw].iloc[anker], zy]
+            zt = np.r_[vorher["timestamp"].to_numpy()[anker:anker + 1], zt]
+
+        luecke = np.diff(zt) > np.timedelta64(max_luecke_s, "s")
+        segment_start = np.r_[True, luecke] if len(zt) else np.zeros(0, dtype=bool)
+
+        lod = np.full(len(df), np.nan)
+        sig = signifikanz(zx.astype("float64"), zy.astype("float64"), segment_start)
+        lod[zeilen] = sig[1:] if anker is not None else sig
+        df[f"lod_{name}"] = lod
+    return df
+
+
+def waehle_toleranz(signifikanzen, punktbudget=KARTE_PUNKTBUDGET):
+    """
+    Wählt die feinste Detailstufe, bei der alle Spuren zusammen ins Punktbudget passen.
+
+    Args:
+        signifikanzen (list): Signifikanz-Arrays der darzustellenden Spuren
+        punktbudget (int): maximale Anzahl Punkte auf der Karte
+
+    Returns:
+        float | None: Toleranz in m (None = volle Auflösung)
+    """
+    if sum(len(s) for s in signifikanzen) <= punktbudget:
+        return None
+    for toleranz in LOD_TOLERANZEN_M:
+        if sum(int(np.count_nonzero(s > toleranz)) for s in signifikanzen) <= punktbudget:
+            return toleranz
+    return LOD_TOLERANZEN_M[-1]
+
+
+def lod_maske(signifikanz_werte, toleranz, segment=None):
+    """
+    Maske der Punkte, die bei der gewählten Toleranz dargestellt werden.
+
+    Args:
+        signifikanz_werte (array-like): lod_*-Werte der (gefilterten) Spur
+        toleranz (float | None): Ergebnis von waehle_toleranz
+        segment (array-like, optional): Segmentnummer je Punkt – Anfang und Ende jedes Segments
+                                        bleiben erhalten (ohne Segmente: erster und letzter Punkt)
+
+    Returns:
+        np.ndarray: bool-Maske
+    """
+    sig = np.asarray(signifikanz_werte, dtype="float64")
+    if toleranz is None:
+        return np.ones(len(sig), dtype=bool)
+    maske = sig > toleranz
+    if len(sig):
+        # Nach dem Zeit-/Feldfilter liegen die Enden der gespeicherten Segmente evtl. außerhalb
+        segment = np.zeros(len(sig)) if segment is None else np.asarray(segment)
+        wechsel = segment[1:] != segment[:-1]
+        maske[np.r_[True, wechsel]] = True
+        maske[np.r_[wechsel, True]] = True
+    return maske
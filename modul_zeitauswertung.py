@@ -0,0 +1,358 @@
+# zeitauswertung.py
+
+import io
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+
+#=== Zeit-Auswertung ohne Streamlit ==============================================================================
+# ⤷ Fehlerprüfung, Fehlerzeiträume und die Tabellen Baggerzeiten / Zusammenfassung / Fehlerzeiträume
+# ⤷ Genutzt vom Dashboard (Reiter "Zeit-Auswertung") und von der Batch-Auswertung (WI-MoNa_Batch.py)
+# ⤷ Jeder Datenpunkt steht für 10 Sekunden Baggerzeit
+
+SEKUNDEN_PRO_ZEILE = 10
+FEHLERGRUENDE = ["Position", "Obere Toleranz", "Untere Toleranz", "Geschwindigkeit"]
+
+# Dateinamen der Excel-Berichte (wie die Downloads im Dashboard)
+BERICHTE = {
+    "baggerzeiten": "baggerzeiten.xlsx",
+    "zusammenfassung": "fehler_zusammenfassung.xlsx",
+    "fehlerzeitraeume": "fehlerzeitraeume.xlsx",
+}
+
+
+#=== Zeitformate =================================================================================================
+
+def to_hhmmss(td):
+    try:
+        if pd.isnull(td):
+            return "-"
+        total_seconds = int(td.total_seconds())
+        hours, remainder = divmod(total_seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        return f"{hours:02}:{minutes:02}:{seconds:02}"
+    except Exception:
+        return "-"
+
+def to_dezimalstunden(td):
+    try:
+        if pd.isnull(td):
+            return "-"
+        return round(td.total_seconds() / 3600, 3)
+    except:
+        return "-"
+
+def formatierer(anzeigeformat):
+    # "Dezimalstunden" oder "hh:mm:ss"
+    return to_dezimalstunden if anzeigeformat == "Dezimalstunden" else to_hhmmss
+
+
+def schreibe_excel(df, ziel):
+    """
+    Schreibt eine Tabelle als Excel-Datei (Blatt "Daten").
+
+    Args:
+        df (pd.DataFrame): Tabelle
+        ziel (str | file-like): Dateipfad oder Puffer (z. B. io.BytesIO für Downloads)
+    """
+    with pd.ExcelWriter(ziel, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False, sheet_name='Daten')
+
+
+def excel_bytes(df):
+    output = io.BytesIO()
+    schreibe_excel(df, output)
+    return output.getvalue()
+
+
+#=== Fehlerlogik – ein Datenpunkt kann nur "einmal" fehlerhaft sein ==============================================
+# ⤷ Je Bedingung eine boolesche Maske über die ganze Spalte, der erste Treffer in der Reihenfolge von
+#   FEHLERGRUENDE (Position > Obere > Untere > Geschwindigkeit) bestimmt den Fehlgrund
+
+FEHLERCODE_GUELTIG = 0  # Fehlercodes 1..4 = Position in FEHLERGRUENDE + 1
+
+
+def fehlercodes(df, position_ausserhalb_aktiv, obere_toleranz_aktiv, untere_toleranz_aktiv,
+                geschwindigkeit_aktiv, toleranz_oben, toleranz_unten, max_geschwindigkeit):
+    """
+    Ermittelt für jeden Datenpunkt den Fehlgrund als kompakten Code.
+
+    "Position": Mit Feldzuordnung (Spalte ausserhalb_feld, modul_feldzuordnung.py) liegt BB oder SB
+    geometrisch außerhalb aller Baggerfelder, sonst fehlt Solltiefe_BB oder Solltiefe_SB im Datensatz.
+
+    Returns:
+        np.ndarray: int8 je Zeile (0 = kein Fehler, sonst Index in FEHLERGRUENDE + 1)
+    """
+    status_2 = (df["Status"] == 2).to_numpy()
+    tiefe = pd.to_numeric(df["Abs_Balkentiefe"], errors="coerce").to_numpy(dtype=float)
+    soll = pd.to_numeric(df["Solltiefe"], errors="coerce").to_numpy(dtype=float)
+    geschwindigkeit = pd.to_numeric(df["Geschwindigkeit"], errors="coerce").to_numpy(dtype=float)
+
+    if "ausserhalb_feld" in df.columns:
+        ausserhalb = df["ausserhalb_feld"].to_numpy(dtype=bool)
+    else:
+        ausserhalb = (df["Solltiefe_BB"].isna() | df["Solltiefe_SB"].isna()).to_numpy()
+
+    # Vergleiche mit NaN sind False → fehlende Tiefe/Solltiefe löst keine Toleranzverletzung aus
+    bedingungen = [
+        position_ausserhalb_aktiv & status_2 & ausserhalb,
+        obere_toleranz_aktiv & (tiefe > soll + toleranz_oben),
+        untere_toleranz_aktiv & (tiefe < soll - toleranz_unten),
+        geschwindigkeit_aktiv & status_2 & ~(geschwindigkeit <= max_geschwindigkeit),  # NaN zählt als Fehler
+    ]
+    return np.select(bedingungen, np.arange(1, len(FEHLERGRUENDE) + 1), FEHLERCODE_GUELTIG).astype(np.int8)
+
+
+def klassifiziere_fehler(df_filtered, position_ausserhalb_aktiv, obere_toleranz_aktiv, untere_toleranz_aktiv,
+                         geschwindigkeit_aktiv, toleranz_oben, toleranz_unten, max_geschwindigkeit):
+    """
+    Prüft alle Datenpunkte auf die aktiven Fehlerbedingungen.
+
+    Returns:
+        tuple: (df_fehler mit timestamp, Baggernummer, Baggerfeld und Fehlgrund (Kategorie) je
+                fehlerhaftem Datenpunkt,
+                df_gueltig = fehlerfreie Datenpunkte mit Status == 2)
+    """
+    codes = fehlercodes(
+        df_filtered, position_ausserhalb_aktiv, obere_toleranz_aktiv, untere_toleranz_aktiv,
+        geschwindigkeit_aktiv, toleranz_oben, toleranz_unten, max_geschwindigkeit
+    )
+    fehlerhaft = codes != FEHLERCODE_GUELTIG
+
+    df_fehler = df_filtered.loc[fehlerhaft, ["timestamp", "Baggernummer", "Baggerfeld"]]
+    df_fehler["Fehlgrund"] = pd.Categorical.from_codes(codes[fehlerhaft] - 1, FEHLERGRUENDE)
+
+    df_gueltig = df_filtered[~fehlerhaft & (df_filtered["Status"] == 2).to_numpy()]
+    return df_fehler, df_gueltig
+
+
+#=== Fehlerzeiträume (Run-Length-Gruppierung) ====================================================================
+# ⤷ Aufeinanderfolgende Fehler eines Schiffs mit gleichem Fehlgrund und Baggerfeld, höchstens MAX_LUECKE_S
+#   auseinander, bilden einen Fehlerzeitraum – berechnet über Array-Vergleiche mit dem jeweiligen Vorgänger
+# ⤷ Je Schiff getrennt (nach Baggernummer, dann Zeit sortiert): zeitlich verschränkte Daten mehrerer Schiffe
+#   verschmelzen oder unterbrechen sich nicht gegenseitig
+
+MAX_LUECKE_S = 15
+
+
+def laufzeiten(zeitstempel, *schluessel, max_luecke_s=MAX_LUECKE_S, sekunden_pro_zeile=SEKUNDEN_PRO_ZEILE):
+    """
+    Fasst zeitlich sortierte Datenpunkte zu Läufen mit gleichen Schlüsseln zusammen.
+
+    Ein neuer Lauf beginnt, wenn sich einer der Schlüssel gegenüber dem Vorgänger ändert
+    oder der Abstand zum Vorgänger größer als max_luecke_s ist.
+
+    Args:
+        zeitstempel (np.ndarray): Sortierte Zeitstempel (datetime64)
+        *schluessel (np.ndarray): Ganzzahlige Codes gleicher Länge (z. B. Baggerfeld, Fehlgrund, Schiff)
+        max_luecke_s (float): Größter Abstand in Sekunden innerhalb eines Laufs
+        sekunden_pro_zeile (int): Dauer eines Datenpunkts
+
+    Returns:
+        tuple: (erste, letzte, anzahl, dauer) – Index des ersten/letzten Datenpunkts je Lauf,
+               Anzahl Datenpunkte und Dauer (timedelta64) je Lauf
+    """
+    zeit = np.asarray(zeitstempel, dtype="datetime64[ns]").view("int64")
+    n = len(zeit)
+
+    neu = np.ones(n, dtype=bool)
+    if n > 1:
+        neu[1:] = np.diff(zeit) > int(max_luecke_s * 1_000_000_000)
+        for codes in schluessel:
+            codes = np.asarray(codes)
+            neu[1:] |= codes[1:] != codes[:-1]
+
+    erste = np.flatnonzero(neu)
+    letzte = np.append(erste[1:], n) - 1
+    anzahl = letzte - erste + 1
+    dauer = (anzahl * sekunden_pro_zeile).astype("timedelta64[s]")
+    return erste, letzte, anzahl, dauer
+
+
+def gruppiere_fehlerzeitraeume(df_fehler, max_luecke_s=MAX_LUECKE_S):
+    """
+    Fasst fehlerhafte Datenpunkte zu Fehlerzeiträumen zusammen.
+
+    Args:
+        df_fehler (pd.DataFrame): timestamp, Baggernummer, Baggerfeld, Fehlgrund (aus klassifiziere_fehler)
+        max_luecke_s (float): Größter Abstand zwischen zwei Fehlern eines Zeitraums
+
+    Returns:
+        pd.DataFrame: Baggerfeld, Startzeit, Endzeit, Dauer_raw (timedelta, Formatierung bei der Anzeige),
+                      Anzahl, Fehlgrund – nach Startzeit sortiert
+    """
+    if df_fehler.empty:
+        return pd.DataFrame()
+
+    df_fehler = df_fehler.sort_values(by=["Baggernummer", "timestamp"], kind="stable")
+    zeit = df_fehler["timestamp"].to_numpy()
+    erste, letzte, anzahl, dauer = laufzeiten(
+        zeit,
+        pd.factorize(df_fehler["Baggernummer"])[0],
+        pd.factorize(df_fehler["Baggerfeld"])[0],
+        pd.factorize(df_fehler["Fehlgrund"])[0],
+        max_luecke_s=max_luecke_s,
+    )
+    df_gruppen = pd.DataFrame({
+        "Baggerfeld": df_fehler["Baggerfeld"].array.take(erste),
+        "Startzeit": zeit[erste],
+        "Endzeit": zeit[letzte],
+        "Dauer_raw": pd.to_timedelta(dauer),
+        "Anzahl": anzahl,
+        "Fehlgrund": df_fehler["Fehlgrund"].array.take(erste),
+    })
+    return df_gruppen.sort_values(by="Startzeit", kind="stable", ignore_index=True)
+
+
+#=== Tabellen der Zeit-Auswertung ================================================================================
+
+def baggerzeiten_tabelle(df_gueltig, df_fehler, formatiere):
+    """
+    Baggerzeiten je Baggerfeld inkl. Fehleranzahl und Summenzeile.
+
+    Args:
+        df_gueltig (pd.DataFrame): Gültige Datenpunkte (aus klassifiziere_fehler)
+        df_fehler (pd.DataFrame): Fehlerhafte Datenpunkte mit Baggerfeld und Fehlgrund (aus klassifiziere_fehler)
+        formatiere (callable): to_hhmmss oder to_dezimalstunden
+
+    Returns:
+        tuple: (Tabelle mit Summenzeile oder None, summen als dict für die Zusammenfassung)
+    """
+    # Summen: Gesamtdauer aus den gültigen Zeilen, verworfen = Anzahl Fehler * 10 Sek
+    verworfen = timedelta(seconds=len(df_fehler) * SEKUNDEN_PRO_ZEILE)
+    gesamt_zeit = timedelta(seconds=len(df_gueltig) * SEKUNDEN_PRO_ZEILE)
+    summen = {
+        "Gesamtdauer": formatiere(gesamt_zeit),
+        "Dauer korrigiert": formatiere(gesamt_zeit - verworfen),
+        "Zeitverlust": formatiere(verworfen),
+    }
+    if df_gueltig.empty:
+        return None, summen
+
+    zeitraum = df_gueltig.groupby("Baggerfeld", observed=True)["timestamp"].agg(["min", "max", "size"])
+
+    # Fehler je Baggerfeld und Fehlgrund, ausgerichtet auf die Baggerfelder mit gültigen Zeilen
+    fehler_matrix = (
+        df_fehler.groupby(["Baggerfeld", "Fehlgrund"], observed=True).size()
+        .unstack(fill_value=0)
+        .reindex(index=zeitraum.index, columns=FEHLERGRUENDE, fill_value=0)
+    )
+    anzahl = fehler_matrix.sum(axis=1)
+
+    delta = pd.to_timedelta(zeitraum["size"] * SEKUNDEN_PRO_ZEILE, unit="s")
+    delta_verworfen = pd.to_timedelta(anzahl * SEKUNDEN_PRO_ZEILE, unit="s")
+
+    result = pd.DataFrame({
+        "Baggerfeld": zeitraum.index.astype(str),
+        "Beginn": zeitraum["min"].to_numpy(),
+        "Ende": zeitraum["max"].to_numpy(),
+        "Gesamtdauer": delta.map(formatiere).to_numpy(),
+        "Dauer korrigiert": (delta - delta_verworfen).map(formatiere).to_numpy(),
+        "Zeitverlust": delta_verworfen.map(formatiere).to_numpy(),
+        "Anzahl": anzahl.to_numpy(),
+        **{feld: fehler_matrix[feld].to_numpy() for feld in FEHLERGRUENDE},
+    })
+
+    # Zahlenspalten summieren, Dummy-Felder
+    summen["Anzahl"] = result["Anzahl"].sum()
+    for feld in FEHLERGRUENDE:
+        summen[feld] = result[feld].sum()
+    summen["Baggerfeld"] = "Σ"
+    summen["Beginn"] = "-"
+    summen["Ende"] = "-"
+
+    summenzeile = pd.DataFrame([summen])[result.columns]
+    return pd.concat([result, summenzeile], ignore_index=True), summen
+
+
+def zeit_summen_tabelle(summen):
+    # Gesamtdauer, Dauer korrigiert und Zeitverlust untereinander
+    return pd.DataFrame([
+        {"Kategorie": kategorie, "Zeit": summen[kategorie]}
+        for kategorie in ["Gesamtdauer", "Dauer korrigiert", "Zeitverlust"]
+    ])
+
+
+def fehler_zusammenfassung_tabelle(df_fehler, formatiere):
+    """
+    Anzahl und Zeitverlust je Fehlerbedingung inkl. Gesamtzeile.
+
+    Returns:
+        pd.DataFrame | None: None, wenn keine Fehler gefunden wurden
+    """
+    if df_fehler.empty:
+        return None
+
+    # als Text zählen, damit nur vorkommende Fehlgründe (nach Häufigkeit) erscheinen
+    fehler_counts = (
+        df_fehler["Fehlgrund"].astype(str).value_counts().rename_axis("Fehlerbedingung").reset_index(name="Anzahl")
+    )
+    fehler_counts["Zeitverlust"] = fehler_counts["Anzahl"].apply(
+        lambda x: formatiere(timedelta(seconds=x * SEKUNDEN_PRO_ZEILE))
+    )
+
+    total_seconds = fehler_counts["Anzahl"].sum() * SEKUNDEN_PRO_ZEILE
+    gesamt = pd.DataFrame([{
+        "Fehlerbedingung": "Gesamt",
+        "Anzahl": fehler_counts["Anzahl"].sum(),
+        "Zeitverlust": formatiere(timedelta(seconds=int(total_seconds)))
+    }])
+    return pd.concat([fehler_counts, gesamt], ignore_index=True)
+
+
+def fehlerzeitraeume_tabelle(df_gruppen, formatiere):
+    """
+    Zusammengefasste Fehlerzeiträume mit formatierter Dauer und Summenzeile.
+
+    Returns:
+        pd.DataFrame | None: None, wenn keine Fehlerzeiträume vorhanden sind
+    """
+    if df_gruppen.empty:
+        return None
+
+    df_gruppen = df_gruppen.copy()
+    df_gruppen.insert(4, "Dauer", df_gruppen["Dauer_raw"].apply(formatiere))
+
+    summenzeile = pd.DataFrame([{
+        "Baggerfeld": "Σ",
+        "Startzeit": "-",
+        "Endzeit": "-",
+        "Dauer": formatiere(df_gruppen["Dauer_raw"].sum()),
+        "Anzahl": df_gruppen["Anzahl"].sum(),
+        "Fehlgrund": "-"
+    }])
+    return pd.concat([df_gruppen.drop(columns=["Dauer_raw"]), summenzeile], ignore_index=True)
+
+
+#=== Gesamte Zeit-Auswertung eines (gefilterten) Datensatzes =====================================================
+
+def werte_zeit_aus(df, toleranz_oben=1.0, toleranz_unten=0.5, max_geschwindigkeit=3.0,
+                   position_ausserhalb_aktiv=True, obere_toleranz_aktiv=True, untere_toleranz_aktiv=True,
+                   geschwindigkeit_aktiv=True, anzeigeformat="Dezimalstunden"):
+    """
+    Führt die komplette Zeit-Auswertung durch (wie Reiter "Zeit-Auswertung" mit Standardeinstellungen).
+
+    Args:
+        df (pd.DataFrame): Datenpunkte mit Solltiefe (berechne_solltiefe)
+        toleranz_oben, toleranz_unten (float): Toleranzen zur Solltiefe (m)
+        max_geschwindigkeit (float): Maximale Geschwindigkeit (kn)
+        *_aktiv (bool): Aktive Fehlerbedingungen
+        anzeigeformat (str): "Dezimalstunden" oder "hh:mm:ss"
+
+    Returns:
+        dict: Tabellen "baggerzeiten", "zeit_summen", "zusammenfassung", "fehlerzeitraeume" (None = keine Daten)
+    """
+    formatiere = formatierer(anzeigeformat)
+    df_fehler, df_gueltig = klassifiziere_fehler(
+        df, position_ausserhalb_aktiv, obere_toleranz_aktiv, untere_toleranz_aktiv,
+        geschwindigkeit_aktiv, toleranz_oben, toleranz_unten, max_geschwindigkeit
+    )
+    baggerzeiten, summen = baggerzeiten_tabelle(df_gueltig, df_fehler, formatiere)
+    return {
+        "baggerzeiten": baggerzeiten,
+        "zeit_summen": zeit_summen_tabelle(summen),
+        "zusammenfassung": fehler_zusammenfassung_tabelle(df_fehler, formatiere),
+        "fehlerzeitraeume": fehlerzeitraeume_tabelle(gruppiere_fehlerzeitraeume(df_fehler), formatiere),
+    }
@@ -0,0 +1,153 @@
+# zeitpyramide.py
+
+import numpy as np
+import pandas as pd
+
+from modul_abgeleitete_spalten import DIAGRAMM_KANAELE, diagramm_spalte
+
+
+#=== Zeitpyramide (Min/Max/Mittel/Anzahl je Zeitintervall) für das Zeitdiagramm ===================================
+# ⤷ Einmal je Datensatz: je Kanal und Schiff Kennwerte in Intervallen von 10 s, 1 min, 10 min und 1 h
+#   (jede Stufe wird aus der nächstfeineren zusammengefasst, nur die 10-s-Stufe liest die Rohdaten)
+# ⤷ Für ein Zeitfenster wählt das Diagramm die feinste Stufe, die ins Punktbudget passt – ein Wochenfenster
+#   kostet dann nur noch einige tausend Intervalle statt aller Datenpunkte
+# ⤷ Min und Max sind echte Messwerte, der Tooltip zeigt also weiterhin Originalwerte
+# ⤷ Gebaut beim Import, im Live-Modus nur um die neuen Zeilen erweitert (erweitere_zeitpyramide)
+
+PYRAMIDE_STUFEN_S = [10, 60, 600, 3600]
+PYRAMIDE_SPALTEN = [diagramm_spalte(kanal) for kanal in DIAGRAMM_KANAELE] + ["Solltiefe"]
+STUFEN_NAMEN = {10: "10 s", 60: "1 min", 600: "10 min", 3600: "1 h"}
+
+
+def _zusammenfassen(kennwerte, gruppen):
+    # Kennwerte (Spalte, min/max/mean/count) nach neuen Gruppen zusammenfassen, Mittel gewichtet mit der Anzahl
+    anzahl = kennwerte.xs("count", axis=1, level=1)
+    summe = kennwerte.xs("mean", axis=1, level=1).fillna(0) * anzahl
+    g_anzahl = anzahl.groupby(gruppen, observed=True, sort=True).sum()
+    teile = {
+        "min": kennwerte.xs("min", axis=1, level=1).groupby(gruppen, observed=True, sort=True).min(),
+        "max": kennwerte.xs("max", axis=1, level=1).groupby(gruppen, observed=True, sort=True).max(),
+        "mean": summe.groupby(gruppen, observed=True, sort=True).sum() / g_anzahl.where(g_anzahl > 0),
+        "count": g_anzahl,
+    }
+    return pd.concat(teile, axis=1).swaplevel(axis=1)[kennwerte.columns]
+
+
+def baue_zeitpyramide(df):
+    """
+    Berechnet die Zeitpyramide eines Datensatzes.
+
+    Args:
+        df (pd.DataFrame): Datensatz mit timestamp, Baggernummer, Solltiefe und bereinigten Kanälen
+                           (modul_abgeleitete_spalten.py)
+
+    Returns:
+        dict: Stufe (s) → {"schiffe": Kennwerte je (Intervall, Baggernummer), "gesamt": Kennwerte je Intervall};
+              Intervall = Beginn in ns, Spalten (Spalte, "min"/"max"/"mean"/"count"), zeitlich sortiert
+    """
+    zeit = df["timestamp"].to_numpy(dtype="datetime64[ns]").view("int64")
+    werte = pd.DataFrame({spalte: df[spalte].to_numpy(dtype="float64", na_value=np.nan) for spalte in PYRAMIDE_SPALTEN})
+
+    pyramide = {}
+    schiffe = None
+    for stufe in PYRAMIDE_STUFEN_S:
+        breite = stufe * 1_000_000_000
+        if schiffe is None:
+            gruppen = [zeit // breite * breite, df["Baggernummer"].to_numpy()]
+            schiffe = werte.groupby(gruppen, observed=True, sort=True).agg(["min", "max", "mean", "count"])
+        else:
+            intervall = schiffe.index.get_level_values("intervall") // breite * breite
+            schiffe = _zusammenfassen(schiffe, [intervall, schiffe.index.get_level_values("Baggernummer")])
+        schiffe.index.names = ["intervall", "Baggernummer"]
+        gesamt = _zusammenfassen(schiffe, schiffe.index.get_level_values("intervall"))
+        pyramide[stufe] = {"schiffe": schiffe, "gesamt": gesamt}
+    return pyramide
+
+
+def _anhaengen(alt, neu):
+    # Intervalle, die alt und neu gemeinsam haben (nur am Ende von alt), zusammenfassen, den Rest anhängen
+    erstes = neu.index.get_level_values("intervall")[0]
+    ab = np.searchsorted(alt.index.get_level_values("intervall"), erstes, "left")
+    ueberlappung = pd.concat([alt.iloc[ab:], neu])
+    ebenen = [ueberlappung.index.get_level_values(i) for i in range(ueberlappung.index.nlevels)]
+    zusammen = _zusammenfassen(ueberlappung, ebenen if len(ebenen) > 1 else ebenen[0])
+    zusammen.index.names = alt.index.names
+    return pd.concat([alt.iloc[:ab], zusammen])
+
+
+def erweitere_zeitpyramide(pyramide, df_neu):
+    """
+    Erweitert die Zeitpyramide um neue Zeilen, die nicht vor dem bisherigen Ende liegen (Live-Modus).
+
+    Nur die Intervalle am bisherigen Ende werden mit den neuen zusammengefasst, alle anderen bleiben unverändert.
+
+    Args:
+        pyramide (dict): Ergebnis von baue_zeitpyramide (wird nicht verändert)
+        df_neu (pd.DataFrame): neue Zeilen mit denselben Spalten wie für baue_zeitpyramide
+
+    Returns:
+        dict: Zeitpyramide des gesamten Datensatzes
+    """
+    if df_neu.empty:
+        return pyramide
+    neu = baue_zeitpyramide(df_neu)
+    return {
+        stufe: {teil: _anhaengen(pyramide[stufe][teil], neu[stufe][teil]) for teil in ("schiffe", "gesamt")}
+        for stufe in PYRAMIDE_STUFEN_S
+    }
+
+
+def _fenster(gesamt, stufe, von, bis):
+    # Intervalle, die das Zeitfenster berühren (Beginn zwischen abgerundetem "von" und "bis")
+    breite = stufe * 1_000_000_000
+    start = pd.Timestamp(von).as_unit("ns").value // breite * breite
+    ende = pd.Timestamp(bis).as_unit("ns").value
+    intervalle = gesamt.index.to_numpy()
+    return gesamt.iloc[np.searchsorted(intervalle, start, "left"):np.searchsorted(intervalle, ende, "right")]
+
+
+def waehle_stufe(pyramide, von, bis, punktbudget):
+    """
+    Wählt die feinste Stufe, deren Intervalle im Zeitfenster ins Punktbudget passen (2 Punkte je Intervall).
+
+    Returns:
+        int: Stufe in s (passt keine, die gröbste)
+    """
+    for stufe in PYRAMIDE_STUFEN_S:
+        if 2 * len(_fenster(pyramide[stufe]["gesamt"], stufe, von, bis)) <= punktbudget:
+            return stufe
+    return PYRAMIDE_STUFEN_S[-1]
+
+
+def zeitreihe_aus_pyramide(pyramide, stufe, df, von, bis, toleranz_oben, toleranz_unten):
+    """
+    Baut für das Zeitdiagramm eine verdichtete Zeitreihe: je Intervall eine Zeile mit den Minima (am Beginn)
+    und eine mit den Maxima (in der Mitte) aller Kanäle. Intervalle am Rand können Werte knapp außerhalb des
+    Fensters enthalten.
+
+    Hätte die Stufe im Fenster nicht weniger Zeilen als der gefilterte Datensatz (z. B. dünn besetzte Daten),
+    bleibt es beim Datensatz – das Diagramm dünnt ihn dann selbst aus (reduziere_zeitreihe).
+
+    Args:
+        df (pd.DataFrame): gefilterter Datensatz des Zeitfensters
+
+    Returns:
+        pd.DataFrame: Spalten wie der Datensatz (timestamp, bereinigte Kanäle, Solltiefe, Solltiefe_Oben/Unten),
+                      attrs["pyramide_stufe_s"] = Stufe; oder df unverändert
+    """
+    fenster = _fenster(pyramide[stufe]["gesamt"], stufe, von, bis)
+    if 2 * len(fenster) >= len(df):
+        return df
+    beginn = fenster.index.to_numpy(dtype="int64")
+    zeit = np.column_stack([beginn, beginn + stufe * 500_000_000]).ravel()
+
+    daten = {"timestamp": pd.to_datetime(zeit)}
+    for spalte in PYRAMIDE_SPALTEN:
+        daten[spalte] = np.column_stack([
+            fenster[(spalte, "min")].to_numpy(dtype="float64"), fenster[(spalte, "max")].to_numpy(dtype="float64")
+        ]).ravel()
+    df = pd.DataFrame(daten)
+    df["Solltiefe_Oben"] = df["Solltiefe"] + toleranz_oben
+    df["Solltiefe_Unten"] = df["Solltiefe"] - toleranz_unten
+    df.attrs["pyramide_stufe_s"] = stufe
+    return df
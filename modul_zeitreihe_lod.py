@@ -0,0 +1,59 @@
+# zeitreihe_lod.py
+
+import numpy as np
+
+
+#=== Punktreduktion der Kurven im Zeitdiagramm ===================================================================
+# ⤷ Min/Max-Buckets (M4): die Zeitachse wird in gleich breite Buckets geteilt (etwa eine Pixelspalte je Bucket),
+#   je Bucket bleiben erster, letzter, kleinster und größter Wert → Spitzen und Bereich der Normierung bleiben exakt
+# ⤷ Enthält ein Bucket Lücken (NaN), bleibt ein NaN-Punkt erhalten, damit die Linie dort weiterhin unterbrochen ist
+# ⤷ Alles über sortierte Index-Arrays, ohne Schleife über Buckets; Tooltips zeigen die Originalwerte der Punkte
+
+ZEITDIAGRAMM_PUNKTBUDGET = 4_000  # Punkte je Kurve (4 je Bucket → ca. 1000 Pixelspalten)
+WEBGL_AB_PUNKTE = 3_000           # ab dieser Punktzahl je Kurve wird mit WebGL (Scattergl) gezeichnet
+
+
+def reduziere_zeitreihe(zeit, werte, punktbudget=ZEITDIAGRAMM_PUNKTBUDGET):
+    """
+    Wählt die darzustellenden Punkte einer zeitlich sortierten Kurve.
+
+    Args:
+        zeit (array-like): Zeitstempel (datetime64 oder Zahlen), aufsteigend sortiert
+        werte (array-like): Werte der Kurve (NaN = Lücke)
+        punktbudget (int): ungefähre Höchstzahl an Punkten
+
+    Returns:
+        np.ndarray: aufsteigende Positionen der zu zeichnenden Punkte
+    """
+    werte = np.asarray(werte, dtype="float64")
+    n = len(werte)
+    buckets = max(int(punktbudget) // 4, 1)
+    if n <= punktbudget:
+        return np.arange(n)
+
+    t = np.asarray(zeit).astype("int64").astype("float64")
+    spanne = t[-1] - t[0]
+    bucket = np.minimum(((t - t[0]) / spanne * buckets).astype(np.int64), buckets - 1) if spanne > 0 \
+        else np.arange(n) * buckets // n
+
+    gueltig = ~np.isnan(werte)
+    inan = np.flatnonzero(~gueltig)
+    iv = np.flatnonzero(gueltig)
+    bv = bucket[iv]
+
+    # Je Bucket mit Lücke ein NaN-Punkt
+    bn = bucket[inan]
+    luecken = inan[np.r_[True, bn[1:] != bn[:-1]]] if len(inan) else inan
+    if len(iv) == 0:
+        return luecken
+
+    # Erster und letzter gültiger Punkt je Bucket (bv ist aufsteigend)
+    wechsel = bv[1:] != bv[:-1]
+    erste, letzte = iv[np.r_[True, wechsel]], iv[np.r_[wechsel, True]]
+
+    # Kleinster und größter Wert je Bucket: nach (Bucket, Wert) sortieren, Gruppenanfang/-ende nehmen
+    reihenfolge = np.lexsort((werte[iv], bv))
+    wechsel = bv[reihenfolge][1:] != bv[reihenfolge][:-1]
+    minima, maxima = iv[reihenfolge[np.r_[True, wechsel]]], iv[reihenfolge[np.r_[wechsel, True]]]
+
+    return np.unique(np.concatenate([erste, letzte, minima, maxima, luecken]))
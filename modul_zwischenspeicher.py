@@ -0,0 +1,168 @@
+# zwischenspeicher.py
+
+import sys
+import threading
+from collections import Counter, OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+#=== Zwischenspeicher für die Stufen der Streamlit-Pipeline ======================================================
+# ⤷ Jede Stufe (Import, Solltiefe, Filter, Diagramm, ...) wird mit einem expliziten Schlüssel abgelegt
+# ⤷ Schlüssel enthalten nur die echten Eingaben (Datei-Hashes, EPSG, Toleranzen, Zeitbereich, Feldauswahl)
+#   und den Schlüssel der vorherigen Stufe – ein Rerun ohne geänderte Eingaben rechnet nichts neu
+# ⤷ Speicher begrenzt per LRU über Anzahl Einträge und geschätzte Größe in Bytes
+
+MAX_EINTRAEGE = 64
+MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+
+
+PLOTLY_DATEN = ["x", "y", "z", "lat", "lon", "customdata", "text", "hovertext", "locations", "geojson"]
+STICHPROBE = 1000  # Werte je Objekt-Spalte, aus denen die Größe von Python-Objekten hochgerechnet wird
+
+
+def _objekt_groesse(werte):
+    # Python-Objekte (z. B. Texte) aus einer Stichprobe hochrechnen statt jeden Wert einzeln zu messen
+    werte = np.asarray(werte, dtype=object).ravel()
+    if len(werte) == 0:
+        return 0
+    probe = werte[np.linspace(0, len(werte) - 1, min(len(werte), STICHPROBE)).astype(np.int64)]
+    return int(np.mean([sys.getsizeof(v) for v in probe]) * len(werte))
+
+
+def _python_objekte(dtype):
+    # Spalten, deren Werte als einzelne Python-Objekte vorliegen (memory_usage(deep=False) zählt nur Zeiger)
+    return dtype == object or (isinstance(dtype, pd.StringDtype) and dtype.storage == "python")
+
+
+def schaetze_groesse(wert, _tiefe=0):
+    """
+    Grobe Schätzung des Speicherbedarfs eines Stufenergebnisses in Bytes.
+
+    Args:
+        wert: DataFrame, Series, Array, Plotly-Figur oder verschachtelte list/tuple/dict
+
+    Returns:
+        int: Geschätzte Größe
+    """
+    if isinstance(wert, pd.DataFrame):
+        groesse = int(wert.memory_usage(index=True, deep=False).sum())
+        return groesse + sum(
+            _objekt_groesse(wert.iloc[:, i]) for i, dtype in enumerate(wert.dtypes) if _python_objekte(dtype)
+        )
+    if isinstance(wert, pd.Series):
+        groesse = int(wert.memory_usage(index=True, deep=False))
+        return groesse + (_objekt_groesse(wert) if _python_objekte(wert.dtype) else 0)
+    if isinstance(wert, np.ndarray):
+        return int(wert.nbytes) + (_objekt_groesse(wert) if wert.dtype == object else 0)
+    if isinstance(wert, (str, bytes)):
+        return len(wert)
+    if _tiefe > 4:
+        return 64
+    if hasattr(wert, "to_plotly_json"):  # Plotly-Figur: nur die Datenfelder der Spuren, ohne sie zu kopieren
+        return sum(
+            schaetze_groesse(t[name], _tiefe + 1) for t in wert.data for name in PLOTLY_DATEN
+            if name in t and t[name] is not None
+        )
+    if isinstance(wert, dict):
+        return sum(schaetze_groesse(v, _tiefe + 1) for v in wert.values()) + 64
+    if isinstance(wert, (list, tuple)):
+        if len(wert) > 1000:  # lange Listen nicht einzeln durchgehen
+            return len(wert) * schaetze_groesse(wert[0], _tiefe + 1)
+        return sum(schaetze_groesse(v, _tiefe + 1) for v in wert) + 8 * len(wert)
+    return 64
+
+
+class Zwischenspeicher:
+    """
+    LRU-Speicher für Zwischenergebnisse mit Treffer-/Fehlschlag-Zählern je Stufe.
+
+    Args:
+        max_eintraege (int): Maximale Anzahl gespeicherter Ergebnisse
+        max_bytes (int): Maximale geschätzte Gesamtgröße
+    """
+
+    def __init__(self, max_eintraege=MAX_EINTRAEGE, max_bytes=MAX_BYTES):
+        self.max_eintraege = max_eintraege
+        self.max_bytes = max_bytes
+        self.belegt = 0
+        self.treffer = Counter()
+        self.fehlschlaege = Counter()
+        self._eintraege = OrderedDict()  # (stufe, schluessel) -> (wert, groesse)
+        self._lock = threading.Lock()
+
+    def hole(self, stufe, schluessel, berechnen):
+        """
+        Liefert das gespeicherte Ergebnis einer Stufe oder berechnet es.
+
+        Args:
+            stufe (str): Name der Stufe (für Zähler und Anzeige)
+            schluessel (tuple): Hashbarer Schlüssel aus allen Eingaben der Stufe
+            berechnen (callable): Funktion ohne Argumente, die das Ergebnis berechnet
+
+        Returns:
+            Ergebnis der Stufe (nicht verändern – wird bei weiteren Reruns wiederverwendet)
+        """
+        k = (stufe, schluessel)
+        with self._lock:
+            if k in self._eintraege:
+                self._eintraege.move_to_end(k)
+                self.treffer[stufe] += 1
+                return self._eintraege[k][0]
+            self.fehlschlaege[stufe] += 1
+
+        wert = berechnen()
+        groesse = schaetze_groesse(wert)
+
+        with self._lock:
+            if k in self._eintraege:  # parallel von einer anderen Sitzung berechnet
+                self.belegt -= self._eintraege.pop(k)[1]
+            self._eintraege[k] = (wert, groesse)
+            self.belegt += groesse
+            # Älteste Einträge verdrängen, das neueste Ergebnis bleibt immer erhalten
+            while len(self._eintraege) > 1 and (
+                len(self._eintraege) > self.max_eintraege or self.belegt > self.max_bytes
+            ):
+                _, (_, g) = self._eintraege.popitem(last=False)
+                self.belegt -= g
+        return wert
+
+    def fortschreiben(self, stufe, schluessel, vorher, berechnen, fortsetzen):
+        """
+        Wie hole, aber für wachsende Daten (Live-Modus): liegt das Ergebnis des vorherigen Stands noch vor,
+        entsteht das neue daraus, sonst wird es komplett berechnet.
+
+        Args:
+            stufe (str): Name der Stufe
+            schluessel (tuple): Schlüssel des aktuellen Stands
+            vorher (tuple | None): Schlüssel des vorherigen Stands (None = kein Vorgänger)
+            berechnen (callable): Funktion ohne Argumente, die das Ergebnis komplett berechnet
+            fortsetzen (callable): Funktion(altes Ergebnis) → neues Ergebnis, nur aus dem Zuwachs
+
+        Returns:
+            Ergebnis der Stufe (nicht verändern, auch das alte Ergebnis nicht)
+        """
+        def rechnen():
+            with self._lock:
+                alt = self._eintraege.get((stufe, vorher)) if vorher is not None else None
+            return berechnen() if alt is None else fortsetzen(alt[0])
+        return self.hole(stufe, schluessel, rechnen)
+
+    def leeren(self):
+        # Alle Ergebnisse verwerfen (Schaltfläche im Dashboard), die Zähler bleiben für die Anzeige stehen
+        with self._lock:
+            self._eintraege.clear()
+            self.belegt = 0
+
+    def statistik(self):
+        # Übersicht je Stufe für die Anzeige im Dashboard
+        with self._lock:
+            eintraege = Counter(stufe for stufe, _ in self._eintraege)
+            stufen = sorted(set(self.treffer) | set(self.fehlschlaege))
+            return pd.DataFrame({
+                "Stufe": stufen,
+                "Treffer": [self.treffer[s] for s in stufen],
+                "Berechnet": [self.fehlschlaege[s] for s in stufen],
+                "Einträge": [eintraege[s] for s in stufen],
+            })
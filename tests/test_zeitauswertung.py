@@ -0,0 +1,47 @@
+# test_zeitauswertung.py
+
+import pandas as pd
+
+from modul_zeitauswertung import gruppiere_fehlerzeitraeume, FEHLERGRUENDE
+
+
+def _fehler(zeilen):
+    # zeilen: (Sekunde, Baggernummer, Baggerfeld, Fehlgrund)
+    df = pd.DataFrame(zeilen, columns=["sekunde", "Baggernummer", "Baggerfeld", "Fehlgrund"])
+    df["timestamp"] = pd.Timestamp("2025-04-01 06:00:00") + pd.to_timedelta(df.pop("sekunde"), unit="s")
+    df["Fehlgrund"] = pd.Categorical(df["Fehlgrund"], FEHLERGRUENDE)
+    return df[["timestamp", "Baggernummer", "Baggerfeld", "Fehlgrund"]]
+
+
+def test_verschraenkte_schiffe_bilden_getrennte_fehlerzeitraeume():
+    # Zwei Schiffe im selben Feld, gleicher Fehlgrund, Zeilen abwechselnd im 5-s-Takt
+    grund = FEHLERGRUENDE[1]
+    zeilen = [(t, 1 if t % 10 == 0 else 2, "F1", grund) for t in range(0, 60, 5)]
+
+    gruppen = gruppiere_fehlerzeitraeume(_fehler(zeilen))
+
+    assert len(gruppen) == 2
+    assert gruppen["Anzahl"].tolist() == [6, 6]
+    assert gruppen["Startzeit"].tolist() == [pd.Timestamp("2025-04-01 06:00:00"), pd.Timestamp("2025-04-01 06:00:05")]
+    assert gruppen["Endzeit"].tolist() == [pd.Timestamp("2025-04-01 06:00:50"), pd.Timestamp("2025-04-01 06:00:55")]
+
+
+def test_fehlgrund_des_anderen_schiffs_unterbricht_keinen_zeitraum():
+    # Schiff 2 hat dazwischen einen anderen Fehlgrund – der Zeitraum von Schiff 1 bleibt ein Lauf
+    zeilen = [(t, 1, "F1", FEHLERGRUENDE[1]) for t in range(0, 60, 10)]
+    zeilen += [(t, 2, "F1", FEHLERGRUENDE[3]) for t in range(5, 60, 10)]
+
+    gruppen = gruppiere_fehlerzeitraeume(_fehler(zeilen))
+
+    assert gruppen["Fehlgrund"].astype(str).tolist() == [FEHLERGRUENDE[1], FEHLERGRUENDE[3]]
+    assert gruppen["Anzahl"].tolist() == [6, 6]
+
+
+def test_luecke_und_feldwechsel_beginnen_neuen_zeitraum():
+    grund = FEHLERGRUENDE[0]
+    zeilen = [(0, 1, "F1", grund), (10, 1, "F1", grund), (40, 1, "F1", grund), (50, 1, "F2", grund)]
+
+    gruppen = gruppiere_fehlerzeitraeume(_fehler(zeilen))
+
+    assert gruppen["Anzahl"].tolist() == [2, 1, 1]
+    assert gruppen["Baggerfeld"].tolist() == ["F1", "F1", "F2"]